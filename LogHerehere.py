@@ -13,28 +13,37 @@ Stop: กด ESC หรือ SPACE เพื่อหยุด
 
 LOG:
 - Console + File (cooking_bot.log)
+- LOG_ASYNC: handler ทำงานบน thread แยก (QueueHandler/QueueListener) ลูปบอทแค่ใส่ record ลงคิว
+- log รายเฟรม (match / loop time / ไม่เจอ state) ถูกสุ่มตาม LOG_EVERY_N_FRAMES + LOG_FRAME_MAX_PER_SEC
 """
 
+import atexit
 import time
 import sys
 import json
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from enum import Enum
 
-import pyautogui
-from pynput import keyboard
-import cv2
-import numpy as np
+from startup import format_timings, lazy_import, load_now, mark, timed, warm_up
+
+# cv2 / numpy โหลดจริงตอนใช้ครั้งแรก, pyautogui / pynput โหลดใน load_gui() ตอนเริ่ม run_bot
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+pyautogui = None
+keyboard = None
+
+from capture import bounding_region, create_backend
+from frame_context import FrameContext, as_frame, edges
+
+mark("import LogHerehere")
 
 
 # =========================
 # SETTINGS
 # =========================
-pyautogui.FAILSAFE = True
-pyautogui.PAUSE = 0.01
-
 BASE_DIR = Path(__file__).parent
 
 # Template paths
@@ -45,6 +54,10 @@ TEMPLATE_CANCOOK = BASE_DIR / "cancook.png"
 TEMPLATE_CANNOTCOOK = BASE_DIR / "cannotcook.png"
 REGION_FILE = BASE_DIR / "spatula_region.json"
 
+# --- Screen capture ---
+CAPTURE_BACKEND = "auto"       # auto / mss / pyautogui (auto = mss ถ้ามี ไม่งั้น pyautogui)
+SINGLE_CAPTURE = True          # จับภาพครั้งเดียวต่อลูป (region หลัก + ปุ่ม + สีปุ่ม มาจากเฟรมเดียวกัน)
+
 # --- Matching thresholds ---
 MATCH_CONFIDENCE = 0.70        # raw grayscale threshold
 EDGE_CONFIDENCE  = 0.35        # edge threshold
@@ -82,6 +95,12 @@ LOG_TO_CONSOLE = True
 # log รายละเอียด match ทุกกี่เฟรม (1 = ทุกลูป)
 LOG_EVERY_N_FRAMES = 1
 
+# log รายเฟรมได้สูงสุดกี่เฟรมต่อวินาที (0 = ไม่จำกัด) เฟรมที่ไม่ถูกเลือกจะไม่สร้างข้อความ log เลย
+LOG_FRAME_MAX_PER_SEC = 5
+
+# True = console/ไฟล์ log เขียนบน thread แยก (ลูปบอทไม่ต้องรอ I/O)
+LOG_ASYNC = True
+
 # ถ้า True จะ log คะแนน raw/edge ของ template ทุกตัว (ละเอียดมาก)
 LOG_MATCH_DETAILS = True
 
@@ -92,7 +111,50 @@ LOG_NO_STATE_EACH_LOOP = True
 # =========================
 # LOGGER SETUP
 # =========================
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler ปกติ format ข้อความใน thread ที่เรียก log ก่อนใส่คิว
+    ตัวนี้ส่ง record ไปทั้งก้อน -> msg % args และ Formatter ทำบน thread ของ QueueListener
+    (args ที่ส่งเข้า logger ต้องไม่ถูกแก้ทีหลัง: ในไฟล์นี้เป็นตัวเลข/str/tuple ทั้งหมด)
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class FrameLogSampler:
+    """เลือกเฟรมที่จะ log รายละเอียด: ทุก every_n เฟรม และไม่เกิน max_per_sec เฟรมต่อวินาที"""
+
+    def __init__(self, every_n=1, max_per_sec=0):
+        self.every_n = max(1, every_n)
+        self.min_gap = 1.0 / max_per_sec if max_per_sec else 0.0
+        self.last = None
+        self.skipped = 0
+
+    def __call__(self, frame_id):
+        if frame_id % self.every_n:
+            self.skipped += 1
+            return False
+        if self.min_gap:
+            now = time.perf_counter()
+            if self.last is not None and now - self.last < self.min_gap:
+                self.skipped += 1
+                return False
+            self.last = now
+        return True
+
+
+_log_listener = None
+
+def stop_logger():
+    """เขียน log ที่ค้างในคิวให้หมดแล้วหยุด thread (เรียกซ้ำได้)"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
 def setup_logger():
+    global _log_listener
     logger = logging.getLogger("cooking_bot")
     # ป้องกันเพิ่ม handler ซ้ำ (ตอนรันซ้ำในบาง env)
     if logger.handlers:
@@ -106,23 +168,51 @@ def setup_logger():
         datefmt="%Y-%m-%d %H:%M:%S"
     )
 
+    handlers = []
     if LOG_TO_CONSOLE:
         ch = logging.StreamHandler(sys.stdout)
         ch.setLevel(level)
         ch.setFormatter(fmt)
-        logger.addHandler(ch)
+        handlers.append(ch)
 
     if LOG_TO_FILE:
         fh = RotatingFileHandler(str(LOG_FILE), maxBytes=2_000_000, backupCount=3, encoding="utf-8")
         fh.setLevel(level)
         fh.setFormatter(fmt)
-        logger.addHandler(fh)
+        handlers.append(fh)
+
+    if LOG_ASYNC and handlers:
+        q = queue.SimpleQueue()
+        _log_listener = QueueListener(q, *handlers, respect_handler_level=True)
+        _log_listener.start()
+        atexit.register(stop_logger)
+        logger.addHandler(DeferredQueueHandler(q))
+    else:
+        for h in handlers:
+            logger.addHandler(h)
 
-    logger.debug("Logger initialized.")
+    logger.debug("Logger initialized. async=%s", LOG_ASYNC)
     return logger
 
 
-logger = setup_logger()
+# handler (console + ไฟล์ log) ถูกเพิ่มใน setup_logger() ตอน run_bot เท่านั้น
+# import โมดูลนี้เฉยๆ จะไม่สร้าง/เขียนไฟล์ log
+logger = logging.getLogger("cooking_bot")
+
+
+# =========================
+# LAZY IMPORT / WARM-UP
+# =========================
+def load_gui():
+    """import pyautogui + pynput ตอนเริ่มรันบอท (ไม่ใช่ตอน import โมดูล)"""
+    global pyautogui, keyboard
+    if pyautogui is None:
+        with timed("import pyautogui/pynput"):
+            import pyautogui as _pyautogui
+            from pynput import keyboard as _keyboard
+        _pyautogui.FAILSAFE = True
+        _pyautogui.PAUSE = 0.01
+        pyautogui, keyboard = _pyautogui, _keyboard
 
 
 # =========================
@@ -187,14 +277,6 @@ def load_region():
 # =========================
 # IMAGE PROCESSING
 # =========================
-def to_gray(pil_img):
-    arr = np.array(pil_img)
-    return cv2.cvtColor(arr, cv2.COLOR_RGB2GRAY)
-
-def edges(gray):
-    blur = cv2.GaussianBlur(gray, (3, 3), 0)
-    return cv2.Canny(blur, 50, 150)
-
 def load_template(path: Path):
     """โหลด template และคืนค่า (gray, edge) หรือ None"""
     if not path.exists():
@@ -208,73 +290,79 @@ def load_template(path: Path):
     logger.debug(f"Template loaded: {path.name} shape={gray.shape}")
     return (gray, edge)
 
+_capture = None
+
+def get_capture():
+    """คืน capture backend (สร้างครั้งแรกครั้งเดียว แล้วใช้ซ้ำทุกเฟรม)"""
+    global _capture
+    if _capture is None:
+        _capture = create_backend(CAPTURE_BACKEND)
+        logger.info(f"📸 Capture backend: {_capture.name} (config={CAPTURE_BACKEND})")
+    return _capture
+
+def grab_frame(region=None):
+    """จับภาพสี 1 ครั้ง -> FrameContext (ใช้ crop()/pixel() ต่อได้โดยไม่ต้องจับภาพใหม่)"""
+    return get_capture().grab_frame(region)
+
 def screenshot_gray(region=None):
     t0 = time.perf_counter()
-    img = pyautogui.screenshot(region=region) if region else pyautogui.screenshot()
-    g = to_gray(img)
-    dt = (time.perf_counter() - t0) * 1000
-    logger.debug(f"Screenshot captured region={region} gray_shape={g.shape} time={dt:.1f}ms")
+    g = get_capture().grab_gray(region)
+    logger.debug("Screenshot captured region=%s gray_shape=%s time=%.1fms",
+                 region, g.shape, (time.perf_counter() - t0) * 1000)
     return g
 
 
-def match_template(screen_gray, template_gray, template_edge,
+def match_template(frame, template_gray, template_edge,
                    raw_thr=MATCH_CONFIDENCE, edge_thr=EDGE_CONFIDENCE,
                    return_debug=False):
     """
+    frame: FrameContext ของเฟรมปัจจุบัน (edge ของจอคำนวณครั้งเดียวต่อเฟรม)
     คืนค่า:
       - ถ้า return_debug=False: (cx, cy, best_score, mode) หรือ None
       - ถ้า return_debug=True: ((cx, cy, best_score, mode) หรือ None, debug_dict)
     """
+    frame = as_frame(frame)
     h, w = template_gray.shape[:2]
 
-    debug = {
-        "raw_thr": float(raw_thr),
-        "edge_thr": float(edge_thr),
-        "raw_max": None, "raw_loc": None,
-        "edge_max": None, "edge_loc": None,
-        "best_mode": None, "best_score": None, "best_loc": None,
-        "template_wh": (int(w), int(h)),
-    }
-
     best = None
 
     # --- RAW matching ---
-    res = cv2.matchTemplate(screen_gray, template_gray, cv2.TM_CCOEFF_NORMED)
+    res = cv2.matchTemplate(frame.gray, template_gray, cv2.TM_CCOEFF_NORMED)
     _, raw_max, _, raw_loc = cv2.minMaxLoc(res)
-    debug["raw_max"] = float(raw_max)
-    debug["raw_loc"] = (int(raw_loc[0]), int(raw_loc[1]))
 
     if raw_max >= raw_thr:
         best = ("raw", float(raw_max), raw_loc)
 
     # --- EDGE matching ---
-    scr_edge = edges(screen_gray)
-    res2 = cv2.matchTemplate(scr_edge, template_edge, cv2.TM_CCOEFF_NORMED)
+    res2 = cv2.matchTemplate(frame.edge, template_edge, cv2.TM_CCOEFF_NORMED)
     _, edge_max, _, edge_loc = cv2.minMaxLoc(res2)
-    debug["edge_max"] = float(edge_max)
-    debug["edge_loc"] = (int(edge_loc[0]), int(edge_loc[1]))
 
     if edge_max >= edge_thr:
         if best is None or edge_max > best[1]:
             best = ("edge", float(edge_max), edge_loc)
 
-    if best is None:
-        if return_debug:
-            return None, debug
-        return None
-
-    mode, score, loc = best
-    debug["best_mode"] = mode
-    debug["best_score"] = float(score)
-    debug["best_loc"] = (int(loc[0]), int(loc[1]))
+    result = None
+    if best is not None:
+        mode, score, loc = best
+        result = (int(loc[0] + w // 2), int(loc[1] + h // 2), float(score), mode)
 
-    cx = int(loc[0] + w // 2)
-    cy = int(loc[1] + h // 2)
-    result = (cx, cy, float(score), mode)
+    if not return_debug:
+        return result
 
-    if return_debug:
-        return result, debug
-    return result
+    # สร้าง debug dict เฉพาะเฟรมที่จะ log จริง
+    debug = {
+        "raw_thr": float(raw_thr),
+        "edge_thr": float(edge_thr),
+        "raw_max": float(raw_max), "raw_loc": (int(raw_loc[0]), int(raw_loc[1])),
+        "edge_max": float(edge_max), "edge_loc": (int(edge_loc[0]), int(edge_loc[1])),
+        "best_mode": None, "best_score": None, "best_loc": None,
+        "template_wh": (int(w), int(h)),
+    }
+    if best is not None:
+        debug["best_mode"] = mode
+        debug["best_score"] = float(score)
+        debug["best_loc"] = (int(loc[0]), int(loc[1]))
+    return result, debug
 
 
 # =========================
@@ -318,7 +406,7 @@ def draw_region_preview(region, loops=2, speed=0.15):
 # =========================
 def click_at(x, y, double=False, reason=""):
     """คลิกที่ตำแหน่ง x, y"""
-    logger.debug(f"CLICK: moveTo({x},{y}) double={double} reason={reason}")
+    logger.debug("CLICK: moveTo(%s,%s) double=%s reason=%s", x, y, double, reason)
     pyautogui.moveTo(x, y)
     if double:
         pyautogui.mouseDown(); time.sleep(0.01); pyautogui.mouseUp()
@@ -340,18 +428,28 @@ def _log_match(name, debug, found):
     if not debug:
         return
     logger.debug(
-        f"MATCH[{name}] found={found} "
-        f"raw={debug['raw_max']:.3f} (thr={debug['raw_thr']:.2f}, loc={debug['raw_loc']}) "
-        f"edge={debug['edge_max']:.3f} (thr={debug['edge_thr']:.2f}, loc={debug['edge_loc']}) "
-        f"best={debug['best_mode']}:{debug['best_score'] if debug['best_score'] is not None else None} "
-        f"tpl_wh={debug['template_wh']}"
+        "MATCH[%s] found=%s raw=%.3f (thr=%.2f, loc=%s) edge=%.3f (thr=%.2f, loc=%s) best=%s:%s tpl_wh=%s",
+        name, found, debug["raw_max"], debug["raw_thr"], debug["raw_loc"],
+        debug["edge_max"], debug["edge_thr"], debug["edge_loc"],
+        debug["best_mode"], debug["best_score"], debug["template_wh"],
     )
 
-def detect_state(screen_gray, templates, offset=(0, 0), frame_id=0):
+def _match(frame, name, tpl, log_details):
+    """match 1 template; log คะแนนเฉพาะเฟรมที่ถูกเลือกให้ log (log_details)"""
+    if not log_details:
+        return match_template(frame, tpl[0], tpl[1])
+    res, dbg = match_template(frame, tpl[0], tpl[1], return_debug=True)
+    _log_match(name, dbg, found=bool(res))
+    return res
+
+def detect_state(frame, templates, offset=(0, 0), log_details=False):
     """
     ตรวจจับ state ปัจจุบัน
+    frame: FrameContext (สร้างครั้งเดียวต่อ screenshot แล้วใช้ร่วมทุก template)
+    log_details: log คะแนน raw/edge ของทุก template ที่ match (เฟรมที่ sampler เลือก)
     Returns: (state, x, y, score) หรือ (None, 0, 0, 0)
     """
+    frame = as_frame(frame)
     menu_tpl, spatula_tpl, done_tpl, cancook_tpl, cannotcook_tpl = templates
     ox, oy = offset
 
@@ -361,45 +459,35 @@ def detect_state(screen_gray, templates, offset=(0, 0), frame_id=0):
 
     # 1) spatula
     if spatula_tpl:
-        res, dbg = match_template(screen_gray, spatula_tpl[0], spatula_tpl[1], return_debug=True)
-        if LOG_MATCH_DETAILS and (frame_id % LOG_EVERY_N_FRAMES == 0):
-            _log_match("spatula", dbg, found=bool(res))
+        res = _match(frame, "spatula", spatula_tpl, log_details)
         if res:
             cx, cy, score, mode = res
             return (GameState.QUICKTIME_EVENT, cx + ox, cy + oy, score)
 
     # 2) done
     if done_tpl:
-        res, dbg = match_template(screen_gray, done_tpl[0], done_tpl[1], return_debug=True)
-        if LOG_MATCH_DETAILS and (frame_id % LOG_EVERY_N_FRAMES == 0):
-            _log_match("done", dbg, found=bool(res))
+        res = _match(frame, "done", done_tpl, log_details)
         if res:
             cx, cy, score, mode = res
             return (GameState.COOKING_DONE, cx + ox, cy + oy, score)
 
     # 3) cannotcook
     if cannotcook_tpl:
-        res, dbg = match_template(screen_gray, cannotcook_tpl[0], cannotcook_tpl[1], return_debug=True)
-        if LOG_MATCH_DETAILS and (frame_id % LOG_EVERY_N_FRAMES == 0):
-            _log_match("cannotcook", dbg, found=bool(res))
+        res = _match(frame, "cannotcook", cannotcook_tpl, log_details)
         if res:
             cx, cy, score, mode = res
             return (GameState.CANNOT_COOK, cx + ox, cy + oy, score)
 
     # 4) cancook
     if cancook_tpl:
-        res, dbg = match_template(screen_gray, cancook_tpl[0], cancook_tpl[1], return_debug=True)
-        if LOG_MATCH_DETAILS and (frame_id % LOG_EVERY_N_FRAMES == 0):
-            _log_match("cancook", dbg, found=bool(res))
+        res = _match(frame, "cancook", cancook_tpl, log_details)
         if res:
             cx, cy, score, mode = res
             return (GameState.CAN_COOK, cx + ox, cy + oy, score)
 
     # 5) menu
     if menu_tpl:
-        res, dbg = match_template(screen_gray, menu_tpl[0], menu_tpl[1], return_debug=True)
-        if LOG_MATCH_DETAILS and (frame_id % LOG_EVERY_N_FRAMES == 0):
-            _log_match("menu", dbg, found=bool(res))
+        res = _match(frame, "menu", menu_tpl, log_details)
         if res:
             cx, cy, score, mode = res
             return (GameState.WAITING_MENU, cx + ox, cy + oy, score)
@@ -425,17 +513,24 @@ def run_bot():
     global STOP_FLAG
     STOP_FLAG = False
 
+    with timed("logger"):
+        setup_logger()
     logger.info("=" * 60)
     logger.info("🍳 Cooking Bot - Heartopia (VERBOSE LOG)")
     logger.info("=" * 60)
 
+    with timed("import cv2/numpy"):
+        load_now(cv2, np)
+    load_gui()
+
     logger.info("📦 กำลังโหลด templates...")
 
-    spatula_tpl = load_template(TEMPLATE_SPATULA)
-    menu_tpl = load_template(TEMPLATE_MENU)
-    done_tpl = load_template(TEMPLATE_DONE)
-    cancook_tpl = load_template(TEMPLATE_CANCOOK)
-    cannotcook_tpl = load_template(TEMPLATE_CANNOTCOOK)
+    with timed("templates"):
+        spatula_tpl = load_template(TEMPLATE_SPATULA)
+        menu_tpl = load_template(TEMPLATE_MENU)
+        done_tpl = load_template(TEMPLATE_DONE)
+        cancook_tpl = load_template(TEMPLATE_CANCOOK)
+        cannotcook_tpl = load_template(TEMPLATE_CANNOTCOOK)
 
     if not spatula_tpl:
         logger.error(f"❌ ไม่พบ template ตะหลิว: {TEMPLATE_SPATULA}")
@@ -468,6 +563,8 @@ def run_bot():
     else:
         logger.info("⚠️ ไม่พบ region - จะค้นหาทั้งหน้าจอ")
 
+    get_capture()
+
     logger.info("-" * 60)
     logger.info("🎮 Game Flow:")
     logger.info("   1) รอหน้าเลือกเมนู (select_menu) -> คลิกเมนู + คลิกพิกัด (220, 260)")
@@ -487,6 +584,12 @@ def run_bot():
         draw_region_preview(region, loops=2, speed=0.12)
         time.sleep(0.5)
 
+    # จ่ายค่าเรียก OpenCV ครั้งแรกก่อนเริ่มจริง (เฟรมแรกไม่ช้ากว่าเฟรมอื่น)
+    with timed("warm-up"):
+        warm_up((menu_tpl, spatula_tpl, done_tpl, cancook_tpl, cannotcook_tpl),
+                (region[3], region[2]) if region else (1080, 1920))
+    logger.info(format_timings())
+
     input("\n👉 กด Enter เพื่อเริ่มบอท...")
     logger.info("⏳ เริ่มใน 2 วินาที...")
     time.sleep(2)
@@ -501,43 +604,64 @@ def run_bot():
     done_count = 0
     current_state = None
     should_check_btn_color = False
+    btn_missing_logged = False  # log "ไม่พบไอคอนปุ่ม" ครั้งแรกหลังเลือกเมนูเสมอ ที่เหลือเฉพาะเฟรมที่ sampler เลือก
 
     frame_id = 0
+    sample_frame = FrameLogSampler(LOG_EVERY_N_FRAMES, LOG_FRAME_MAX_PER_SEC)
+    last_logged_state = None
 
     try:
         while not check_stop():
             frame_id += 1
             loop_t0 = time.perf_counter()
 
-            logger.debug(f"--- LOOP frame={frame_id} ---")
+            # เฟรมนี้ log รายละเอียดไหม (ไม่ถูกเลือก = ไม่สร้างข้อความ/ dict debug เลย)
+            verbose = logger.isEnabledFor(logging.DEBUG) and sample_frame(frame_id)
+            log_details = verbose and LOG_MATCH_DETAILS
+            if verbose:
+                logger.debug("--- LOOP frame=%d ---", frame_id)
 
             # 1) Scan main region
-            scr = screenshot_gray(region=region)
-            state, x, y, score = detect_state(scr, templates, offset, frame_id=frame_id)
+            if SINGLE_CAPTURE:
+                # จับภาพครั้งเดียวครอบทุกพื้นที่ที่ต้องใช้ในลูปนี้ แล้วตัดเป็น view
+                rois = [region, REGION_START_BTN] if should_check_btn_color else [region]
+                t0 = time.perf_counter()
+                shot = grab_frame(bounding_region(*rois))
+                frame = shot.crop(region) if region else shot
+                if verbose:
+                    logger.debug("[frame=%d] Single capture region=%s time=%.1fms",
+                                 frame_id, shot.region, (time.perf_counter() - t0) * 1000)
+            else:
+                frame = FrameContext(screenshot_gray(region=region))
+            state, x, y, score = detect_state(frame, templates, offset, log_details=log_details)
 
+            # state เปลี่ยน -> log เสมอ, state เดิมซ้ำทุกเฟรม -> log เฉพาะเฟรมที่ sampler เลือก
             if state:
-                logger.info(f"[frame={frame_id}] DETECT state={state.value} pos=({x},{y}) score={score:.3f}")
-            else:
-                if LOG_NO_STATE_EACH_LOOP:
-                    logger.info(f"[frame={frame_id}] DETECT state=None (no match above thresholds)")
+                if state != last_logged_state or verbose:
+                    logger.info("[frame=%d] DETECT state=%s pos=(%s,%s) score=%.3f", frame_id, state.value, x, y, score)
+            elif LOG_NO_STATE_EACH_LOOP and (last_logged_state is not None or verbose):
+                logger.info("[frame=%d] DETECT state=None (no match above thresholds)", frame_id)
+            last_logged_state = state
 
             # 2) Button color check (only after selecting menu)
             btn_state = None
 
             if should_check_btn_color:
-                logger.debug(f"[frame={frame_id}] BTN_COLOR_CHECK enabled. region={REGION_START_BTN}")
+                if verbose:
+                    logger.debug("[frame=%d] BTN_COLOR_CHECK enabled. region=%s", frame_id, REGION_START_BTN)
 
                 try:
-                    btn_scr = screenshot_gray(region=REGION_START_BTN)
+                    if SINGLE_CAPTURE:
+                        btn_frame = shot.crop(REGION_START_BTN)
+                    else:
+                        btn_frame = FrameContext(screenshot_gray(region=REGION_START_BTN))
                     btn_found = False
                     btn_x, btn_y = 0, 0
                     found_from = None
 
                     # Try find cancook icon inside button region
                     if templates[3]:
-                        res, dbg = match_template(btn_scr, templates[3][0], templates[3][1], return_debug=True)
-                        if LOG_MATCH_DETAILS and (frame_id % LOG_EVERY_N_FRAMES == 0):
-                            _log_match("btn_cancook", dbg, found=bool(res))
+                        res = _match(btn_frame, "btn_cancook", templates[3], log_details)
                         if res:
                             btn_found = True
                             btn_x, btn_y = res[0] + BTN_START_X1, res[1] + BTN_START_Y1
@@ -545,16 +669,17 @@ def run_bot():
 
                     # Try find cannotcook icon inside button region
                     if (not btn_found) and templates[4]:
-                        res, dbg = match_template(btn_scr, templates[4][0], templates[4][1], return_debug=True)
-                        if LOG_MATCH_DETAILS and (frame_id % LOG_EVERY_N_FRAMES == 0):
-                            _log_match("btn_cannotcook", dbg, found=bool(res))
+                        res = _match(btn_frame, "btn_cannotcook", templates[4], log_details)
                         if res:
                             btn_found = True
                             btn_x, btn_y = res[0] + BTN_START_X1, res[1] + BTN_START_Y1
                             found_from = "cannotcook"
 
                     if btn_found:
-                        current_rgb = pyautogui.pixel(btn_x, btn_y)
+                        if SINGLE_CAPTURE:
+                            current_rgb = shot.pixel(btn_x, btn_y)
+                        else:
+                            current_rgb = pyautogui.pixel(btn_x, btn_y)
                         can_rgb = hex_to_rgb(BTN_COLOR_CANCOOK)
                         cannot_rgb = hex_to_rgb(BTN_COLOR_CANNOTCOOK)
 
@@ -572,8 +697,9 @@ def run_bot():
                         else:
                             btn_state = GameState.CANNOT_COOK
                             logger.warning(f"[frame={frame_id}] 🛑 ปุ่มสีเทา -> หยุดบอท")
-                    else:
-                        logger.warning(f"[frame={frame_id}] BTN_COLOR_CHECK: ไม่พบไอคอนปุ่มใน REGION_START_BTN")
+                    elif verbose or not btn_missing_logged:
+                        logger.warning("[frame=%d] BTN_COLOR_CHECK: ไม่พบไอคอนปุ่มใน REGION_START_BTN", frame_id)
+                        btn_missing_logged = True
 
                 except Exception as e:
                     logger.exception(f"[frame={frame_id}] BTN_COLOR_CHECK exception: {e}")
@@ -593,7 +719,8 @@ def run_bot():
 
                 click_at(x, y, double=DOUBLE_CLICK_SPATULA, reason="spatula")
                 click_count += 1
-                logger.debug(f"[frame={frame_id}] spatula click_count={click_count} delay={SPATULA_CLICK_DELAY}s")
+                if verbose:
+                    logger.debug("[frame=%d] spatula click_count=%d delay=%ss", frame_id, click_count, SPATULA_CLICK_DELAY)
                 time.sleep(SPATULA_CLICK_DELAY)
 
             elif state == GameState.COOKING_DONE:
@@ -635,17 +762,20 @@ def run_bot():
                     current_state = GameState.WAITING_MENU
                     time.sleep(1.0)
                     should_check_btn_color = True
+                    btn_missing_logged = False
                     current_state = None
 
             else:
                 if current_state is not None:
-                    logger.debug(f"[frame={frame_id}] No state -> reset current_state from {current_state.value}")
+                    logger.debug("[frame=%d] No state -> reset current_state from %s", frame_id, current_state.value)
                     current_state = None
-                logger.debug(f"[frame={frame_id}] sleep SEARCH_DELAY={SEARCH_DELAY}s")
+                if verbose:
+                    logger.debug("[frame=%d] sleep SEARCH_DELAY=%ss", frame_id, SEARCH_DELAY)
                 time.sleep(SEARCH_DELAY)
 
-            loop_dt = (time.perf_counter() - loop_t0) * 1000
-            logger.debug(f"[frame={frame_id}] loop time={loop_dt:.1f}ms | clicks={click_count} done={done_count}")
+            if verbose:
+                logger.debug("[frame=%d] loop time=%.1fms | clicks=%d done=%d",
+                             frame_id, (time.perf_counter() - loop_t0) * 1000, click_count, done_count)
 
     except pyautogui.FailSafeException:
         logger.warning("🛑 FailSafe: เมาส์ไปมุมจอแล้วหยุดอัตโนมัติ")
@@ -657,11 +787,14 @@ def run_bot():
             logger.debug("Keyboard listener stopped.")
         except Exception as e:
             logger.debug(f"listener.stop exception: {e}")
+        get_capture().close()
 
         logger.info("🏁 สรุป:")
         logger.info(f"   คลิกทั้งหมด: {click_count} ครั้ง")
         logger.info(f"   ทำอาหารเสร็จ: {done_count} จาน")
+        logger.info(f"   เฟรมที่ไม่ log รายละเอียด (sampling/rate limit): {sample_frame.skipped}/{frame_id}")
         logger.info(f"   LOG FILE: {LOG_FILE}")
+        stop_logger()
 
 
 # =========================
@@ -0,0 +1,306 @@
+"""
+⏱️ Benchmark Suite - วัดความเร็ว hot path ของบอทบนภาพจำลอง (ไม่ต้องเปิดเกม)
+
+วัด:
+  match.<template>.raw / .edge  = cv2.matchTemplate + minMaxLoc แต่ละ branch
+  match.<template>.total        = match_template() ทั้งฟังก์ชัน (FrameContext ใหม่ทุกครั้ง)
+  detect.region.* / detect.fullscreen.* = detect_state() บนพื้นที่ใน spatula_region.json และทั้งจอ
+  detect.fullscreen.spatula.tracked      = detect_state() เมื่อ TemplateTracker รู้ตำแหน่งเดิมแล้ว
+  detect.*.empty.parallel                = detect_state() ผ่าน MatchPool (--workers, ค่าเริ่มต้น = จำนวน core)
+  detect.region.*.prefilter              = detect_state() เมื่อเทียบ thumbnail ก่อน match เต็ม (PreFilter)
+  loop.iterations               = bot_loop() ต่อ 1 รอบ (FakeBackend + FakeInput + VirtualClock)
+
+Usage:
+  python bench.py                          # รันแล้วแสดงตาราง
+  python bench.py --json out.json          # เขียนผลเป็น JSON
+  python bench.py --save-baseline base.json
+  python bench.py --baseline base.json     # เทียบกับ baseline, ช้าลงเกิน tolerance = exit 1
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+
+import cv2
+
+import cooking_bot as bot
+import synthetic
+from capture import FakeBackend
+from clock import VirtualClock
+from frame_context import FrameContext
+from input_sink import FakeInput
+from parallel import MatchPool
+from prefilter import PreFilter
+from tracking import TemplateTracker
+
+TEMPLATE_FILES = {
+    "spatula": bot.TEMPLATE_SPATULA,
+    "done": bot.TEMPLATE_DONE,
+    "menu": bot.TEMPLATE_MENU,
+    "cancook": bot.TEMPLATE_CANCOOK,
+    "cannotcook": bot.TEMPLATE_CANNOTCOOK,
+}
+
+DEFAULT_TOLERANCE = 0.25  # ช้าลงเกิน 25% จาก baseline = fail
+
+
+def timeit(fn, repeat, warmup=2):
+    """รัน fn ซ้ำ แล้วคืนสถิติเวลา (ms)"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    n = len(samples)
+    return {
+        "n": n,
+        "min_ms": samples[0],
+        "mean_ms": sum(samples) / n,
+        "p50_ms": samples[n // 2],
+        "p95_ms": samples[min(n - 1, int(0.95 * n))],
+    }
+
+
+def load_templates():
+    tpls = dict(zip(TEMPLATE_FILES, bot.load_templates(list(TEMPLATE_FILES.values()))))
+    missing = [name for name, t in tpls.items() if t is None]
+    if missing:
+        raise SystemExit(f"❌ ไม่พบ template: {', '.join(missing)}")
+    return tpls
+
+
+def ordered(tpls):
+    """เรียงตาม tuple ที่ detect_state ใช้: (menu, spatula, done, cancook, cannotcook)"""
+    return (tpls["menu"], tpls["spatula"], tpls["done"], tpls["cancook"], tpls["cannotcook"])
+
+
+# =========================
+# BENCHMARKS
+# =========================
+def bench_match(tpls, screen_gray, repeat):
+    results = {}
+    frame = FrameContext(screen_gray)
+    scr_edge = frame.edge
+    results["frame.edge_prep"] = timeit(lambda: FrameContext(screen_gray).edge, repeat)
+    for name, (tg, te) in tpls.items():
+        results[f"match.{name}.raw"] = timeit(
+            lambda: cv2.minMaxLoc(cv2.matchTemplate(screen_gray, tg, cv2.TM_CCOEFF_NORMED)), repeat)
+        results[f"match.{name}.edge"] = timeit(
+            lambda: cv2.minMaxLoc(cv2.matchTemplate(scr_edge, te, cv2.TM_CCOEFF_NORMED)), repeat)
+        results[f"match.{name}.total"] = timeit(
+            lambda: bot.match_template(FrameContext(screen_gray), tg, te), repeat)
+    return results
+
+
+def bench_detect(tpls, label, screen_gray, spatula_gray, repeat):
+    templates = ordered(tpls)
+    return {
+        # ไม่มีอะไรบนจอ = ต้องไล่ครบ 5 template (กรณีแย่สุด)
+        f"detect.{label}.empty": timeit(
+            lambda: bot.detect_state(FrameContext(screen_gray), templates), repeat),
+        # มีตะหลิว = เจอตั้งแต่ template แรก
+        f"detect.{label}.spatula": timeit(
+            lambda: bot.detect_state(FrameContext(spatula_gray), templates), repeat),
+    }
+
+
+def bench_pyramid(tpls, screen_gray, spatula_gray, repeat):
+    """detect_state ทั้งจอด้วย pyramid matching (เทียบกับ detect.fullscreen.*)"""
+    saved = bot.PYRAMID_MATCHING
+    bot.PYRAMID_MATCHING = True
+    try:
+        results = bench_detect(tpls, "fullscreen", screen_gray, spatula_gray, repeat)
+    finally:
+        bot.PYRAMID_MATCHING = saved
+    return {f"{name}.pyramid": r for name, r in results.items()}
+
+
+def bench_prefilter(tpls, screen_gray, spatula_gray, repeat):
+    """detect_state() ผ่าน PreFilter (เทียบกับ detect.region.*) ไม่ audit = วัดเฉพาะกรณีตัดทิ้งได้"""
+    saved = bot._prefilter
+    bot._prefilter = PreFilter(bot.PREFILTER_LEVEL, bot.PREFILTER_THRESHOLD, bot.PREFILTER_EDGE_THRESHOLD,
+                               audit_every=0)
+    try:
+        results = bench_detect(tpls, "region", screen_gray, spatula_gray, repeat)
+    finally:
+        bot._prefilter = saved
+    return {f"{name}.prefilter": r for name, r in results.items()}
+
+
+def bench_tracking(tpls, spatula_gray, repeat):
+    """detect_state ทั้งจอเมื่อ tracker จำตำแหน่งตะหลิวไว้แล้ว (ค้นแค่หน้าต่างรอบจุดเดิม)"""
+    templates = ordered(tpls)
+    tracker = TemplateTracker(bot.TRACK_MARGIN)
+    bot.detect_state(FrameContext(spatula_gray), templates, tracker=tracker)
+    return {"detect.fullscreen.spatula.tracked": timeit(
+        lambda: bot.detect_state(FrameContext(spatula_gray), templates, tracker=tracker), repeat)}
+
+
+def bench_parallel(tpls, label, screen_gray, workers, repeat):
+    """detect_state กรณีไล่ครบ 5 template โดย match ทุก template/โหมดพร้อมกันบน MatchPool"""
+    templates = ordered(tpls)
+    pool = MatchPool(workers)
+    try:
+        result = timeit(lambda: bot.detect_state(FrameContext(screen_gray), templates, pool=pool), repeat)
+    finally:
+        pool.close()
+    result["workers"] = workers
+    return {f"detect.{label}.empty.parallel": result}
+
+
+def bench_loop(tpls, region, frames, iterations):
+    """วัด bot_loop ทั้งรอบ (capture จาก FakeBackend, sleep เป็นเวลาเสมือน)"""
+    templates = ordered(tpls)
+    clock = VirtualClock()
+    backend = FakeBackend(frames, channels="BGR")
+    inputs = FakeInput(clock, pixel_source=lambda x, y: (0, 0, 0))
+    count = [0]
+
+    def stop_fn():
+        count[0] += 1
+        return count[0] > iterations
+
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # ไม่ให้ข้อความของบอทปนกับตาราง
+        stats = bot.bot_loop(templates, region, backend, inputs, clock, stop_fn=stop_fn, pipeline_mode=False)
+    dt = time.perf_counter() - t0
+    n = stats["iterations"]
+    return {"loop.iterations": {
+        "n": n,
+        "min_ms": 1000 * dt / n if n else 0.0,
+        "mean_ms": 1000 * dt / n if n else 0.0,
+        "p50_ms": 1000 * dt / n if n else 0.0,
+        "p95_ms": 1000 * dt / n if n else 0.0,
+        "iterations_per_sec": n / dt if dt else 0.0,
+    }}
+
+
+def run_suite(repeat=20, loop_iterations=200, workers=None):
+    tpls = load_templates()
+    region = bot.load_region() or (707, 370, 396, 250)
+
+    full_empty = synthetic.frame_with(None, seed=1)
+    full_spatula = synthetic.frame_with(
+        bot.TEMPLATE_SPATULA, pos=(region[0] + 40, region[1] + 40), seed=2)
+    x, y, w, h = region
+    empty_gray = cv2.cvtColor(full_empty, cv2.COLOR_BGR2GRAY)
+    spatula_gray = cv2.cvtColor(full_spatula, cv2.COLOR_BGR2GRAY)
+
+    results = {}
+    results.update(bench_match(tpls, empty_gray[y:y + h, x:x + w], repeat))
+    results.update(bench_detect(tpls, "region", empty_gray[y:y + h, x:x + w],
+                                spatula_gray[y:y + h, x:x + w], repeat))
+    results.update(bench_prefilter(tpls, empty_gray[y:y + h, x:x + w], spatula_gray[y:y + h, x:x + w], repeat))
+    results.update(bench_detect(tpls, "fullscreen", empty_gray, spatula_gray, max(3, repeat // 4)))
+    results.update(bench_pyramid(tpls, empty_gray, spatula_gray, max(3, repeat // 4)))
+    results.update(bench_tracking(tpls, spatula_gray, repeat))
+    workers = workers or os.cpu_count() or 1
+    results.update(bench_parallel(tpls, "region", empty_gray[y:y + h, x:x + w], workers, repeat))
+    results.update(bench_parallel(tpls, "fullscreen", empty_gray, workers, max(3, repeat // 4)))
+    results.update(bench_loop(tpls, region, [full_empty, full_spatula], loop_iterations))
+
+    meta = {
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "templates": sum(1 for t in tpls if t),
+        "region": list(region),
+        "screen": list(synthetic.SCREEN_SIZE),
+        "repeat": repeat,
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    return {"meta": meta, "results": results}
+
+
+# =========================
+# BASELINE
+# =========================
+def compare_baseline(current, baseline, tolerance, key="min_ms"):
+    """
+    คืน list ของ (name, base_ms, now_ms, ratio, failed)
+    เทียบด้วย min_ms เป็นค่าเริ่มต้น (นิ่งที่สุดเมื่อเครื่องมีงานอื่นแทรก)
+    """
+    rows = []
+    for name, base in baseline["results"].items():
+        now = current["results"].get(name)
+        if now is None or key not in base:
+            continue
+        ratio = now[key] / base[key] if base[key] else 1.0
+        rows.append((name, base[key], now[key], ratio, ratio > 1.0 + tolerance))
+    return rows
+
+
+def print_table(report):
+    print(f"\n{'benchmark':<32}{'min ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+    print("-" * 72)
+    for name, r in report["results"].items():
+        print(f"{name:<32}{r['min_ms']:>10.3f}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['mean_ms']:>10.3f}")
+    for label in ("region", "fullscreen"):
+        seq = report["results"].get(f"detect.{label}.empty")
+        par = report["results"].get(f"detect.{label}.empty.parallel")
+        if seq and par:
+            print(f"\n🧵 {label}: parallel {par['workers']} threads เร็วขึ้น x{seq['min_ms'] / par['min_ms']:.2f} "
+                  f"เทียบกับทีละ template ({report['meta']['cpu_count']} core)")
+            if (report["meta"]["cpu_count"] or 1) < report["meta"].get("templates", 0):
+                print(f"   core น้อยกว่า template {report['meta']['templates']} ตัว -> bot_loop ไม่ใช้ pool บนเครื่องนี้")
+    loop = report["results"].get("loop.iterations")
+    if loop:
+        print(f"\n🔁 loop: {loop['iterations_per_sec']:.1f} รอบ/วิ")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark hot path ของ cooking_bot บนภาพจำลอง")
+    ap.add_argument("--repeat", type=int, default=20, help="จำนวนรอบต่อ benchmark")
+    ap.add_argument("--loop-iterations", type=int, default=200)
+    ap.add_argument("--json", type=Path, help="เขียนผลเป็น JSON")
+    ap.add_argument("--save-baseline", type=Path, help="บันทึกผลนี้เป็น baseline")
+    ap.add_argument("--baseline", type=Path, help="เทียบกับ baseline ที่บันทึกไว้")
+    ap.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                    help="สัดส่วนที่ยอมให้ช้าลงได้ (0.25 = 25%%)")
+    ap.add_argument("--metric", default="min_ms", choices=["min_ms", "p50_ms", "p95_ms", "mean_ms"],
+                    help="ค่าที่ใช้เทียบกับ baseline")
+    ap.add_argument("--threads", type=int, default=None, help="cv2.setNumThreads (ให้ผลนิ่งขึ้น)")
+    ap.add_argument("--workers", type=int, default=None, help="จำนวน thread ของ MatchPool (ค่าเริ่มต้น = จำนวน core)")
+    args = ap.parse_args(argv)
+
+    if args.threads is not None:
+        cv2.setNumThreads(args.threads)
+
+    report = run_suite(args.repeat, args.loop_iterations, args.workers)
+    print_table(report)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.json:
+        args.json.write_text(text, encoding="utf-8")
+        print(f"\n📝 JSON -> {args.json}")
+    if args.save_baseline:
+        args.save_baseline.write_text(text, encoding="utf-8")
+        print(f"📌 baseline -> {args.save_baseline}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        rows = compare_baseline(report, baseline, args.tolerance, args.metric)
+        failed = [r for r in rows if r[4]]
+        print(f"\n📊 เทียบ baseline ({args.baseline}, {args.metric}, tolerance={args.tolerance:.0%})")
+        for name, base, now, ratio, bad in rows:
+            mark = "❌" if bad else "✅"
+            print(f"   {mark} {name:<30} {base:8.3f} -> {now:8.3f} ms  (x{ratio:.2f})")
+        if failed:
+            print(f"\n❌ ช้าลงเกินกำหนด {len(failed)} รายการ")
+            return 1
+        print("\n✅ ไม่มีรายการไหนช้าลงเกินกำหนด")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
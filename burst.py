@@ -0,0 +1,101 @@
+"""
+🎯 Burst clicker - คลิกตะหลิวหลายครั้งต่อการตรวจจับ 1 ครั้ง + ปรับจำนวน/ความถี่เองจากผลที่เห็น
+
+เดิมคลิก 1 ครั้ง -> จับภาพ + detect_state ใหม่ทุกครั้ง (คลิกได้ช้าเท่าความเร็วตรวจจับ)
+BurstController ตัดสินจากเฟรมถัดไปหลังยิงชุดคลิก:
+- ตะหลิวยังอยู่ที่เดิม  -> ชุดคลิกยังไม่พอ: เพิ่ม burst ทีละ 1 และคลิกถี่ขึ้น
+- ตะหลิวย้ายตำแหน่ง    -> คลิกท้ายชุดอาจโดนที่ว่าง: ลด burst ครึ่งหนึ่ง และคลิกห่างขึ้น
+- ตะหลิวหายไป         -> QTE จบ/เกินพอดี: ลด burst ทีละ 1
+- ตะหลิวยังอยู่แต่คลิกถึงเกมไม่ครบชุด (คิว input ทิ้งคลิกที่เก่าเกิน) -> เมาส์ตามไม่ทัน:
+  ลด burst เหลือเท่าที่ถึงจริง และคลิกห่างขึ้น (ไม่เพิ่ม burst จากคลิกที่ไม่ได้ทำ)
+
+QteTelemetry: เวลา QTE และคลิกต่อวินาทีของแต่ละจาน
+(เริ่มที่ตะหลิวตัวแรก จบที่ตะหลิวตัวสุดท้ายก่อนเจอ cookingdone)
+"""
+
+
+class BurstController:
+    def __init__(self, start, max_burst, delay, min_delay, max_delay, move_tolerance):
+        self.max_burst = max(1, max_burst)
+        self.burst = min(max(1, start), self.max_burst)
+        self.delay = delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.move_tolerance = move_tolerance
+        self.last_target = None  # (x, y) ของชุดคลิกล่าสุดที่ยังไม่ได้รับ feedback
+        self.last_issued = 0     # คลิกของชุดล่าสุดที่ถึงเกมจริง
+        self.feedback_counts = {"stay": 0, "moved": 0, "gone": 0, "lagged": 0}
+
+    def plan(self, x, y):
+        """คืน (จำนวนคลิก, delay ระหว่างคลิก) สำหรับชุดคลิกที่ (x, y)"""
+        self.last_target = (x, y)
+        self.last_issued = self.burst
+        return self.burst, self.delay
+
+    def issued(self, clicks):
+        """จำนวนคลิกของชุดล่าสุดที่ถึงเกมจริง (ไม่เรียก = ถือว่าครบตามที่ plan)"""
+        self.last_issued = clicks
+
+    def observe(self, visible, x=0, y=0):
+        """เรียกทุกเฟรมหลังยิงชุดคลิก: visible = ยังเจอตะหลิวอยู่ไหม, (x, y) = ตำแหน่งที่เจอ"""
+        if self.last_target is None:
+            return
+        lx, ly = self.last_target
+        self.last_target = None
+        if not visible:
+            self.feedback_counts["gone"] += 1
+            self.burst = max(1, self.burst - 1)
+        elif max(abs(x - lx), abs(y - ly)) > self.move_tolerance:
+            self.feedback_counts["moved"] += 1
+            self.burst = max(1, self.burst // 2)
+            self.delay = min(self.max_delay, self.delay * 1.25)
+        elif self.last_issued < self.burst:
+            self.feedback_counts["lagged"] += 1
+            self.burst = max(1, self.last_issued)
+            self.delay = min(self.max_delay, self.delay * 1.25)
+        else:
+            self.feedback_counts["stay"] += 1
+            self.burst = min(self.max_burst, self.burst + 1)
+            self.delay = max(self.min_delay, self.delay * 0.9)
+
+    def stats(self):
+        return dict(self.feedback_counts, burst=self.burst, delay=self.delay)
+
+
+class QteTelemetry:
+    def __init__(self):
+        self.dishes = []   # [{"duration", "clicks", "cps"}] ต่อจาน
+        self._start = None
+        self._last_seen = None
+        self._clicks = 0
+
+    def seen(self, now, clicks):
+        """เจอตะหลิวแล้วคลิกไป clicks ครั้ง"""
+        if self._start is None:
+            self._start = now
+        self._last_seen = now
+        self._clicks += clicks
+
+    def finish(self):
+        """จบ QTE ของจานนี้ (เจอ cookingdone หรือจบลูป)"""
+        if self._start is None:
+            return None
+        duration = self._last_seen - self._start
+        dish = {"duration": duration, "clicks": self._clicks,
+                "cps": self._clicks / duration if duration > 0 else 0.0}
+        self.dishes.append(dish)
+        self._start = self._last_seen = None
+        self._clicks = 0
+        return dish
+
+    def stats(self):
+        n = len(self.dishes)
+        if not n:
+            return {"dishes": 0}
+        total_time = sum(d["duration"] for d in self.dishes)
+        total_clicks = sum(d["clicks"] for d in self.dishes)
+        return {"dishes": n, "avg_duration": total_time / n,
+                "max_duration": max(d["duration"] for d in self.dishes),
+                "avg_clicks": total_clicks / n,
+                "cps": total_clicks / total_time if total_time > 0 else 0.0,
+                "per_dish": self.dishes}
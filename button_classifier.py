@@ -0,0 +1,82 @@
+"""
+🎨 Button Classifier - ตัดสินว่าปุ่มเริ่มทำอาหารเป็นสีไหน จากเฟรมที่จับมาแล้ว
+
+เดิม: pyautogui.pixel() 1 จุด (จับจอใหม่อีกรอบ) + สร้าง hex_to_rgb/color_dist ใหม่ทุกลูป
+ตอนนี้:
+- อ่านสีจาก FrameContext เดิม (rgb_patch) ทั้งกรอบปุ่มที่ match เจอ เก็บทุก step พิกเซล
+- ใช้ค่ากลาง (median) ต่อ channel ของ patch: ตัวหนังสือสีขาวกลางปุ่ม (~1/3 ของกรอบ) ไม่ดึงสีเพี้ยนเหมือนค่าเฉลี่ย
+  (จุดกลางปุ่มจุดเดียว/กรอบเล็กๆ ตรงกลางมักโดนตัวหนังสือ)
+- เทียบกับสีเป้าหมายทุกตัวพร้อมกัน (numpy) ด้วยระยะ max(|dr|, |dg|, |db|) แบบ color_dist เดิม
+- ห่างทุกสีเกิน tolerance = ยังไม่รู้ (เช่นปุ่มกำลัง fade in)
+- hysteresis: ต้องได้สีเดียวกัน confirm เฟรมติดกันก่อนตัดสิน (กันหยุดบอทเพราะเฟรมที่ปุ่มยังเปลี่ยนสีไม่เสร็จ)
+decision latency = เวลาที่ classify() ใช้จริง (µs) ดูได้ใน stats()
+"""
+
+import time
+
+from startup import lazy_import
+
+np = lazy_import("numpy")
+
+
+def hex_to_rgb(h):
+    h = h.lstrip('#')
+    return tuple(int(h[i:i+2], 16) for i in (0, 2, 4))
+
+
+class ButtonClassifier:
+    def __init__(self, targets, tolerance=30, step=4, confirm=2):
+        """targets: {label: "#RRGGBB"} (label = ค่าที่ classify() คืน)"""
+        self.labels = list(targets)
+        self.targets = np.array([hex_to_rgb(c) for c in targets.values()], dtype=np.int16)
+        self.tolerance = tolerance
+        self.step = step
+        self.confirm = max(1, confirm)
+        self.candidate = None
+        self.streak = 0
+        self.last_rgb = None
+        self.last_dist = None
+        self.frames = 0
+        self.decisions = 0
+        self.unknown = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+
+    def reset(self):
+        """เริ่มตัดสินใหม่ (เรียกก่อนเริ่มเช็คปุ่มแต่ละรอบ)"""
+        self.candidate = None
+        self.streak = 0
+
+    def classify(self, frame, x, y, size):
+        """
+        (x, y) = จุดกลางปุ่มบนจอ, size = (h, w) ของปุ่ม (template ที่ match เจอ)
+        คืน label เมื่อได้สีเดียวกันครบ confirm เฟรม ไม่งั้นคืน None
+        """
+        t0 = time.perf_counter()
+        h, w = size
+        patch = frame.rgb_patch(x, y, w // 2, h // 2, self.step)
+        rgb = np.median(patch, axis=0).astype(np.int16)
+        dist = np.abs(self.targets - rgb).max(axis=1)
+        best = int(dist.argmin())
+        label = self.labels[best] if dist[best] <= self.tolerance else None
+
+        if label is not None and label == self.candidate:
+            self.streak += 1
+        else:
+            self.candidate = label
+            self.streak = 1 if label is not None else 0
+        decided = self.candidate if self.streak >= self.confirm else None
+
+        us = (time.perf_counter() - t0) * 1e6
+        self.frames += 1
+        self.total_us += us
+        self.max_us = max(self.max_us, us)
+        self.unknown += label is None
+        self.decisions += decided is not None
+        self.last_rgb = tuple(int(v) for v in rgb)
+        self.last_dist = {self.labels[i]: int(d) for i, d in enumerate(dist)}
+        return decided
+
+    def stats(self):
+        return {"frames": self.frames, "decisions": self.decisions, "unknown": self.unknown,
+                "mean_us": self.total_us / self.frames if self.frames else 0.0, "max_us": self.max_us}
@@ -0,0 +1,192 @@
+"""
+📸 Capture Backends - ดึงภาพหน้าจอเป็น numpy โดยตรง
+
+Backends:
+- mss       = ตัวจับภาพถาวร (reuse handle เดิม, ไม่สร้าง PIL image) เร็วที่สุด
+- pyautogui = fallback แบบเดิม (pyautogui.screenshot -> PIL -> numpy)
+- fake      = ภาพจากไฟล์/array สำหรับทดสอบ (ไม่ต้องมีจอ)
+
+เลือกด้วย create_backend(name) โดย name = "auto" / "mss" / "pyautogui"
+region ใช้รูปแบบเดียวกับ pyautogui: (x, y, w, h) หรือ None = ทั้งจอ
+"""
+
+import threading
+from pathlib import Path
+
+from startup import lazy_import
+from frame_context import FrameContext, to_gray
+from profiling import stage
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+
+def bounding_region(*regions):
+    """
+    รวมหลาย region (x, y, w, h) เป็นกรอบเดียวที่ครอบทั้งหมด
+    ถ้ามี None (= ทั้งจอ) อยู่ด้วย คืน None
+    """
+    if not regions or any(r is None for r in regions):
+        return None
+    x1 = min(r[0] for r in regions)
+    y1 = min(r[1] for r in regions)
+    x2 = max(r[0] + r[2] for r in regions)
+    y2 = max(r[1] + r[3] for r in regions)
+    return (x1, y1, x2 - x1, y2 - y1)
+
+
+def shift_region(region, origin):
+    """เลื่อน region (x, y, w, h) ไปตาม origin (dx, dy) เช่นหน้าต่างเกมที่ไม่ได้อยู่มุมซ้ายบนจอ"""
+    if region is None:
+        return None
+    x, y, w, h = region
+    return (x + origin[0], y + origin[1], w, h)
+
+
+class CaptureBackend:
+    """
+    Interface ของตัวจับภาพ
+    - grab(region)       -> ndarray สี (HxWxC) เรียงสีตาม self.channels
+    - grab_gray(region)  -> ndarray uint8 (HxW)
+    - grab_frame(region) -> FrameContext (มีทั้งสีและ gray แบบ lazy)
+    """
+    name = "base"
+    channels = "RGB"
+
+    def grab(self, region=None):
+        raise NotImplementedError
+
+    def grab_gray(self, region=None):
+        with stage("capture"):
+            img = self.grab(region)
+        return to_gray(img, self.channels)
+
+    def grab_frame(self, region=None):
+        """จับภาพ 1 ครั้งแล้วห่อเป็น FrameContext (เก็บสีไว้ใช้ crop/pixel ได้)"""
+        origin = (region[0], region[1]) if region else (0, 0)
+        with stage("capture"):
+            img = self.grab(region)
+        return FrameContext(img, channels=self.channels, origin=origin)
+
+    def close(self):
+        pass
+
+
+class MSSBackend(CaptureBackend):
+    """จับภาพด้วย mss (X11 SHM / GDI BitBlt) - เก็บ handle ไว้ใช้ซ้ำต่อ thread"""
+    name = "mss"
+    channels = "BGRA"
+
+    def __init__(self):
+        import mss
+        self._mss = mss
+        self._handles = {}  # thread ident -> mss handle (เก็บทุก thread ไว้ปิดตอน close())
+        self._lock = threading.Lock()
+        self._monitor = self._sct().monitors[1]  # จอหลัก (เหมือน pyautogui.screenshot())
+
+    def _sct(self):
+        # mss handle ใช้ข้าม thread ไม่ได้ -> 1 handle ต่อ thread
+        ident = threading.get_ident()
+        sct = self._handles.get(ident)
+        if sct is None:
+            sct = self._mss.mss()
+            with self._lock:
+                self._handles[ident] = sct
+        return sct
+
+    def grab(self, region=None):
+        if region:
+            x, y, w, h = region
+            mon = {"left": int(x), "top": int(y), "width": int(w), "height": int(h)}
+        else:
+            mon = self._monitor
+        shot = self._sct().grab(mon)
+        # zero-copy: ห่อ buffer ของ mss เป็น ndarray (BGRA)
+        return np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+
+    def close(self):
+        """ปิด handle ของทุก thread (capture / detect thread ของ pipeline ด้วย) เรียกหลัง thread เหล่านั้นหยุดแล้ว"""
+        with self._lock:
+            handles, self._handles = list(self._handles.values()), {}
+        for sct in handles:
+            sct.close()
+
+
+class PyAutoGUIBackend(CaptureBackend):
+    """fallback: pyautogui.screenshot (สร้าง PIL image ใหม่ทุกครั้ง)"""
+    name = "pyautogui"
+    channels = "RGB"
+
+    def __init__(self):
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def grab(self, region=None):
+        img = self._pyautogui.screenshot(region=region) if region else self._pyautogui.screenshot()
+        return np.asarray(img)
+
+
+class FakeBackend(CaptureBackend):
+    """
+    จอปลอมจาก array หรือไฟล์ภาพ (สำหรับทดสอบ/benchmark)
+    - frames: list ของ ndarray หรือ path; แต่ละเฟรม = ภาพ "ทั้งจอ" พิกัด (0, 0)
+    - loop: True = วนเฟรมซ้ำ, False = ค้างเฟรมสุดท้าย
+    - region ถูก crop จากเฟรมปัจจุบันเป็น view (ไม่ copy)
+    """
+    name = "fake"
+
+    def __init__(self, frames, channels="BGR", loop=True):
+        self.channels = channels
+        self.loop = loop
+        self.frames = [self._load(f) for f in frames]
+        if not self.frames:
+            raise ValueError("FakeBackend ต้องมีอย่างน้อย 1 เฟรม")
+        self.index = 0
+
+    @staticmethod
+    def _load(f):
+        if isinstance(f, np.ndarray):
+            return f
+        img = cv2.imread(str(Path(f)), cv2.IMREAD_COLOR)
+        if img is None:
+            raise FileNotFoundError(f"อ่านภาพไม่ได้: {f}")
+        return img
+
+    def current(self):
+        return self.frames[self.index]
+
+    def advance(self):
+        if self.index + 1 < len(self.frames):
+            self.index += 1
+        elif self.loop:
+            self.index = 0
+
+    def grab(self, region=None):
+        img = self.current()
+        self.advance()
+        if region:
+            x, y, w, h = region
+            return img[y:y + h, x:x + w]
+        return img
+
+
+BACKENDS = {
+    "mss": MSSBackend,
+    "pyautogui": PyAutoGUIBackend,
+}
+
+
+def create_backend(name="auto"):
+    """
+    สร้าง backend ตามชื่อ
+    "auto" = ลอง mss ก่อน ถ้าไม่มีให้ใช้ pyautogui
+    """
+    name = (name or "auto").strip().lower()
+    if name == "auto":
+        try:
+            return MSSBackend()
+        except ImportError:
+            return PyAutoGUIBackend()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown capture backend: {name} (ใช้ได้: auto, {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
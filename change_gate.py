@@ -0,0 +1,53 @@
+"""
+🚦 Frame Change Gate - ข้าม detect_state เมื่อภาพแทบไม่เปลี่ยนจากเฟรมที่ตรวจล่าสุด
+
+ย่อภาพ gray ลงแบบเฉลี่ยทีละบล็อก (cv2.INTER_AREA, บล็อกละ scale x scale px)
+แล้วเทียบกับภาพย่อของเฟรมล่าสุดที่ตรวจจับจริง:
+- บล็อกไหนต่างกันเกิน threshold (ระดับสีเทา 0-255) = ภาพเปลี่ยน -> ตรวจใหม่
+- ไม่มีบล็อกไหนเปลี่ยน = ใช้ผลเดิม
+- ตรวจใหม่ทุกครั้งเมื่อผ่านไปเกิน refresh วินาที (กันพลาดการเปลี่ยนแปลงช้าๆ)
+"""
+
+from startup import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+
+class FrameChangeGate:
+    def __init__(self, threshold=10, refresh=1.0, scale=8):
+        self.threshold = threshold
+        self.refresh = refresh
+        self.scale = scale
+        self._thumb = None        # ภาพย่อของเฟรมล่าสุดที่ตรวจจริง
+        self._evaluated_at = None
+        self._result = None
+        self.evaluated = 0
+        self.skipped = 0
+
+    def thumbnail(self, gray):
+        h, w = gray.shape[:2]
+        size = (max(1, w // self.scale), max(1, h // self.scale))
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+    def changed(self, thumb, now):
+        if self._thumb is None or self._thumb.shape != thumb.shape:
+            return True
+        if now - self._evaluated_at >= self.refresh:
+            return True
+        return int(np.max(cv2.absdiff(thumb, self._thumb))) > self.threshold
+
+    def run(self, frame, now, detect_fn):
+        """คืนผล detect_fn(frame) หรือผลเดิมถ้าภาพไม่เปลี่ยน"""
+        thumb = self.thumbnail(frame.gray)
+        if not self.changed(thumb, now):
+            self.skipped += 1
+            return self._result
+        self._result = detect_fn(frame)
+        self._thumb = thumb
+        self._evaluated_at = now
+        self.evaluated += 1
+        return self._result
+
+    def stats(self):
+        return {"evaluated": self.evaluated, "skipped": self.skipped}
@@ -0,0 +1,49 @@
+"""
+⏱️ Clocks - แหล่งเวลาของลูปบอท
+
+- SystemClock  = เวลาจริง (perf_counter / time.sleep)
+- VirtualClock = เวลาเสมือนสำหรับ replay/simulator: sleep() แค่เลื่อนเวลา ไม่รอจริง
+  ทำให้ replay เร็วและได้ลำดับ state เหมือนเดิมทุกครั้ง
+- FastClock    = เวลาจริง + เวลาที่ sleep ข้ามไป (simulator: นับเวลาตรวจจับจริงแต่ไม่ต้องรอ sleep)
+"""
+
+import threading
+import time
+
+
+class SystemClock:
+    def now(self):
+        return time.perf_counter()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    def __init__(self, start=0.0):
+        self.t = float(start)
+
+    def now(self):
+        return self.t
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.t += seconds
+
+    def advance_to(self, t):
+        if t > self.t:
+            self.t = t
+
+
+class FastClock:
+    def __init__(self):
+        self.skipped = 0.0
+        self._lock = threading.Lock()
+
+    def now(self):
+        return time.perf_counter() + self.skipped
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            with self._lock:
+                self.skipped += seconds
@@ -10,22 +10,83 @@ Templates:
 กด ESC หรือ SPACE เพื่อหยุด
 """
 
+import contextlib
+import os
 import time
 import sys
 import json
+import hashlib
 from pathlib import Path
 from enum import Enum
 
-import pyautogui
-from pynput import keyboard
-import cv2
-import numpy as np
+from startup import lazy_import, load_now, mark, print_timings, timed, timings, warm_up
+
+# cv2 / numpy โหลดจริงตอนใช้ครั้งแรก (--help ไม่ต้องรอ) โมดูลด้านล่างที่ import cv2 จะได้ตัวเดียวกันนี้
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+# pyautogui / pynput โหลดใน load_gui() เฉพาะตอนรันบอทจริง (headless ใช้ --replay ได้)
+pyautogui = None
+keyboard = None
+
+from burst import BurstController, QteTelemetry
+from button_classifier import ButtonClassifier
+from capture import bounding_region, create_backend, shift_region
+from change_gate import FrameChangeGate
+from clock import SystemClock, VirtualClock
+from frame_context import BLUR_KSIZE, CANNY_HIGH, CANNY_LOW, FrameContext, as_frame, edges
+from input_queue import InputDispatcher
+from input_sink import FakeInput, PyAutoGUIInput
+from matching import pick, score, search_pyramid
+from parallel import MatchPool, warm_frame, warm_template
+from pipeline import CaptureDetectPipeline, compare as compare_pipeline
+from prefilter import AUDIT, REJECT, PreFilter
+import profiling
+from supervisor import ArbiterInput, PrefixedStream, load_instances, run_supervised
+from session import RecordingBackend, RecordingInput, ReplayBackend, ReplayFinished, SessionWriter
+from template_cache import cache_key, read_cache, write_cache
+from templates import Template, as_template
+from scheduling import TemplateScheduler
+from telemetry import TelemetryFanout, TelemetryWriter, report as telemetry_report
+from template_index import TemplateIndex, scale_point, scale_region
+from tracking import TemplateTracker
+from waiting import WaitStats, wait_until
+
+mark("import cooking_bot")
 
 # =========================
 # SETTINGS
 # =========================
-pyautogui.FAILSAFE = True
-pyautogui.PAUSE = 0.01
+FAILSAFE_EXCEPTION = ()  # = pyautogui.FailSafeException หลัง load_gui()
+
+def load_gui():
+    """import pyautogui + pynput ครั้งแรกที่ต้องใช้ คืน False ถ้าใช้ไม่ได้ (ไม่มีจอ)"""
+    global pyautogui, keyboard, FAILSAFE_EXCEPTION
+    if pyautogui is None:
+        try:
+            with timed("import pyautogui/pynput"):
+                import pyautogui as _pyautogui
+                from pynput import keyboard as _keyboard
+        except Exception as e:
+            print(f"❌ ใช้ pyautogui / pynput ไม่ได้: {e}")
+            return False
+        _pyautogui.FAILSAFE = True
+        _pyautogui.PAUSE = 0.01
+        pyautogui, keyboard = _pyautogui, _keyboard
+        FAILSAFE_EXCEPTION = pyautogui.FailSafeException
+    return True
+
+def import_runtime():
+    """โหลด cv2 / numpy จริงในเธรดหลัก (ก่อนมี thread อื่น) พร้อมจับเวลา"""
+    with timed("import cv2/numpy"):
+        load_now(cv2, np)
+
+def warm_up_bot(templates, region):
+    """เรียก OpenCV ด้วยขนาดภาพจริงหนึ่งรอบก่อนเริ่มลูป (เฟรมแรกจะไม่ช้ากว่าเฟรมอื่น) แล้วแสดงเวลา startup"""
+    shape = (region[3], region[2]) if region else (1080, 1920)
+    with timed("warm-up"):
+        warm_up(templates, shape)
+    print_timings()
 
 BASE_DIR = Path(__file__).parent
 
@@ -35,20 +96,94 @@ TEMPLATE_MENU = BASE_DIR / "select_menu.png"
 TEMPLATE_DONE = BASE_DIR / "cookingdone.png"
 TEMPLATE_CANCOOK = BASE_DIR / "cancook.png"
 TEMPLATE_CANNOTCOOK = BASE_DIR / "cannotcook.png"
+TEMPLATE_CACHE = BASE_DIR / "templates.tplcache"  # template ที่ประมวลผลแล้ว (None = ไม่ใช้ cache)
 REGION_FILE = BASE_DIR / "spatula_region.json"
+INSTANCES_FILE = BASE_DIR / "instances.json"  # --multi: region/origin ของแต่ละหน้าต่างเกม (supervisor.py)
+TELEMETRY_FILE = None  # เช่น BASE_DIR / "session.cbtel" = บันทึก telemetry ทุกรอบ (หรือใช้ --telemetry)
+METRICS = None         # --metrics=9464 = http://127.0.0.1:9464/metrics, --metrics=bot.prom = เขียนไฟล์ทุก METRICS_INTERVAL วิ
+METRICS_INTERVAL = 5.0
+PROFILE_OUTPUT = BASE_DIR / "profile"  # --profile เขียน profile_stages.folded / profile_samples.folded
+PROFILE_SAMPLE_INTERVAL = 0.005        # --profile=sample: อ่าน stack ทุกๆ N วินาที
+
+# --- Legacy loop (--legacy) ---
+LEGACY_LOOP = False            # True = ลูปแบบเดิม: ปิดทุก optimization ที่เปลี่ยนจังหวะคลิก/การตรวจจับ (ดู bot_loop)
+
+# --- Screen capture ---
+CAPTURE_BACKEND = "auto"       # auto / mss / pyautogui (auto = mss ถ้ามี ไม่งั้น pyautogui)
+SINGLE_CAPTURE = True          # จับภาพครั้งเดียวต่อลูป (region หลัก + ปุ่ม + สีปุ่ม มาจากเฟรมเดียวกัน)
+
+# --- Pipeline (capture thread + detect thread ทำงานขนานกับ state handler) ---
+PIPELINE_MODE = False          # True = ใช้ pipeline แทนลูปแบบทีละขั้น
+PIPELINE_RING_SIZE = 4         # จำนวนบัฟเฟอร์เฟรมที่จองไว้ล่วงหน้า
+PIPELINE_MAX_AGE = 0.25        # ผลจากเฟรมที่เก่ากว่านี้ (วินาที) จะถูกทิ้ง
+PIPELINE_CAPTURE_FPS = 60      # จำกัดความเร็ว capture thread (0 = ไม่จำกัด)
 
 # --- Matching thresholds ---
 MATCH_CONFIDENCE = 0.70        # raw grayscale threshold
 EDGE_CONFIDENCE  = 0.35        # edge threshold
 
+# --- Pyramid matching (หยาบ -> ละเอียด) ---
+PYRAMID_MATCHING = False       # True = ใช้ทุกครั้ง, "auto" = เฉพาะภาพใหญ่ (เช่นค้นทั้งจอ), False = ปิด
+PYRAMID_LEVELS = 2             # จำนวนชั้นที่ย่อ (2 = ย่อ 4 เท่าต่อด้าน)
+PYRAMID_TOP_K = 3              # จำนวนจุดจากชั้นหยาบที่นำไปค้นละเอียด
+PYRAMID_AUTO_MIN_AREA = 800 * 600  # โหมด auto: ใช้ pyramid เมื่อภาพใหญ่กว่านี้
+
+# --- Pre-filter (เทียบ thumbnail ก่อน ตัด template ที่ไม่มีบนจอทิ้งโดยไม่ต้อง match เต็ม, prefilter.py) ---
+PREFILTER = False              # True = เปิด (threshold ด้านล่างวัดจากเครื่องผู้พัฒนา ตัดพลาดครั้งแรกจะปิดตัวเอง)
+PREFILTER_LEVEL = 2            # ชั้น pyramid ของ thumbnail (2 = ย่อ 4 เท่าต่อด้าน)
+PREFILTER_THRESHOLD = 0.55     # คะแนน gray ของ thumbnail ต่ำกว่านี้ = อาจไม่มีบนจอ (ที่มีจริงได้ ~0.8 ขึ้นไป)
+PREFILTER_EDGE_THRESHOLD = 0.25  # ... และ edge ของ thumbnail ต่ำกว่านี้ด้วย = ไม่มีบนจอ (กันตัดทิ้งของที่ผ่านทาง edge)
+PREFILTER_AUDIT_EVERY = 20     # ทุกๆ N ครั้งที่ตัดทิ้ง ยัง match เต็มเพื่อนับ false reject (0 = ไม่ตรวจ)
+
+# --- Parallel matching (ทุก template x raw/edge พร้อมกันบน thread pool) ---
+MATCH_WORKERS = 0              # 0 = ทีละ template ในเธรดเดียว, N = จำนวน thread (แนะนำ = จำนวน core)
+                               # core น้อยกว่าจำนวน template -> ไม่ใช้ pool (1 core วัดได้ช้าลง x0.84, ดู bench.py)
+
+# --- ROI tracking (ค้นรอบจุดที่เพิ่งเจอก่อน ค่อยค้นทั้ง region) ---
+ROI_TRACKING = True           # False = ค้นทั้ง region ทุกครั้ง
+TRACK_MARGIN = 24             # ขยายหน้าต่างค้นออกจากขอบ template รอบด้าน (px)
+
+# --- State scheduling (ค้นเฉพาะ template ของ state ที่น่าจะเป็นถัดไป) ---
+STATE_SCHEDULING = True       # False = ค้นครบ 5 template ทุกเฟรม
+SCHEDULE_SWEEP_EVERY = 10     # ค้นครบทุก template ทุกๆ N เฟรม (กันพลาด state ที่ไม่คาดคิด)
+SCHEDULE_TIMEOUT = 5.0        # ไม่เจอ state ที่คาดไว้นานเกินนี้ (วินาที) -> ค้นครบทุกเฟรมจนกว่าจะเจอ
+
+# --- Change gate (ภาพไม่เปลี่ยน = ใช้ผล detect เดิม ไม่ต้อง match ใหม่) ---
+CHANGE_GATE = True             # False = detect ทุกเฟรม
+CHANGE_THRESHOLD = 10          # ความต่างเฉลี่ยของบล็อกใดบล็อกหนึ่ง (0-255) ที่ถือว่าภาพเปลี่ยน (น้อย = ไวขึ้น)
+CHANGE_BLOCK = 8               # ขนาดบล็อกที่ใช้เฉลี่ย (px)
+CHANGE_REFRESH = 1.0           # ตรวจใหม่แน่นอนทุกๆ N วินาที แม้ภาพไม่เปลี่ยน
+
+# --- Multi-scale (หน้าจอ/ขนาด UI ต่างจากตอนทำ template ที่ 1920x1080) ---
+MULTI_SCALE = False            # True = หา scale จาก template แรกที่เจอ แล้วใช้ scale นั้นตลอด
+TEMPLATE_SCALES = (0.5, 0.625, 0.667, 0.75, 0.8, 0.875, 1.0, 1.125, 1.25, 1.333, 1.5)
+
 # --- Timing ---
 SPATULA_CLICK_DELAY = 0.04     # delay ระหว่างการคลิกตะหลิว
 SEARCH_DELAY = 0.08            # delay ระหว่างการค้นหา
 DONE_CLICK_WAIT = 2.5          # รอหลังคลิก cookingdone
+START_COOK_WAIT = 0.8          # รอหลังกดปุ่มเริ่มทำอาหาร
+MENU_SELECT_WAIT = 1.0         # รอหลังเลือกเมนู
+
+# --- Event-driven waits (รอจนเห็นหน้าจอถัดไป แทน sleep ตายตัว 3 ค่าด้านบน) ---
+EVENT_WAITS = True             # False = sleep ครบเวลาเหมือนเดิมทุกครั้ง
+WAIT_SETTLE = 0.15             # รออย่างน้อยเท่านี้หลังคลิกก่อนเริ่มเช็คหน้าจอ
+WAIT_POLL = 0.05               # เช็คหน้าจอทุกๆ N วินาทีระหว่างรอ (ไม่เจอ = รอครบเวลาเดิม)
 
 # --- Click behavior ---
 DOUBLE_CLICK_SPATULA = True    # double click สำหรับตะหลิว
-MAX_CLICKS_PER_FOUND = 8       # คลิกสูงสุดต่อการเจอ
+ASYNC_INPUT = False            # True = คลิกผ่านคิวบน worker thread (input_queue.py) ลูปตรวจจับไม่ต้องรอเมาส์
+INPUT_QUEUE_SIZE = 16          # คำสั่งค้างในคิวได้สูงสุด (เต็ม = ลูปหลักรอ)
+INPUT_MAX_AGE = 0.25           # คลิกที่รอในคิวนานเกินนี้ (วินาที) ถูกทิ้ง (0 = ไม่ทิ้ง)
+INPUT_SETTLE_TIMEOUT = 1.0     # หลังชุดคลิกตะหลิว รอคิวทำชุดนั้นเสร็จได้นานสุดเท่านี้ก่อนนับคลิก
+MAX_CLICKS_PER_FOUND = 8       # คลิกสูงสุดต่อการเจอ (เพดานของ burst)
+
+# --- Burst clicking (QTE ตะหลิว, burst.py) ---
+BURST_CLICKS = False           # True = คลิกเป็นชุดต่อการตรวจจับ 1 ครั้ง ปรับจำนวน/delay เอง (False = แบบเดิม)
+BURST_START = 2                # จำนวนคลิกต่อชุดตอนเริ่ม (ปรับเองระหว่างเล่น 1..MAX_CLICKS_PER_FOUND)
+BURST_MIN_DELAY = 0.02         # ขอบล่างของ delay ระหว่างคลิก (เริ่มที่ SPATULA_CLICK_DELAY)
+BURST_MAX_DELAY = 0.12         # ขอบบนของ delay ระหว่างคลิก
+BURST_MOVE_TOLERANCE = 12      # ตะหลิวขยับเกินนี้ (px) = ย้ายที่ -> ลด burst
 
 # --- Special Regions ---
 # พื้นที่สำหรับปุ่ม "เริ่มทำอาหาร" โดยเฉพาะ (x, y, w, h)
@@ -60,10 +195,15 @@ REGION_START_BTN = (BTN_START_X1, BTN_START_Y1, BTN_START_X2 - BTN_START_X1, BTN
 BTN_CENTER_X = (BTN_START_X1 + BTN_START_X2) // 2  # 1404
 BTN_CENTER_Y = (BTN_START_Y1 + BTN_START_Y2) // 2  # 980
 
+# พิกัดที่ต้องคลิกเพิ่มหลังเลือกเมนู
+MENU_EXTRA_CLICK = (220, 260)
+
 # --- สีของปุ่ม ---
 BTN_COLOR_CANCOOK = "#3ECDC3"     # สีฟ้า (ทำอาหารได้)
 BTN_COLOR_CANNOTCOOK = "#BDC3C0" # สีเทา (ทำอาหารไม่ได้)
-BTN_COLOR_TOLERANCE = 30          # ความคลาดเคลื่อนของสี
+BTN_COLOR_TOLERANCE = 30          # ความคลาดเคลื่อนของสี (ห่างทุกสีเกินนี้ = ยังไม่ตัดสิน)
+BTN_PATCH_STEP = 4                # อ่านสีทั้งกรอบปุ่ม เก็บทุกๆ N px (button_classifier.py)
+BTN_CONFIRM_FRAMES = 2            # ต้องเห็นสีเดียวกันกี่เฟรมติดกันก่อนตัดสิน (hysteresis)
 
 # =========================
 # GAME STATE
@@ -75,6 +215,14 @@ class GameState(Enum):
     QUICKTIME_EVENT = "quicktime"       # กดรัวๆ (spatula_template.png)
     COOKING_DONE = "cooking_done"       # อาหารเสร็จ (cookingdone.png)
 
+# state ที่น่าจะเจอถัดไปหลังจากเจอ state หนึ่ง (ใช้กับ STATE_SCHEDULING)
+NEXT_STATES = {
+    GameState.WAITING_MENU: {GameState.CAN_COOK, GameState.CANNOT_COOK},
+    GameState.CAN_COOK: {GameState.QUICKTIME_EVENT, GameState.COOKING_DONE},
+    GameState.QUICKTIME_EVENT: {GameState.QUICKTIME_EVENT, GameState.COOKING_DONE},
+    GameState.COOKING_DONE: {GameState.WAITING_MENU, GameState.CAN_COOK, GameState.CANNOT_COOK},
+}
+
 # =========================
 # EMERGENCY STOP
 # =========================
@@ -118,57 +266,146 @@ def load_region():
 # =========================
 # IMAGE PROCESSING
 # =========================
-def to_gray(pil_img):
-    arr = np.array(pil_img)
-    return cv2.cvtColor(arr, cv2.COLOR_RGB2GRAY)
-
-def edges(gray):
-    blur = cv2.GaussianBlur(gray, (3, 3), 0)
-    return cv2.Canny(blur, 50, 150)
-
 def load_template(path):
-    """โหลด template และคืนค่า (gray, edge) หรือ None"""
+    """โหลด template และคืนค่า Template (ใช้เหมือน tuple (gray, edge)) หรือ None"""
     if not path.exists():
         return None
     gray = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
     if gray is None:
         return None
     edge = edges(gray)
-    return (gray, edge)
+    return Template(path.stem, gray, edge)
+
+def template_params():
+    """ค่าที่มีผลต่อ template ที่ประมวลผลแล้ว (เปลี่ยนค่าไหน = สร้าง template cache ใหม่)"""
+    return {
+        "version": 1,
+        "opencv": cv2.__version__,
+        "blur": list(BLUR_KSIZE),
+        "canny": [CANNY_LOW, CANNY_HIGH],
+        "pyramid_levels": PYRAMID_LEVELS if PYRAMID_MATCHING else 0,
+        "prefilter_level": PREFILTER_LEVEL if PREFILTER else 0,
+        "scales": list(TEMPLATE_SCALES) if MULTI_SCALE else [],
+    }
+
+def prepare_template(tpl, params):
+    """คำนวณรูปแบบที่ params ต้องใช้ไว้ล่วงหน้า (pyramid ทุกชั้น, thumbnail ของ pre-filter, ทุก scale)"""
+    for t in [tpl] + [tpl.scaled(s) for s in params["scales"]]:
+        t.edge_pyramid(params["prefilter_level"])
+        for level in range(1, params["pyramid_levels"] + 1):
+            t.edge_pyramid(level)
+    return tpl
+
+def load_templates(paths):
+    """
+    โหลดหลาย template พร้อมกัน -> list ของ Template (หรือ None) ตามลำดับ paths
+    ใช้ TEMPLATE_CACHE ถ้า key ตรง ไม่งั้นโหลด PNG ใหม่แล้วเขียน cache ทับ
+    """
+    params = template_params()
+    by_name = {p.stem: p for p in paths}
+    key = cache_key(by_name, params) if TEMPLATE_CACHE else None
+    if key:
+        cached = read_cache(TEMPLATE_CACHE, key)
+        if cached is not None:
+            return [Template.from_arrays(p.stem, cached[p.stem]) if p.stem in cached else None for p in paths]
+
+    tpls = [load_template(p) for p in paths]
+    for tpl in tpls:
+        if tpl:
+            prepare_template(tpl, params)
+    if key:
+        try:
+            write_cache(TEMPLATE_CACHE, key, {t.name: t.to_arrays() for t in tpls if t})
+        except OSError as e:
+            print(f"⚠️ เขียน template cache ไม่ได้: {e}")
+    return tpls
+
+_capture = None
+
+def get_capture():
+    """คืน capture backend (สร้างครั้งแรกครั้งเดียว แล้วใช้ซ้ำทุกเฟรม)"""
+    global _capture
+    if _capture is None:
+        _capture = create_backend(CAPTURE_BACKEND)
+    return _capture
+
+def grab_frame(region=None):
+    """จับภาพสี 1 ครั้ง -> FrameContext (ใช้ crop()/pixel() ต่อได้โดยไม่ต้องจับภาพใหม่)"""
+    return get_capture().grab_frame(region)
 
 def screenshot_gray(region=None):
-    img = pyautogui.screenshot(region=region) if region else pyautogui.screenshot()
-    return to_gray(img)
+    return get_capture().grab_gray(region)
+
+def use_pyramid(frame):
+    if PYRAMID_MATCHING == "auto":
+        h, w = frame.shape
+        return w * h >= PYRAMID_AUTO_MIN_AREA
+    return bool(PYRAMID_MATCHING)
+
+_telemetry = None  # TelemetryWriter ของลูปที่กำลังรัน (ตั้งใน bot_loop) match_template รายงานคะแนนเข้าไป
+_prefilter = None  # PreFilter ของลูปที่กำลังรัน (ตั้งใน bot_loop) None = match เต็มทุกครั้ง
 
-def match_template(screen_gray, template_gray, template_edge, raw_thr=MATCH_CONFIDENCE, edge_thr=EDGE_CONFIDENCE):
+def match_template(frame, template, template_edge=None, raw_thr=MATCH_CONFIDENCE, edge_thr=EDGE_CONFIDENCE):
     """
+    frame: FrameContext ของเฟรมปัจจุบัน (edge ของจอคำนวณครั้งเดียวต่อเฟรม)
+    template: Template หรือ ndarray gray (ต้องส่ง template_edge มาด้วย)
     คืนค่า: (cx, cy, score, mode) หรือ None
     mode = 'raw' หรือ 'edge'
     """
-    h, w = template_gray.shape[:2]
-    best = None
-
-    # --- RAW matching ---
-    res = cv2.matchTemplate(screen_gray, template_gray, cv2.TM_CCOEFF_NORMED)
-    _, max_val, _, max_loc = cv2.minMaxLoc(res)
-    if max_val >= raw_thr:
-        best = ("raw", max_val, max_loc)
-
-    # --- EDGE matching ---
-    scr_edge = edges(screen_gray)
-    res2 = cv2.matchTemplate(scr_edge, template_edge, cv2.TM_CCOEFF_NORMED)
-    _, max_val2, _, max_loc2 = cv2.minMaxLoc(res2)
-    if max_val2 >= edge_thr:
-        if best is None or max_val2 > best[1]:
-            best = ("edge", max_val2, max_loc2)
-
-    if best is None:
-        return None
+    frame = as_frame(frame)
+    tpl = as_template(template, template_edge)
+    t0 = time.perf_counter()
+    prefilter, verdict = _prefilter, None
+    if use_pyramid(frame):
+        raw, edge = search_pyramid(frame, tpl, PYRAMID_LEVELS, PYRAMID_TOP_K)
+    else:
+        # --- PRE-FILTER (thumbnail) ---
+        if prefilter:
+            verdict = prefilter.check(frame, tpl)
+            if verdict is REJECT:
+                if _telemetry:
+                    _telemetry.match(tpl.name, None, None, (time.perf_counter() - t0) * 1000)
+                return None
+
+        # --- RAW matching ---
+        raw = score(frame.gray, tpl.gray)
+
+        # --- EDGE matching ---
+        edge = score(frame.edge, tpl.edge)
+
+    if _telemetry:
+        _telemetry.match(tpl.name, raw[0], edge[0], (time.perf_counter() - t0) * 1000)
+    res = pick(raw, edge, tpl.shape, raw_thr, edge_thr)
+    if verdict is AUDIT:
+        prefilter.audited(tpl.name, res is not None)
+    return res
+
+def match_template_async(pool, frame, template, raw_thr=MATCH_CONFIDENCE, edge_thr=EDGE_CONFIDENCE):
+    """
+    ส่ง match_template เข้า MatchPool (raw / edge แยกเป็นคนละงาน)
+    คืนฟังก์ชันที่เรียกแล้วได้ผลแบบเดียวกับ match_template (ต้อง warm_frame ก่อน)
+    """
+    tpl = as_template(template)
+    if use_pyramid(frame):
+        return pool.submit(match_template, frame, tpl, None, raw_thr, edge_thr).result
+    t0 = time.perf_counter()
+    prefilter = _prefilter
+    verdict = prefilter.check(frame, tpl) if prefilter else None
+    if verdict is REJECT:
+        if _telemetry:
+            _telemetry.match(tpl.name, None, None, (time.perf_counter() - t0) * 1000)
+        return lambda: None
+    raw = pool.submit(score, frame.gray, tpl.gray)
+    edge = pool.submit(score, frame.edge, tpl.edge)
 
-    mode, score, loc = best
-    cx = int(loc[0] + w // 2)
-    cy = int(loc[1] + h // 2)
-    return (cx, cy, float(score), mode)
+    def get():
+        if _telemetry:
+            _telemetry.match(tpl.name, raw.result()[0], edge.result()[0], (time.perf_counter() - t0) * 1000)
+        res = pick(raw.result(), edge.result(), tpl.shape, raw_thr, edge_thr)
+        if verdict is AUDIT:
+            prefilter.audited(tpl.name, res is not None)
+        return res
+    return get
 
 # =========================
 # REGION PREVIEW
@@ -212,15 +449,18 @@ def draw_region_preview(region, loops=2, speed=0.15):
 # =========================
 # CLICK FUNCTIONS
 # =========================
+_input = None
+
+def get_input():
+    """คืน input sink ของเมาส์จริง (สร้างครั้งแรกครั้งเดียว)"""
+    global _input
+    if _input is None:
+        _input = PyAutoGUIInput()
+    return _input
+
 def click_at(x, y, double=False):
     """คลิกที่ตำแหน่ง x, y"""
-    pyautogui.moveTo(x, y)
-    if double:
-        pyautogui.mouseDown(); time.sleep(0.01); pyautogui.mouseUp()
-        time.sleep(0.01)
-        pyautogui.mouseDown(); time.sleep(0.01); pyautogui.mouseUp()
-    else:
-        pyautogui.click()
+    get_input().click(x, y, double)
 
 def simple_click(x, y):
     """คลิกธรรมดา"""
@@ -230,76 +470,121 @@ def simple_click(x, y):
 # =========================
 # DETECTION FUNCTIONS
 # =========================
-def detect_state(screen_gray, templates, offset=(0, 0)):
+def detect_state(frame, templates, offset=(0, 0), tracker=None, states=None, pool=None):
     """
     ตรวจจับ state ปัจจุบัน
+    frame: FrameContext (สร้างครั้งเดียวต่อ screenshot แล้วใช้ร่วมทุก template)
+    tracker: TemplateTracker (None = ค้นทั้ง frame ทุก template)
+    states: set ของ GameState ที่จะค้น (None = ครบทุก state) ลำดับความสำคัญเหมือนเดิม
+    pool: MatchPool (None = match ทีละ template ในเธรดนี้)
     Returns: (state, x, y, score) หรือ (None, 0, 0, 0)
     """
+    frame = as_frame(frame)
     menu_tpl, spatula_tpl, done_tpl, cancook_tpl, cannotcook_tpl = templates
     ox, oy = offset
+
+    def find(tpl):
+        if tracker is not None:
+            return tracker.match(frame, tpl, match_template)
+        return match_template(frame, tpl)
+
+    def want(state):
+        return states is None or state in states
+
+    if pool is not None:
+        return _detect_parallel(frame, templates, offset, tracker, want, pool)
     
     # ลำดับความสำคัญ: spatula > done > cannotcook > cancook > menu
     
     # 1. ตรวจ spatula (quicktime event - ต้องกดรัวๆ)
-    if spatula_tpl:
-        result = match_template(screen_gray, spatula_tpl[0], spatula_tpl[1])
+    if spatula_tpl and want(GameState.QUICKTIME_EVENT):
+        result = find(spatula_tpl)
         if result:
             cx, cy, score, mode = result
             return (GameState.QUICKTIME_EVENT, cx + ox, cy + oy, score)
     
     # 2. ตรวจ cooking done
-    if done_tpl:
-        result = match_template(screen_gray, done_tpl[0], done_tpl[1])
+    if done_tpl and want(GameState.COOKING_DONE):
+        result = find(done_tpl)
         if result:
             cx, cy, score, mode = result
             return (GameState.COOKING_DONE, cx + ox, cy + oy, score)
     
     # 3. ตรวจ cannotcook (หมดวัตถุดิบ - หยุดบอท)
-    if cannotcook_tpl:
-        result = match_template(screen_gray, cannotcook_tpl[0], cannotcook_tpl[1])
+    if cannotcook_tpl and want(GameState.CANNOT_COOK):
+        result = find(cannotcook_tpl)
         if result:
             cx, cy, score, mode = result
             return (GameState.CANNOT_COOK, cx + ox, cy + oy, score)
     
     # 4. ตรวจ cancook (ทำอาหารได้ - double click)
-    if cancook_tpl:
-        result = match_template(screen_gray, cancook_tpl[0], cancook_tpl[1])
+    if cancook_tpl and want(GameState.CAN_COOK):
+        result = find(cancook_tpl)
         if result:
             cx, cy, score, mode = result
             return (GameState.CAN_COOK, cx + ox, cy + oy, score)
     
     # 5. ตรวจ select menu
-    if menu_tpl:
-        result = match_template(screen_gray, menu_tpl[0], menu_tpl[1])
+    if menu_tpl and want(GameState.WAITING_MENU):
+        result = find(menu_tpl)
         if result:
             cx, cy, score, mode = result
             return (GameState.WAITING_MENU, cx + ox, cy + oy, score)
     
     return (None, 0, 0, 0)
 
+def _detect_parallel(frame, templates, offset, tracker, want, pool):
+    """detect_state แบบส่งทุก template เข้า pool พร้อมกัน แล้วตัดสินตามลำดับความสำคัญเดิม"""
+    menu_tpl, spatula_tpl, done_tpl, cancook_tpl, cannotcook_tpl = templates
+    checks = [
+        (GameState.QUICKTIME_EVENT, spatula_tpl),
+        (GameState.COOKING_DONE, done_tpl),
+        (GameState.CANNOT_COOK, cannotcook_tpl),
+        (GameState.CAN_COOK, cancook_tpl),
+        (GameState.WAITING_MENU, menu_tpl),
+    ]
+    warm_frame(frame, PYRAMID_LEVELS if use_pyramid(frame) else 0)
+
+    pending = []
+    for state, tpl in checks:
+        if not tpl or not want(state):
+            continue
+        if tracker is not None and tracker.tracking(tpl.name):
+            # เคยเจอ -> ค้นหน้าต่างเล็กก่อน (ทั้งขั้นตอนเป็นงานเดียว)
+            pending.append((state, tpl, pool.submit(tracker.match, frame, tpl, match_template).result, False))
+        else:
+            pending.append((state, tpl, match_template_async(pool, frame, tpl), tracker is not None))
+
+    # รอครบทุกงานก่อนคืนค่า (บัฟเฟอร์ของเฟรมอาจถูกใช้ซ้ำทันทีหลัง return)
+    found = None
+    for state, tpl, get, record in pending:
+        result = get()
+        if record:
+            tracker.record(frame, tpl, result)
+        if result and found is None:
+            cx, cy, score, mode = result
+            found = (state, cx + offset[0], cy + offset[1], score)
+    return found or (None, 0, 0, 0)
+
 # =========================
 # MAIN BOT LOOP
 # =========================
-def run_bot():
-    global STOP_FLAG
-    STOP_FLAG = False
-
-    print("\n" + "="*60)
-    print("🍳 Cooking Bot - Heartopia")
-    print("="*60)
-
-    # Load templates
+def load_all_templates():
+    """
+    โหลด template ทั้งหมดพร้อมแสดงผล
+    Returns: (menu, spatula, done, cancook, cannotcook) หรือ None ถ้าไม่มี spatula
+    """
     print("\n📦 กำลังโหลด templates...")
     
-    spatula_tpl = load_template(TEMPLATE_SPATULA)
-    menu_tpl = load_template(TEMPLATE_MENU)
-    done_tpl = load_template(TEMPLATE_DONE)
-    cancook_tpl = load_template(TEMPLATE_CANCOOK)
-    cannotcook_tpl = load_template(TEMPLATE_CANNOTCOOK)
+    t0 = time.perf_counter()
+    spatula_tpl, menu_tpl, done_tpl, cancook_tpl, cannotcook_tpl = load_templates(
+        [TEMPLATE_SPATULA, TEMPLATE_MENU, TEMPLATE_DONE, TEMPLATE_CANCOOK, TEMPLATE_CANNOTCOOK])
+    load_ms = (time.perf_counter() - t0) * 1000
+    timings["templates"] = load_ms
     
     if not spatula_tpl:
         print(f"❌ ไม่พบ template ตะหลิว: {TEMPLATE_SPATULA}")
-        return
+        return None
     print(f"   ✅ spatula_template.png")
     
     if not menu_tpl:
@@ -322,6 +607,26 @@ def run_bot():
     else:
         print(f"   ✅ cannotcook.png")
 
+    print(f"   ⏱️ โหลดเสร็จใน {load_ms:.1f} ms")
+    return (menu_tpl, spatula_tpl, done_tpl, cancook_tpl, cannotcook_tpl)
+
+def run_bot(record_path=None, telemetry_path=TELEMETRY_FILE):
+    global STOP_FLAG
+    STOP_FLAG = False
+
+    print("\n" + "="*60)
+    print("🍳 Cooking Bot - Heartopia")
+    print("="*60)
+
+    import_runtime()
+    if not load_gui():
+        return
+
+    # Load templates
+    templates = load_all_templates()
+    if templates is None:
+        return
+
     # Load region
     region = load_region()
     if region:
@@ -330,9 +635,11 @@ def run_bot():
     else:
         print("\n⚠️ ไม่พบ region - จะค้นหาทั้งหน้าจอ")
 
+    print(f"\n📸 Capture backend: {get_capture().name}")
+
     print("\n" + "------------------------------------------------------------")
     print("🎮 Game Flow:")
-    print("   1. รอหน้าเลือกเมนู (select_menu) -> คลิกเมนู + คลิกพิกัด (220, 260)")
+    print(f"   1. รอหน้าเลือกเมนู (select_menu) -> คลิกเมนู + คลิกพิกัด {MENU_EXTRA_CLICK}")
     print("   2. เจอ cancook → double click เริ่มทำอาหาร")
     print("   3. เจอ cannotcook → หยุดบอท (หมดวัตถุดิบ)")
     print("   4. เห็น spatula → กดรัวๆ จนหายไป")
@@ -349,27 +656,356 @@ def run_bot():
         draw_region_preview(region, loops=2, speed=0.12)
         time.sleep(0.5)
     
+    warm_up_bot(templates, region)
     input("\n👉 กด Enter เพื่อเริ่มบอท...")
     print("\n⏳ เริ่มใน 2 วินาที...")
     time.sleep(2)
     print("   GO!\n")
 
     listener = start_keyboard_listener()
-    
-    templates = (menu_tpl, spatula_tpl, done_tpl, cancook_tpl, cannotcook_tpl)
+    stats = {}
+    try:
+        stats = run_session(templates, region, get_capture(), get_input(), SystemClock(),
+                            record_path, telemetry_path)
+    finally:
+        try:
+            listener.stop()
+        except:
+            pass
+    print_summary(stats)
+
+def run_session(templates, region, capture, inputs, clock, record_path=None, telemetry_path=None,
+                stop_fn=check_stop, metrics_target=None):
+    """
+    ต่อ input queue / การบันทึก session / telemetry / live metrics รอบ bot_loop แล้วรันจนจบ
+    ใช้ทั้งกับเกมจริง (run_bot) และเกมจำลอง (simulator.py)
+    metrics_target: port หรือ path ของไฟล์ .prom (None = ใช้ METRICS)
+    Returns: dict สถิติของ bot_loop (+ "input" เมื่อเปิด ASYNC_INPUT)
+    """
+    dispatcher = None
+    if ASYNC_INPUT and not LEGACY_LOOP:
+        dispatcher = inputs = InputDispatcher(inputs, clock, INPUT_QUEUE_SIZE, max_age=INPUT_MAX_AGE)
+    pipeline_mode = PIPELINE_MODE
+    writer = None
+    if record_path:
+        meta = {"region": list(region) if region else None, "start_btn": list(REGION_START_BTN),
+                "single_capture": SINGLE_CAPTURE, "backend": capture.name}
+        writer = SessionWriter(record_path, clock, meta=meta)
+        capture = RecordingBackend(capture, writer)
+        inputs = RecordingInput(inputs, writer)
+        pipeline_mode = False  # writer ไม่ thread-safe -> record เฉพาะลูปแบบทีละขั้น
+        print(f"🎞️ กำลังบันทึก session -> {record_path}")
+
+    telemetry = None
+    if telemetry_path:
+        telemetry = TelemetryWriter(telemetry_path, clock, meta=telemetry_meta(region, capture.name, pipeline_mode))
+        print(f"📊 กำลังบันทึก telemetry -> {telemetry_path}")
+
+    metrics = exporter = None
+    metrics_target = metrics_target if metrics_target is not None else METRICS
+    if metrics_target:
+        # import ตอนใช้เท่านั้น: http.server/socketserver เพิ่มเวลา startup ~45 ms ทุกครั้ง (startup.py)
+        from metrics import LiveMetrics, serve as serve_metrics
+        metrics = LiveMetrics(clock)
+        exporter = serve_metrics(metrics, metrics_target, METRICS_INTERVAL)
+        print(f"📈 live metrics -> {exporter.url}")
+    sink = TelemetryFanout(telemetry, metrics) if telemetry and metrics else telemetry or metrics
+
+    stats = {}
+    try:
+        stats = bot_loop(templates, region, capture, inputs, clock, stop_fn=stop_fn,
+                         pipeline_mode=pipeline_mode,
+                         on_iteration=writer.write_state if writer else None,
+                         telemetry=sink)
+    finally:
+        if exporter:
+            exporter.close()
+        if dispatcher:
+            try:
+                dispatcher.close()
+            except FAILSAFE_EXCEPTION:
+                pass
+            stats["input"] = dispatcher.stats()
+        capture.close()
+        if writer:
+            writer.close()
+            print(f"🎞️ บันทึกแล้ว: {writer.frames} เฟรม, {writer.actions} action -> {record_path}")
+        if telemetry:
+            telemetry.close()
+            print(f"📊 telemetry: {telemetry.records} รอบ -> {telemetry_path} (สรุปด้วย --report)")
+    return stats
+
+def telemetry_meta(region, backend, pipeline_mode):
+    """ค่าตั้งที่ใช้เทียบ session กันใน --report"""
+    return {"region": list(region) if region else None, "backend": backend, "pipeline": pipeline_mode,
+            "tracking": ROI_TRACKING, "scheduling": STATE_SCHEDULING, "workers": MATCH_WORKERS,
+            "change_gate": CHANGE_GATE, "event_waits": EVENT_WAITS, "burst": BURST_CLICKS,
+            "async_input": ASYNC_INPUT, "prefilter": PREFILTER, "legacy": LEGACY_LOOP}
+
+def print_summary(stats):
+    print(f"\n🏁 สรุป:")
+    print(f"   คลิกทั้งหมด: {stats.get('click_count', 0)} ครั้ง")
+    print(f"   ทำอาหารเสร็จ: {stats.get('done_count', 0)} จาน")
+    if "pipeline" in stats:
+        st = stats["pipeline"]
+        print(f"   Pipeline: จับภาพ {st['captured']} | ตรวจจับ {st['detected']} | "
+              f"ทิ้งเฟรม {st['dropped_frames']} | ทิ้งผลเก่า {st['dropped_results'] + st['stale_results']}")
+        print(f"   อายุเฟรมเฉลี่ยตอนใช้งาน: {st['avg_age_ms']:.1f} ms")
+    if "input" in stats:
+        st = stats["input"]
+        print(f"   Input queue: ทำ {st['executed']} คำสั่ง | รวม/แทนที่ {st['coalesced']} | "
+              f"ทิ้งเพราะเก่า {st['dropped']} | "
+              f"ใส่คิว->เสร็จ avg={st['latency_ms_mean']:.1f}ms p95={st['latency_ms_p95']:.1f}ms "
+              f"max={st['latency_ms_max']:.1f}ms")
+    if stats.get("tracking"):
+        print(f"   ROI tracking (hit / miss / ค้นเต็ม):")
+        for name, st in stats["tracking"].items():
+            print(f"      {name:<18} {st['hits']:>6} / {st['misses']:>6} / {st['full_scans']:>6}")
+    if stats.get("change_gate"):
+        st = stats["change_gate"]
+        total = st["evaluated"] + st["skipped"]
+        print(f"   Change gate: ตรวจจับ {st['evaluated']} เฟรม | ใช้ผลเดิม {st['skipped']} เฟรม "
+              f"({100 * st['skipped'] / total if total else 0:.0f}%)")
+    if stats.get("prefilter", {}).get("checks"):
+        st = stats["prefilter"]
+        print(f"   Pre-filter: เทียบ thumbnail {st['checks']} ครั้ง | ตัดทิ้ง {st['rejected']} "
+              f"({100 * st['reject_rate']:.0f}%) | audit {st['audits']} -> ตัดพลาด {st['false_rejects']} | "
+              f"avg={st['mean_us']:.0f}µs")
+        if st["tripped"]:
+            print(f"   ⚠️ Pre-filter ตัด {st['tripped']} พลาด -> เลิกตัดทิ้ง ใช้ match เต็ม {st['bypassed']} ครั้งหลังจากนั้น")
+    if stats.get("scheduling"):
+        print(f"   State scheduling (เฟรม / ค้นครบ / match ที่ข้ามได้):")
+        for phase, st in stats["scheduling"].items():
+            print(f"      {phase:<18} {st['frames']:>6} / {st['sweeps']:>6} / {st['skipped']:>6}")
+    if stats.get("qte", {}).get("dishes"):
+        st = stats["qte"]
+        print(f"   QTE ต่อจาน: เฉลี่ย {st['avg_duration']:.2f} วิ | สูงสุด {st['max_duration']:.2f} วิ | "
+              f"{st['avg_clicks']:.1f} คลิก | {st['cps']:.1f} คลิก/วิ")
+    if stats.get("button", {}).get("frames"):
+        st = stats["button"]
+        print(f"   ปุ่ม (สี): ตรวจ {st['frames']} เฟรม | ตัดสิน {st['decisions']} | ไม่ตรงสีไหน {st['unknown']} | "
+              f"ใช้เวลา avg={st['mean_us']:.0f}µs max={st['max_us']:.0f}µs")
+    if stats.get("burst"):
+        st = stats["burst"]
+        print(f"   Burst: ล่าสุด {st['burst']} คลิก/ชุด, delay {1000 * st['delay']:.0f} ms | "
+              f"อยู่ที่เดิม {st['stay']} / ย้าย {st['moved']} / หาย {st['gone']} / คลิกไม่ครบชุด {st['lagged']}")
+    if stats.get("waits"):
+        print(f"   Waits หลังคลิก (ครั้ง / เฉลี่ย / สูงสุด / เดิม / ไม่เจอ / ประหยัดรวม):")
+        for name, st in stats["waits"].items():
+            n = st["count"]
+            print(f"      {name:<18} {n:>6} / {st['total'] / n:5.2f}s / {st['max']:5.2f}s / "
+                  f"{st['fallback_total'] / n:5.2f}s / {st['timeouts']:>4} / {st['saved']:6.1f}s")
+
+def bot_loop(templates, region, capture, inputs, clock, stop_fn=check_stop,
+             single_capture=SINGLE_CAPTURE, pipeline_mode=PIPELINE_MODE, on_iteration=None,
+             roi_tracking=ROI_TRACKING, state_scheduling=STATE_SCHEDULING, match_workers=MATCH_WORKERS,
+             change_gate=CHANGE_GATE, multi_scale=MULTI_SCALE, event_waits=EVENT_WAITS,
+             burst_clicks=BURST_CLICKS, telemetry=None, ui_origin=(0, 0), prefilter=PREFILTER):
+    """
+    ลูปหลัก: capture -> detect_state -> state handlers
+    capture: capture backend (capture.py / session.py)
+    inputs: input sink สำหรับคลิก/อ่านสี (input_sink.py)
+    clock: SystemClock (ของจริง) หรือ VirtualClock (replay)
+    on_iteration(i, state, x, y, score): เรียกทุกรอบหลังตัดสิน state
+    roi_tracking: ค้นรอบตำแหน่งล่าสุดของแต่ละ template ก่อน (tracking.py)
+    state_scheduling: ค้นเฉพาะ state ที่น่าจะเป็นถัดไป (scheduling.py, NEXT_STATES)
+    match_workers: จำนวน thread สำหรับ match พร้อมกัน (0 = ปิด, parallel.py)
+    change_gate: ข้าม detect เมื่อภาพไม่เปลี่ยน (change_gate.py)
+    multi_scale: หา scale ของ UI ครั้งแรกแล้ว match/คลิกที่ scale นั้น (template_index.py)
+    event_waits: หลังคลิกรอจนเห็นหน้าจอถัดไปแทน sleep ตายตัว (waiting.py)
+    burst_clicks: คลิกตะหลิวหลายครั้งต่อการตรวจจับ ปรับจำนวน/delay เอง (burst.py)
+    telemetry: TelemetryWriter = เขียน record ทุกรอบ (telemetry.py), LiveMetrics (metrics.py) หรือ TelemetryFanout ของทั้งคู่
+               pipeline mode ไม่มีคะแนนราย template (detect ทำบน thread อื่น)
+    ui_origin: มุมซ้ายบนของหน้าต่างเกมบนจอ (--multi) พิกัดปุ่ม/คลิกพิเศษถูกเลื่อนตามนี้
+    prefilter: เทียบ thumbnail ก่อน match เต็ม ตัด template ที่ไม่มีบนจอทิ้ง (prefilter.py)
+    LEGACY_LOOP (--legacy): ปิดทุกตัวเลือกด้านบนที่เปลี่ยนจังหวะคลิก/การตรวจจับ = ลูปแบบเดิม
+    Returns: dict สถิติ (click_count, done_count, iterations, ...)
+    """
+    global _telemetry, _prefilter
+    if LEGACY_LOOP:
+        pipeline_mode = roi_tracking = state_scheduling = change_gate = event_waits = False
+        burst_clicks = prefilter = False
+        match_workers = 0
+    if profiling.enabled:
+        clock = profiling.TimedClock(clock)
     offset = (region[0], region[1]) if region else (0, 0)
+    tracker = TemplateTracker(TRACK_MARGIN) if roi_tracking else None
+    scheduler = None
+    if state_scheduling:
+        scheduler = TemplateScheduler(NEXT_STATES, GameState, SCHEDULE_SWEEP_EVERY, SCHEDULE_TIMEOUT)
+
+    index = None
+    if multi_scale:
+        index = TemplateIndex(templates, TEMPLATE_SCALES)
+        print(f"📐 Multi-scale: เตรียม template {len(index.scales)} ขนาด รอหา scale จากภาพแรกที่เจอ...")
+
+    pool = None
+    cores, needed = os.cpu_count() or 1, sum(1 for t in templates if t)
+    if match_workers and cores < needed:
+        print(f"🧵 Parallel matching: ปิด ({cores} core < {needed} template ที่ต้อง match ขนาน = ช้ากว่าทีละ template)")
+    elif match_workers:
+        pool = MatchPool(match_workers)
+        for tpls in (index.bank.values() if index else [templates]):
+            for tpl in tpls:
+                if tpl:
+                    warm_template(tpl, PYRAMID_LEVELS if PYRAMID_MATCHING else 0)
+        print(f"🧵 Parallel matching: {match_workers} threads")
+
+    gate = FrameChangeGate(CHANGE_THRESHOLD, CHANGE_REFRESH, CHANGE_BLOCK) if change_gate else None
+    pre_filter = None
+    if prefilter:
+        pre_filter = PreFilter(PREFILTER_LEVEL, PREFILTER_THRESHOLD, PREFILTER_EDGE_THRESHOLD, PREFILTER_AUDIT_EVERY)
+
+    burst = None
+    if burst_clicks:
+        burst = BurstController(BURST_START, MAX_CLICKS_PER_FOUND, SPATULA_CLICK_DELAY,
+                                BURST_MIN_DELAY, BURST_MAX_DELAY, BURST_MOVE_TOLERANCE)
+    qte = QteTelemetry()
+    button = ButtonClassifier({GameState.CAN_COOK: BTN_COLOR_CANCOOK, GameState.CANNOT_COOK: BTN_COLOR_CANNOTCOOK},
+                              BTN_COLOR_TOLERANCE, BTN_PATCH_STEP, BTN_CONFIRM_FRAMES)
+
+    def detect_fresh(frame):
+        nonlocal templates
+        if index and index.scale is None:
+            # ยังไม่รู้ scale: ลองทุก template x ทุก scale จนกว่าจะเจอ แล้วล็อคไว้
+            if index.calibrate(frame, MATCH_CONFIDENCE) is None:
+                return (None, 0, 0, 0)
+            templates = index.active()
+            print(f"📐 ล็อค scale = {index.scale} (จาก {index.anchor})")
+        states = scheduler.plan(clock.now()) if scheduler else None
+        return detect_state(frame, templates, offset, tracker, states, pool)
+
+    def detect(frame):
+        with profiling.stage("detect"):
+            if gate:
+                return gate.run(frame, clock.now(), detect_fresh)
+            return detect_fresh(frame)
+
+    # Pipeline: จับภาพครอบ region + ปุ่มตลอด (ขนาดบัฟเฟอร์ต้องคงที่)
+    pipe = None
+    result = None
+    stale_results = 0
+    frame_ages = []
+    if pipeline_mode:
+        def detect_fn(shot):
+            return detect(shot.crop(region) if region else shot)
+        # ยังไม่รู้ scale -> ครอบปุ่มของทุก scale ไว้ก่อน
+        btn_regions = [shift_region(scale_region(REGION_START_BTN, s), ui_origin)
+                       for s in (index.scales if index else [1.0])]
+        pipe_region = bounding_region(region, *btn_regions)
+        pipe = CaptureDetectPipeline(capture, pipe_region, detect_fn,
+                                     ring_size=PIPELINE_RING_SIZE,
+                                     max_fps=PIPELINE_CAPTURE_FPS, clock=clock).start()
+        print(f"🧵 Pipeline mode: ring={PIPELINE_RING_SIZE} region={pipe_region}")
     
     # Stats
     click_count = 0
     done_count = 0
+    iterations = 0
     current_state = None
     should_check_btn_color = False  # Flag: ตรวจสอบสีปุ่มหลังกด select_menu เท่านั้น
+    last_click_at = 0.0  # เฟรมที่จับก่อนคลิกล่าสุดถือว่าล้าสมัย (pipeline)
+
+    def ui_scale():
+        # พิกัดปุ่ม/คลิกพิเศษในไฟล์นี้อ้างอิง 1920x1080 (scale 1.0)
+        return index.scale if index and index.scale else 1.0
+
+    def ui_point(pt):
+        x, y = scale_point(pt, ui_scale())
+        return (x + ui_origin[0], y + ui_origin[1])
+
+    def ui_region(r):
+        return shift_region(scale_region(r, ui_scale()), ui_origin)
+
+    def gesture():
+        # --multi: คลิกใน with เดียวกันห้ามมีคลิกของ instance อื่นแทรก (supervisor.py)
+        return inputs.gesture() if hasattr(inputs, "gesture") else contextlib.nullcontext()
+
+    def click(cx, cy, double=False):
+        """คืนผลของ inputs.click (InputCommand เมื่อเปิด ASYNC_INPUT ใช้ใน telemetry)"""
+        nonlocal last_click_at
+        with profiling.stage("input"):
+            sent = inputs.click(cx, cy, double)
+        last_click_at = clock.now()
+        return sent
+
+    def issued(sent):
+        """
+        จำนวนคลิกใน sent (ผลของ click()) ที่ถึงเกมจริง
+        คิว input: รอให้ทำชุดนี้เสร็จก่อน คลิกที่ถูกทิ้งเพราะเก่า (done_at = None) ไม่นับ
+        sink ที่คลิกทันที (คืน None) และ --multi (arbiter ไม่แจ้งกลับ) นับตามที่ส่ง
+        """
+        flush = getattr(inputs, "flush", None)
+        if flush:
+            with profiling.stage("input"):
+                flush(timeout=INPUT_SETTLE_TIMEOUT)
+        return sum(1 for s in sent if s is None or s.done_at is not None)
+
+    # Event-driven waits: จับภาพใหม่ตรงๆ (ไม่ผ่าน change gate / scheduler / pipeline)
+    waits = WaitStats() if event_waits else None
+    # pipeline: detect thread ใช้ tracker ตัวหลักอยู่พร้อมกัน -> การเช็คบนเธรดนี้ใช้ tracker แยก (ไม่มี lock ใน TemplateTracker)
+    wait_tracker = TemplateTracker(TRACK_MARGIN) if tracker and pipe else tracker
+
+    def screen_shows(states):
+        def check():
+            frame = FrameContext(capture.grab_gray(region))
+            return detect_state(frame, templates, offset, wait_tracker, states, pool)[0] is not None
+        return check
+
+    def start_button_shown():
+        btn_region = ui_region(REGION_START_BTN)
+        btn_frame = FrameContext(capture.grab_gray(btn_region))
+        return any(t and match_template(btn_frame, t) for t in templates[3:5])
+
+    def wait_for(name, predicate, fallback):
+        """รอหลังคลิกจน predicate() เป็นจริง สูงสุด fallback วินาที (= sleep เดิม)"""
+        if waits is None:
+            clock.sleep(fallback)
+            return
+        ok, waited = wait_until(predicate, clock, fallback, WAIT_SETTLE, WAIT_POLL)
+        waits.record(name, waited, fallback, ok)
     
+    _telemetry = telemetry if not pipe else None
+    _prefilter = pre_filter
     try:
-        while not check_stop():
+        while not stop_fn():
+            if result is not None:
+                pipe.release(result)
+                result = None
+            detect_ms = None
+
             # 1. สแกนพื้นที่หลัก (Main Region)
-            scr = screenshot_gray(region=region)
-            state, x, y, score = detect_state(scr, templates, offset)
+            shot = None
+            if pipe:
+                result = pipe.next_result(timeout=0.5)
+                if result is None:
+                    continue
+                # เฟรมที่จับก่อนคลิกล่าสุด (ใส่คิว/ทำเสร็จจริง) หรือเก่าเกินไป -> ข้าม
+                clicked_at = max(last_click_at, getattr(inputs, "executed_at", 0.0))
+                if result.captured_at < clicked_at or result.age > PIPELINE_MAX_AGE:
+                    stale_results += 1
+                    continue
+                frame_ages.append(result.age)
+                shot = result.frame
+                state, x, y, score = result.detection
+                if telemetry:
+                    telemetry.frame(iterations + 1, result.captured_at)
+            else:
+                if telemetry:
+                    telemetry.frame(iterations + 1, clock.now())
+                t0 = time.perf_counter()
+                if single_capture:
+                    # จับภาพครั้งเดียวครอบทุกพื้นที่ที่ต้องใช้ในลูปนี้ แล้วตัดเป็น view
+                    rois = [region, ui_region(REGION_START_BTN)] if should_check_btn_color else [region]
+                    shot = capture.grab_frame(bounding_region(*rois))
+                    frame = shot.crop(region) if region else shot
+                else:
+                    frame = FrameContext(capture.grab_gray(region))
+                t1 = time.perf_counter()
+                state, x, y, score = detect(frame)
+                if telemetry:
+                    telemetry.capture((t1 - t0) * 1000)
+                    detect_ms = (time.perf_counter() - t1) * 1000
             
             # 2. ตรวจสอบปุ่มเริ่มทำอาหารด้วยการเช็คสี (Color Check)
             # ** จะตรวจเฉพาะหลังกด select_menu แล้วเท่านั้น **
@@ -379,43 +1015,33 @@ def run_bot():
             if should_check_btn_color:
                 try:
                     # HYBRID: Template Matching + Color Check
-                    btn_scr = screenshot_gray(region=REGION_START_BTN)
-                    btn_found = False
+                    btn_region = ui_region(REGION_START_BTN)
+                    if shot is not None:
+                        btn_frame = shot.crop(btn_region)
+                    else:
+                        btn_frame = capture.grab_frame(btn_region)  # ภาพสี: ใช้ทั้ง match และอ่านสี
+                    btn_tpl = None
                     btn_x, btn_y = 0, 0
                     
                     # หาปุ่ม
                     if templates[3]:
-                        res = match_template(btn_scr, templates[3][0], templates[3][1])
+                        res = match_template(btn_frame, templates[3])
                         if res:
-                            btn_found = True
-                            btn_x, btn_y = res[0] + BTN_START_X1, res[1] + BTN_START_Y1
+                            btn_tpl = templates[3]
+                            btn_x, btn_y = res[0] + btn_region[0], res[1] + btn_region[1]
                     
-                    if not btn_found and templates[4]:
-                        res = match_template(btn_scr, templates[4][0], templates[4][1])
+                    if not btn_tpl and templates[4]:
+                        res = match_template(btn_frame, templates[4])
                         if res:
-                            btn_found = True
-                            btn_x, btn_y = res[0] + BTN_START_X1, res[1] + BTN_START_Y1
+                            btn_tpl = templates[4]
+                            btn_x, btn_y = res[0] + btn_region[0], res[1] + btn_region[1]
                     
-                    # เช็คสีถ้าเจอปุ่ม
-                    if btn_found:
-                        current_rgb = pyautogui.pixel(btn_x, btn_y)
-                        
-                        def hex_to_rgb(h):
-                            h = h.lstrip('#')
-                            return tuple(int(h[i:i+2], 16) for i in (0, 2, 4))
-                        
-                        def color_dist(c1, c2):
-                            return max(abs(c1[i] - c2[i]) for i in range(3))
-                        
-                        dist_can = color_dist(current_rgb, hex_to_rgb(BTN_COLOR_CANCOOK))
-                        dist_cannot = color_dist(current_rgb, hex_to_rgb(BTN_COLOR_CANNOTCOOK))
-                        
-                        # เปรียบเทียบสี
-                        if dist_can < dist_cannot:
-                            btn_state = GameState.CAN_COOK
+                    # เช็คสีถ้าเจอปุ่ม (สีจากเฟรมเดิม ไม่จับจอใหม่)
+                    if btn_tpl:
+                        btn_state = button.classify(btn_frame, btn_x, btn_y, btn_tpl.shape)
+                        if btn_state == GameState.CAN_COOK:
                             print(f"   ✅ ปุ่มสีฟ้า -> ทำอาหารได้!")
-                        else:
-                            btn_state = GameState.CANNOT_COOK
+                        elif btn_state == GameState.CANNOT_COOK:
                             print(f"   🛑 ปุ่มสีเทา -> หยุดบอท")
                             
                 except Exception as e:
@@ -424,9 +1050,22 @@ def run_bot():
             # ถ้าเจอสถานะจากปุ่ม ให้ใช้สถานะนั้นแทน (ยกเว้นกำลังผัดตะหลิวอยู่)
             if btn_state and state != GameState.QUICKTIME_EVENT:
                 state = btn_state
-                x, y, score = BTN_CENTER_X, BTN_CENTER_Y, 1.0
+                x, y = ui_point((BTN_CENTER_X, BTN_CENTER_Y))
+                score = 1.0
                 should_check_btn_color = False
 
+            if scheduler:
+                scheduler.observe(state, clock.now())
+
+            if burst:
+                burst.observe(state == GameState.QUICKTIME_EVENT, x, y)
+            if telemetry:
+                telemetry.state(state.value if state else None, detect_ms)
+
+            iterations += 1
+            if on_iteration:
+                on_iteration(iterations, state, x, y, score)
+
             # === STATE HANDLERS ===
             if state == GameState.QUICKTIME_EVENT:
                 # ผัดอาหาร
@@ -434,29 +1073,48 @@ def run_bot():
                     print(f"🎯 เจอตะหลิว! กำลังคลิก...")
                     current_state = GameState.QUICKTIME_EVENT
                 
-                click_at(x, y, double=DOUBLE_CLICK_SPATULA)
-                click_count += 1
-                time.sleep(SPATULA_CLICK_DELAY)
+                n, delay = burst.plan(x, y) if burst else (1, SPATULA_CLICK_DELAY)
+                sent = []
+                while len(sent) < n:
+                    sent.append(click(x, y, double=DOUBLE_CLICK_SPATULA))
+                    if telemetry and len(sent) == 1:
+                        telemetry.action("click", n, sent[0])
+                    clock.sleep(delay)
+                    if stop_fn():
+                        break
+                # นับเฉพาะคลิกที่ถึงเกมจริง (คิว input ทิ้งคลิกที่เก่าเกินได้) burst ปรับตัวจากค่านี้
+                clicks = issued(sent)
+                if burst:
+                    burst.issued(clicks)
+                click_count += clicks
+                qte.seen(clock.now(), clicks)
                 
             elif state == GameState.COOKING_DONE:
                 # เก็บอาหาร
                 if current_state != GameState.COOKING_DONE:
-                    click_at(x, y, double=True)
+                    sent = click(x, y, double=True)
+                    if telemetry:
+                        telemetry.action("collect", 1, sent)
                     click_count += 1
                     done_count += 1
-                    print(f"✅ อาหารเสร็จ! (จาน #{done_count}) รอ {DONE_CLICK_WAIT} วิ...")
+                    print(f"✅ อาหารเสร็จ! (จาน #{done_count}) รอสูงสุด {DONE_CLICK_WAIT} วิ...")
+                    dish = qte.finish()
+                    if dish:
+                        print(f"   🎯 QTE {dish['duration']:.2f} วิ | {dish['clicks']} คลิก ({dish['cps']:.1f} คลิก/วิ)")
                     current_state = GameState.COOKING_DONE
-                    time.sleep(DONE_CLICK_WAIT)
+                    wait_for("done -> next", screen_shows(NEXT_STATES[GameState.COOKING_DONE]), DONE_CLICK_WAIT)
                     current_state = None
             
             elif state == GameState.CAN_COOK:
                 # กดปุ่มเริ่มทำอาหาร
                 if current_state != GameState.CAN_COOK:
-                    click_at(x, y, double=True)
+                    sent = click(x, y, double=True)
+                    if telemetry:
+                        telemetry.action("start", 1, sent)
                     click_count += 1
-                    print(f"🍳 เริ่มทำอาหาร! รอ 0.8 วิ...")
+                    print(f"🍳 เริ่มทำอาหาร! รอสูงสุด {START_COOK_WAIT} วิ...")
                     current_state = GameState.CAN_COOK
-                    time.sleep(0.8) 
+                    wait_for("start -> cooking", screen_shows(NEXT_STATES[GameState.CAN_COOK]), START_COOK_WAIT)
                     current_state = None
                 
             elif state == GameState.CANNOT_COOK:
@@ -468,53 +1126,372 @@ def run_bot():
                 # กดเลือกเมนูอาหาร
                 if current_state != GameState.WAITING_MENU:
                     # คลิกเลือกเมนู
-                    click_at(x, y, double=True)
-                    click_count += 1
-                    
-                    # คลิกพิกัดพิเศษตามที่ผู้ใช้ระบุ
-                    click_at(220, 260, double=True)
-                    click_count += 1
+                    with gesture():
+                        sent = click(x, y, double=True)
+                        click_count += 1
+
+                        # คลิกพิกัดพิเศษตามที่ผู้ใช้ระบุ
+                        click(*ui_point(MENU_EXTRA_CLICK), double=True)
+                        click_count += 1
+                    if telemetry:
+                        telemetry.action("menu", 2, sent)  # หลัง with: --multi ส่ง gesture ตอนออกจาก with
                     
-                    print(f"📋 เลือกเมนู! (และคลิกพิกัดพิเศษ) รอ 1 วิ...")
+                    print(f"📋 เลือกเมนู! (และคลิกพิกัดพิเศษ) รอสูงสุด {MENU_SELECT_WAIT} วิ...")
                     current_state = GameState.WAITING_MENU
-                    time.sleep(1)
+                    wait_for("menu -> button", start_button_shown, MENU_SELECT_WAIT)
                     should_check_btn_color = True
+                    button.reset()
                     current_state = None
                 
             else:
                 # ไม่เจออะไรเลย
                 if current_state is not None:
                     current_state = None
-                time.sleep(SEARCH_DELAY)
+                clock.sleep(SEARCH_DELAY)
 
-    except pyautogui.FailSafeException:
+    except FAILSAFE_EXCEPTION:
         print("\n🛑 FailSafe: เมาส์ไปมุมจอแล้วหยุดอัตโนมัติ")
     except KeyboardInterrupt:
         pass
+    except ReplayFinished:
+        pass
+    finally:
+        _telemetry = None
+        _prefilter = None
+        if pipe:
+            pipe.stop()
+        if pool:
+            pool.close()
+
+    stats = {"click_count": click_count, "done_count": done_count, "iterations": iterations}
+    if pipe:
+        st = pipe.stats()
+        st["stale_results"] = stale_results
+        st["avg_age_ms"] = 1000 * sum(frame_ages) / len(frame_ages) if frame_ages else 0.0
+        stats["pipeline"] = st
+    if tracker:
+        stats["tracking"] = tracker.stats()
+    if scheduler:
+        stats["scheduling"] = scheduler.stats()
+    if gate:
+        stats["change_gate"] = gate.stats()
+    if pre_filter:
+        stats["prefilter"] = pre_filter.stats()
+    if waits:
+        stats["waits"] = waits.stats()
+    stats["qte"] = qte.stats()
+    stats["button"] = button.stats()
+    if burst:
+        stats["burst"] = burst.stats()
+    return stats
+
+# =========================
+# REPLAY
+# =========================
+def replay_session(path, telemetry_path=None):
+    """
+    เล่น session ที่บันทึกไว้ผ่าน detect_state + state handlers โดยไม่แตะเมาส์/จอจริง
+    ใช้ VirtualClock จึงได้ลำดับ state เหมือนเดิมทุกครั้ง (รันบน Linux headless ได้)
+    telemetry_path: เขียน telemetry ของการ replay (เวลา t/lat เป็นเวลาเสมือน, ms ของ match เป็นเวลาจริง)
+    Returns: list ของ (i, state, x, y)
+    """
+    import_runtime()
+    templates = load_all_templates()
+    if templates is None:
+        return None
+
+    clock = VirtualClock()
+    backend = ReplayBackend(path, clock)
+    inputs = FakeInput(clock, pixel_source=backend.pixel)
+    meta = backend.meta
+    region = tuple(meta["region"]) if meta.get("region") else None
+    print(f"\n🎞️ Replay: {path} | {len(backend.frames)} เฟรม | region={region}")
+    warm_up_bot(templates, region)
+
+    states = []
+    def on_iteration(i, state, x, y, score):
+        states.append((i, state.value if state else None, int(x), int(y)))
+
+    telemetry = None
+    if telemetry_path:
+        telemetry = TelemetryWriter(telemetry_path, clock, meta=dict(telemetry_meta(region, "replay", False),
+                                                                     replay=str(path)))
+    try:
+        stats = bot_loop(templates, region, backend, inputs, clock, stop_fn=lambda: False,
+                         single_capture=meta.get("single_capture", SINGLE_CAPTURE),
+                         pipeline_mode=False, on_iteration=on_iteration, telemetry=telemetry)
+    finally:
+        if telemetry:
+            telemetry.close()
+    print_summary(stats)
+
+    digest = hashlib.sha1(json.dumps([states, inputs.clicks]).encode("utf-8")).hexdigest()[:12]
+    print(f"   รอบที่เล่น: {len(states)} | คลิก: {len(inputs.clicks)} | digest={digest}")
+
+    recorded = [(s["i"], s["state"], s["x"], s["y"]) for s in backend.recorded_states]
+    if recorded:
+        diff = sum(1 for a, b in zip(states, recorded) if a != b) + abs(len(states) - len(recorded))
+        if diff:
+            print(f"   ⚠️ state ต่างจากตอนบันทึก {diff} รอบ")
+        else:
+            print(f"   ✅ state ตรงกับตอนบันทึกทุกรอบ")
+    return states
+
+# =========================
+# MULTI-INSTANCE (--multi)
+# =========================
+MULTI_RESULT_KEYS = ("click_count", "done_count", "iterations", "waits", "qte", "button", "burst", "elapsed", "error")
+
+def instance_worker(spec, commands, results, stop):
+    """
+    worker process ของ 1 หน้าต่างเกม: จับภาพ + ตรวจจับเอง คลิกผ่าน MouseArbiter ของ process หลัก
+    ส่ง (ชื่อ, สถิติ) กลับทาง results ก่อนจบเสมอ (สถิติเฉพาะ MULTI_RESULT_KEYS: dict/ตัวเลขล้วน pickle ได้)
+    """
+    global LEGACY_LOOP
+    name = spec["name"]
+    sys.stdout = PrefixedStream(sys.stdout, f"[{name}] ")
+    clock = SystemClock()
+    t0 = clock.now()
+    stats = {}
+    capture = None
+    try:
+        import_runtime()
+        templates = load_all_templates()
+        if templates is None:
+            return
+        region = spec["region"]
+        LEGACY_LOOP = spec.get("legacy", False)  # spawn: process ใหม่ไม่เห็นค่าจาก argv ของ process หลัก
+        capture = create_backend(CAPTURE_BACKEND)
+        inputs = ArbiterInput(name, commands,
+                              pixel_source=lambda x, y: capture.grab_frame((x, y, 1, 1)).pixel(x, y))
+        print(f"📸 {capture.name} | region={region} | origin={spec['origin']}")
+        warm_up_bot(templates, region)
+        t0 = clock.now()
+        stats = bot_loop(templates, region, capture, inputs, clock, stop_fn=stop.is_set,
+                         ui_origin=spec["origin"])
+    except Exception as e:
+        print(f"❌ {e!r}")
+        stats["error"] = repr(e)
+    finally:
+        if capture:
+            capture.close()
+        stats["elapsed"] = clock.now() - t0
+        results.put((name, {k: v for k, v in stats.items() if k in MULTI_RESULT_KEYS}))
+
+def run_multi(path=INSTANCES_FILE):
+    """หลายหน้าต่างเกม: 1 process ต่อ instance + เมาส์ตัวเดียวผ่าน MouseArbiter (supervisor.py)"""
+    global STOP_FLAG
+    STOP_FLAG = False
+
+    print("\n" + "="*60)
+    print("🍳 Cooking Bot - Heartopia (multi-instance)")
+    print("="*60)
+
+    try:
+        specs = load_instances(path, load_region())
+    except (OSError, ValueError) as e:
+        print(f"❌ โหลด {path} ไม่ได้: {e}")
+        return
+
+    import_runtime()
+    if not load_gui():
+        return
+    # โหลดครั้งแรกใน process หลัก: เช็ค template + สร้าง cache ก่อน worker ทุกตัวอ่านพร้อมกัน
+    if load_all_templates() is None:
+        return
+
+    print(f"\n🖥️ {len(specs)} instance (1 process ต่อ instance, คลิกผ่าน arbiter ทีละ gesture):")
+    for spec in specs:
+        spec["legacy"] = LEGACY_LOOP
+        region = spec["region"]
+        print(f"   {spec['name']}: origin={spec['origin']} region={region if region else 'ทั้งจอ'}")
+    print("\n🛑 กด ESC หรือ SPACE เพื่อหยุดทุก instance")
+    input("\n👉 กด Enter เพื่อเริ่มบอท...")
+    print("\n⏳ เริ่มใน 2 วินาที...")
+    time.sleep(2)
+    print("   GO!\n")
+
+    listener = start_keyboard_listener()
+    try:
+        results, arbiter_stats, error = run_supervised(specs, instance_worker, get_input(), check_stop,
+                                                       max_age=INPUT_MAX_AGE)
     finally:
         try:
             listener.stop()
         except:
             pass
-        print(f"\n🏁 สรุป:")
-        print(f"   คลิกทั้งหมด: {click_count} ครั้ง")
-        print(f"   ทำอาหารเสร็จ: {done_count} จาน")
+    if isinstance(error, FAILSAFE_EXCEPTION):
+        print("\n🛑 FailSafe: เมาส์ไปมุมจอแล้วหยุดทุก instance")
+    elif error is not None:
+        print(f"\n❌ arbiter คลิกไม่ได้: {error!r} (หยุดทุก instance)")
+    print_multi_summary(specs, results, arbiter_stats)
+
+def print_multi_summary(specs, results, arbiter_stats):
+    print(f"\n🏁 สรุปราย instance:")
+    print(f"   {'instance':<12} {'จาน':>5} {'นาที':>7} {'จาน/ชม.':>9} {'คลิก':>6} {'gesture':>8} "
+          f"{'รอเมาส์ avg/p95 ms':>19}")
+    total_dishes = 0
+    total_rate = 0.0
+    for spec in specs:
+        name = spec["name"]
+        st = results.get(name)
+        arb = arbiter_stats.get(name, {})
+        if st is None:
+            print(f"   {name:<12} ⚠️ ไม่ได้รับผลจาก worker (process ถูกปิดก่อนส่งผล)")
+            continue
+        elapsed = st.get("elapsed", 0.0)
+        dishes = st.get("done_count", 0)
+        rate = dishes * 3600 / elapsed if elapsed > 0 else 0.0
+        total_dishes += dishes
+        total_rate += rate
+        print(f"   {name:<12} {dishes:>5} {elapsed / 60:>7.1f} {rate:>9.1f} {arb.get('clicks', 0):>6} "
+              f"{arb.get('gestures', 0):>8} {arb.get('latency_ms_mean', 0.0):>9.1f}/{arb.get('latency_ms_p95', 0.0):<9.1f}")
+        if st.get("error"):
+            print(f"      ❌ {st['error']}")
+        if arb.get("discarded"):
+            print(f"      ทิ้ง {arb['discarded']} gesture ที่ค้างคิวตอนหยุด")
+        if arb.get("replaced") or arb.get("stale"):
+            print(f"      gesture ถูกแทนด้วยก้อนใหม่ {arb['replaced']} | ทิ้งเพราะรอนานเกิน {arb['stale']}")
+    print(f"   รวม: {total_dishes} จาน | {total_rate:.1f} จาน/ชม.")
+
+# =========================
+# PIPELINE BENCHMARK
+# =========================
+def bench_pipeline(duration=5.0):
+    """เทียบลูปแบบทีละขั้นกับ pipeline บนหน้าจอจริง (ไม่มีการคลิก)"""
+    import_runtime()
+    templates = load_all_templates()
+    if templates is None:
+        return
+    region = load_region()
+    warm_up_bot(templates, region)
+    offset = (region[0], region[1]) if region else (0, 0)
+
+    # workload เดียวกับ bot_loop: template ของ scale ที่ล็อคได้ + pipeline ครอบปุ่มของทุก scale
+    index = TemplateIndex(templates, TEMPLATE_SCALES) if MULTI_SCALE else None
+    if index:
+        if index.calibrate(FrameContext(get_capture().grab_gray(region)), MATCH_CONFIDENCE) is None:
+            print(f"⚠️ หา scale ไม่เจอ (ไม่มี template บนจอ) ใช้ template scale 1.0")
+        templates = index.active()
+        print(f"📐 scale = {index.scale or 1.0}")
+    btn_regions = [scale_region(REGION_START_BTN, s) for s in (index.scales if index else [1.0])]
+    pipe_region = bounding_region(region, *btn_regions)
+
+    def detect_fn(shot):
+        return detect_state(shot.crop(region) if region else shot, templates, offset)
+
+    print(f"\n⏱️ Benchmark {duration:.0f} วิ/โหมด | backend={get_capture().name} region={pipe_region}")
+    for r in compare_pipeline(get_capture(), pipe_region, detect_fn, duration=duration,
+                              ring_size=PIPELINE_RING_SIZE, max_fps=PIPELINE_CAPTURE_FPS):
+        print(f"   {r['mode']:<10} {r['results_per_sec']:7.1f} ผล/วิ | "
+              f"อายุเฟรม avg={r['age_ms_mean']:.1f}ms p95={r['age_ms_p95']:.1f}ms")
+    get_capture().close()
+
+# =========================
+# PROFILE
+# =========================
+def start_profiling(mode):
+    """--profile: เปิด stage timer, --profile=sample: + sampling profiler"""
+    profiling.enable()
+    sys.stdout = profiling.TimedStream(sys.stdout)
+    if mode == "sample":
+        return profiling.SamplingProfiler(PROFILE_SAMPLE_INTERVAL).start()
+    return None
+
+def finish_profiling(sampler):
+    """ปิด profiling แล้วพิมพ์ตารางต่อ stage + เขียนไฟล์ folded สำหรับ flamegraph"""
+    wall = profiling.disable()
+    if isinstance(sys.stdout, profiling.TimedStream):
+        sys.stdout = sys.stdout.stream
+    if sampler:
+        sampler.stop()
+
+    print(f"\n🔬 Profile ({wall:.1f} วิ) - stage ที่ซ้อนกันนับเวลาซ้ำในตัวแม่ (detect รวม matchTemplate/canny):")
+    for line in profiling.format_table(wall):
+        print(f"   {line}")
+    prefix = Path(PROFILE_OUTPUT)
+    stages_path = prefix.with_name(prefix.name + "_stages.folded")
+    profiling.write_folded(stages_path, profiling.folded, scale=1e6)
+    print(f"   🔥 flamegraph (self time µs): {stages_path}")
+    if sampler:
+        samples_path = prefix.with_name(prefix.name + "_samples.folded")
+        profiling.write_folded(samples_path, sampler.samples)
+        print(f"   🔥 flamegraph ({sampler.count} samples): {samples_path}")
 
 # =========================
 # MAIN
 # =========================
 def main():
+    # --profile / --profile=sample ใช้ร่วมกับคำสั่งอื่นได้ (เช่น --profile --replay x.cbrec)
+    # --metrics=<port|file> ใช้ได้กับทุกคำสั่งที่รันบอท (รวม --record / --telemetry)
+    # --legacy ใช้ได้กับทุกคำสั่งที่รันบอท (รวม --replay / --multi)
+    global METRICS, LEGACY_LOOP
+    profile = None
+    for arg in sys.argv[1:]:
+        if arg == "--profile" or arg.startswith("--profile="):
+            profile = arg.partition("=")[2] or "stages"
+            sys.argv.remove(arg)
+            break
+    for arg in sys.argv[1:]:
+        if arg.startswith("--metrics="):
+            METRICS = arg.partition("=")[2]
+            sys.argv.remove(arg)
+            break
+    if "--legacy" in sys.argv[1:]:
+        LEGACY_LOOP = True
+        sys.argv.remove("--legacy")
+        print("🧓 --legacy: ลูปแบบเดิม (ไม่มี tracking / scheduling / change gate / event waits / burst / คิว input / pre-filter / pipeline)")
+    if profile:
+        sampler = start_profiling(profile)
+        try:
+            run_command()
+        finally:
+            finish_profiling(sampler)
+    else:
+        run_command()
+
+def run_command():
     if len(sys.argv) > 1:
         cmd = sys.argv[1].strip().lower()
         if cmd == "--help":
             print("Usage:")
             print("  python cooking_bot.py           # รันบอท")
             print("  python cooking_bot.py --help    # แสดงวิธีใช้")
+            print("  python cooking_bot.py --bench-pipeline [วินาที]  # เทียบลูปเดิมกับ pipeline")
+            print("  python cooking_bot.py --record <file.cbrec>  # รันบอท + บันทึกเฟรม/action")
+            print("  python cooking_bot.py --replay <file.cbrec> [out.cbtel]  # เล่น session ซ้ำแบบ offline")
+            print("  python cooking_bot.py --telemetry <file.cbtel>  # รันบอท + บันทึก telemetry ทุกรอบ")
+            print("  python cooking_bot.py --report <file.cbtel> ...  # สรุป latency / เวลาต่อ state / จาน/ชม.")
+            print("  python cooking_bot.py --profile [คำสั่งอื่น]   # จับเวลาแต่ละขั้น + ไฟล์ flamegraph")
+            print("  python cooking_bot.py --profile=sample ...    # + sampling profiler")
+            print("  python cooking_bot.py --metrics=9464       # รันบอท + live metrics ที่ http://127.0.0.1:9464/metrics")
+            print("  python cooking_bot.py --metrics=bot.prom   # หรือเขียนไฟล์ .prom ใหม่ทุก METRICS_INTERVAL วิ")
+            print("  python cooking_bot.py --multi [instances.json]  # หลายหน้าต่างเกม 1 process ต่อ instance")
+            print("  python cooking_bot.py --legacy [คำสั่งอื่น]  # ลูปแบบเดิม ปิด optimization ที่เปลี่ยนจังหวะคลิก/การตรวจจับ")
             print("\nต้องมีไฟล์:")
             print("  - spatula_template.png = ไอคอนตะหลิว (quicktime)")
             print("  - select_menu.png      = หน้าเลือกเมนู")
             print("  - cookingdone.png      = อาหารเสร็จ")
             print("  - spatula_region.json  = พื้นที่ค้นหา [x1, y1, x2, y2]")
+        elif cmd == "--multi":
+            run_multi(Path(sys.argv[2]) if len(sys.argv) > 2 else INSTANCES_FILE)
+        elif cmd == "--bench-pipeline":
+            bench_pipeline(float(sys.argv[2]) if len(sys.argv) > 2 else 5.0)
+        elif cmd in ("--record", "--replay"):
+            if len(sys.argv) < 3:
+                print(f"Usage: python cooking_bot.py {cmd} <file.cbrec>")
+            elif cmd == "--record":
+                run_bot(record_path=Path(sys.argv[2]))
+            else:
+                replay_session(Path(sys.argv[2]), Path(sys.argv[3]) if len(sys.argv) > 3 else None)
+        elif cmd in ("--telemetry", "--report"):
+            if len(sys.argv) < 3:
+                print(f"Usage: python cooking_bot.py {cmd} <file.cbtel>")
+            elif cmd == "--telemetry":
+                run_bot(telemetry_path=Path(sys.argv[2]))
+            else:
+                for path in sys.argv[2:]:
+                    telemetry_report(Path(path))
         else:
             print(f"Unknown option: {sys.argv[1]}")
     else:
@@ -0,0 +1,179 @@
+"""
+🖼️ Frame Context - ภาพ 1 เฟรม + cache ของทุกรูปแบบที่ใช้ตอน match
+
+สร้างครั้งเดียวต่อ 1 screenshot แล้วส่งต่อให้ match_template / detect_state ทุกตัว
+gray / blur / edge / pyramid จะคำนวณตอนถูกเรียกใช้ครั้งแรกเท่านั้น
+(เดิมทุก match_template เรียก edges() ใหม่บนภาพเดิม = GaussianBlur + Canny ซ้ำ 5 รอบ/เฟรม)
+"""
+
+from profiling import stage
+from startup import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+# --- Edge settings (ต้องตรงกันทั้ง template และ screen) ---
+BLUR_KSIZE = (3, 3)
+CANNY_LOW = 50
+CANNY_HIGH = 150
+
+
+# ชื่อค่าคงที่ใน cv2 (ไม่แตะ cv2 ตอน import โมดูล เพื่อให้ lazy import ได้ - ดู startup.py)
+_GRAY_CODES = {
+    "RGB": "COLOR_RGB2GRAY",
+    "BGR": "COLOR_BGR2GRAY",
+    "BGRA": "COLOR_BGRA2GRAY",
+    "RGBA": "COLOR_RGBA2GRAY",
+}
+
+
+def to_gray(arr, channels="RGB"):
+    """แปลง array สี (ตามลำดับ channels) เป็น grayscale; ถ้าเป็น gray อยู่แล้วคืนค่าเดิม"""
+    if arr.ndim == 2:
+        return arr
+    with stage("gray"):
+        return cv2.cvtColor(arr, getattr(cv2, _GRAY_CODES[channels]))
+
+
+def edges(gray):
+    with stage("blur"):
+        blur = cv2.GaussianBlur(gray, BLUR_KSIZE, 0)
+    with stage("canny"):
+        return cv2.Canny(blur, CANNY_LOW, CANNY_HIGH)
+
+
+class FrameContext:
+    """
+    ภาพ 1 เฟรม พร้อม cache แบบ lazy
+    - color   : ภาพสีต้นฉบับจาก capture (None ถ้าได้มาเป็น gray)
+    - gray    : ภาพ grayscale (uint8, HxW)
+    - blur    : GaussianBlur ของ gray
+    - edge    : Canny ของ blur (เท่ากับ edges(gray) ทุกพิกเซล)
+    - pyramid : ภาพย่อด้วย cv2.pyrDown ทีละชั้น (ชั้น 0 = gray)
+    - origin  : พิกัดจอ (x, y) ของมุมซ้ายบนภาพ ใช้กับ crop()/pixel()
+    """
+
+    def __init__(self, image, channels="RGB", origin=(0, 0)):
+        if image.ndim == 2:
+            self._color = None
+            self._gray = image
+        else:
+            self._color = image
+            self._gray = None
+        self.channels = channels
+        self.origin = (int(origin[0]), int(origin[1]))
+        self._blur = None
+        self._edge = None
+        self._pyramid = []
+        self._edge_pyramid = {}
+
+    @property
+    def color(self):
+        return self._color
+
+    @property
+    def gray(self):
+        if self._gray is None:
+            self._gray = to_gray(self._color, self.channels)
+        return self._gray
+
+    @property
+    def shape(self):
+        img = self._gray if self._gray is not None else self._color
+        return img.shape[:2]
+
+    @property
+    def region(self):
+        """(x, y, w, h) บนจอของเฟรมนี้"""
+        h, w = self.shape
+        return (self.origin[0], self.origin[1], w, h)
+
+    @property
+    def blur(self):
+        if self._blur is None:
+            gray = self.gray
+            with stage("blur"):
+                self._blur = cv2.GaussianBlur(gray, BLUR_KSIZE, 0)
+        return self._blur
+
+    @property
+    def edge(self):
+        if self._edge is None:
+            blur = self.blur
+            with stage("canny"):
+                self._edge = cv2.Canny(blur, CANNY_LOW, CANNY_HIGH)
+        return self._edge
+
+    def pyramid(self, level):
+        """คืนภาพ gray ที่ย่อลง 2^level เท่า (cache ทุกชั้นที่เคยคำนวณ)"""
+        if not self._pyramid:
+            self._pyramid.append(self.gray)
+        while len(self._pyramid) <= level:
+            with stage("pyrDown"):
+                self._pyramid.append(cv2.pyrDown(self._pyramid[-1]))
+        return self._pyramid[level]
+
+    def edge_pyramid(self, level):
+        """คืน edge map ของภาพชั้น level (ชั้น 0 = self.edge)"""
+        if level == 0:
+            return self.edge
+        e = self._edge_pyramid.get(level)
+        if e is None:
+            e = edges(self.pyramid(level))
+            self._edge_pyramid[level] = e
+        return e
+
+    def crop(self, region):
+        """
+        ตัดส่วนของเฟรมตามพิกัดจอ (x, y, w, h) -> FrameContext ใหม่ที่เป็น view (ไม่ copy)
+        ถ้า gray ของเฟรมแม่คำนวณไว้แล้วจะ slice ต่อจาก gray เลย
+        edge ของเฟรมลูกคำนวณใหม่บนภาพที่ crop (ผลเหมือน capture region นั้นตรงๆ)
+        ส่วนที่เกินขอบเฟรมถูกตัดออกทั้ง 2 มุม (origin ของเฟรมลูก = มุมซ้ายบนของส่วนที่เหลือจริง)
+        """
+        x, y, w, h = region
+        ox, oy = self.origin
+        fh, fw = self.shape
+        x0, y0 = min(max(0, x - ox), fw), min(max(0, y - oy), fh)
+        x1, y1 = min(max(0, x - ox + w), fw), min(max(0, y - oy + h), fh)
+        x1, y1 = max(x0, x1), max(y0, y1)
+        if self._gray is not None:
+            sub = FrameContext(self._gray[y0:y1, x0:x1], self.channels, (ox + x0, oy + y0))
+            if self._color is not None:
+                sub._color = self._color[y0:y1, x0:x1]
+            return sub
+        return FrameContext(self._color[y0:y1, x0:x1], self.channels, (ox + x0, oy + y0))
+
+    def pixel(self, x, y):
+        """อ่านสี (r, g, b) ที่พิกัดจอ (x, y) จากบัฟเฟอร์ (แทน pyautogui.pixel)"""
+        px, py = x - self.origin[0], y - self.origin[1]
+        if self._color is None:
+            v = int(self._gray[py, px])
+            return (v, v, v)
+        c = self._color[py, px]
+        if self.channels.startswith("BGR"):
+            return (int(c[2]), int(c[1]), int(c[0]))
+        return (int(c[0]), int(c[1]), int(c[2]))
+
+    def rgb_patch(self, x, y, rx, ry, step=1):
+        """
+        สี่เหลี่ยมรอบพิกัดจอ (x, y) ขนาด (2*rx+1) x (2*ry+1) เก็บทุก step พิกเซล -> ndarray (N, 3) ลำดับ r, g, b
+        ส่วนที่เกินขอบภาพถูกตัดออก
+        """
+        px, py = x - self.origin[0], y - self.origin[1]
+        h, w = self.shape
+        ys = slice(max(0, py - ry), min(h, py + ry + 1), step)
+        xs = slice(max(0, px - rx), min(w, px + rx + 1), step)
+        if self._color is None:
+            g = self._gray[ys, xs].reshape(-1, 1)
+            return np.repeat(g, 3, axis=1)
+        patch = self._color[ys, xs, :3].reshape(-1, 3)
+        if self.channels.startswith("BGR"):
+            patch = patch[:, ::-1]
+        return patch
+
+
+def as_frame(screen):
+    """รับ FrameContext หรือ ndarray (gray) แล้วคืน FrameContext เสมอ"""
+    if isinstance(screen, FrameContext):
+        return screen
+    return FrameContext(np.asarray(screen))
@@ -0,0 +1,168 @@
+"""
+📮 Input Queue - ส่งคลิก/ขยับเมาส์ผ่านคิวให้ worker thread ทำแทน ลูปตรวจจับไม่ต้องรอเมาส์
+
+เดิม double click 1 ครั้ง = moveTo + mouseDown/Up x2 + sleep 10ms + pyautogui.PAUSE ทุกคำสั่ง
+บล็อกลูปหลักหลายสิบ ms ต่อคลิก -> InputDispatcher ห่อ input sink เดิม (interface เดียวกัน)
+- click()/move() แค่ใส่คิวแล้วคืนทันที (คิวเต็ม max_pending -> รอ = backpressure)
+- move ที่ยังไม่ได้ทำถูกรวม: move ต่อ move เหลือตัวล่าสุด, move ก่อน click ตัดทิ้ง (click ขยับเมาส์เองอยู่แล้ว)
+- click ที่รอในคิวนานเกิน max_age วินาที ถูกทิ้ง (จอเปลี่ยนไปแล้ว คลิกตอนนี้ไม่โดนอะไร)
+  QTE ตะหลิวสั่งคลิกเร็วกว่าเมาส์จริง (~80 ms/double click) เดิมคิวยาวจนคลิกช้ากว่าจอเป็นวินาที
+  click ใหม่ที่จุดเดิมกับ click ที่รอจนเก่าแล้ว -> ตัวเก่าถูกทิ้งทันที ตัวใหม่ต่อท้าย (นับใน coalesced)
+  click ที่ยังไม่เก่าไม่ถูกรวม: ทุก click() ได้ InputCommand ของตัวเอง ดู done_at ได้ว่าถึงเกมจริงไหม
+- pixel() รอให้คิวว่างก่อนอ่านสี (ต้องเห็นจอหลังคลิกก่อนหน้า)
+- error ใน worker (เช่น pyautogui.FailSafeException) ถูก raise ต่อในเธรดหลักที่คำสั่งถัดไป
+ทุกคำสั่งเก็บเวลาใส่คิว -> ทำเสร็จ (latency) ไว้ดูใน stats()
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class InputCommand:
+    __slots__ = ("kind", "x", "y", "double", "enqueued_at", "executed_at", "done_at")
+
+    def __init__(self, kind, x, y, double=False):
+        self.kind = kind
+        self.x = x
+        self.y = y
+        self.double = double
+        self.enqueued_at = time.perf_counter()
+        self.executed_at = None
+        self.done_at = None  # clock.now() ตอนทำเสร็จ (เวลาเดียวกับลูป ใช้ใน telemetry) None = ยังไม่ได้ทำ/ถูกทิ้ง
+
+    @property
+    def latency(self):
+        """วินาทีตั้งแต่ใส่คิวจนทำเสร็จ (None = ยังไม่ได้ทำ)"""
+        if self.executed_at is None:
+            return None
+        return self.executed_at - self.enqueued_at
+
+
+class InputDispatcher:
+    def __init__(self, inputs, clock=None, max_pending=16, history=10000, max_age=0.25):
+        self.inputs = inputs
+        self.name = f"{inputs.name}+queue"
+        self.clock = clock
+        self.max_pending = max_pending
+        self.max_age = max_age   # วินาที (0 = ไม่ทิ้ง)
+        self.executed_at = 0.0   # clock.now() ตอนคลิกล่าสุดทำเสร็จ (ใช้ตัดเฟรมก่อนคลิก)
+        self.executed = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.latencies = deque(maxlen=history)
+        self._pending = deque()
+        self._busy = False
+        self._error = None
+        self._running = True
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="input-dispatch", daemon=True)
+        self._thread.start()
+
+    # --- ฝั่งเธรดหลัก ---
+    def _put(self, cmd):
+        """คืน cmd (None = move ที่ถูกรวมกับตัวที่รออยู่)"""
+        with self._cond:
+            self._raise_error()
+            self._cond.wait_for(lambda: len(self._pending) < self.max_pending or self._error)
+            self._raise_error()
+            last = self._pending[-1] if self._pending else None
+            if last is not None and last.kind == "move":
+                if cmd.kind == "move":
+                    last.x, last.y = cmd.x, cmd.y
+                    self.coalesced += 1
+                    return None
+                self._pending.pop()
+                self.coalesced += 1
+            if cmd.kind == "click" and self.max_age:
+                stale = [p for p in self._pending if p.kind == "click" and self._is_stale(p, cmd.enqueued_at)
+                         and (p.x, p.y, p.double) == (cmd.x, cmd.y, cmd.double)]
+                for p in stale:
+                    self._pending.remove(p)
+                self.coalesced += len(stale)
+            self._pending.append(cmd)
+            self._cond.notify_all()
+            return cmd
+
+    def _is_stale(self, cmd, now):
+        return cmd.kind == "click" and self.max_age and now - cmd.enqueued_at > self.max_age
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def move(self, x, y):
+        self._put(InputCommand("move", x, y))
+
+    def click(self, x, y, double=False):
+        """คืน InputCommand ของคลิกนี้ (done_at ถูกตั้งเมื่อทำเสร็จ, None ตลอด = ถูกทิ้งเพราะเก่า)"""
+        return self._put(InputCommand("click", x, y, double))
+
+    def flush(self, timeout=None):
+        """รอจนทุกคำสั่งในคิวทำเสร็จ คืน False ถ้าหมดเวลา"""
+        with self._cond:
+            done = self._cond.wait_for(lambda: (not self._pending and not self._busy) or self._error,
+                                       timeout=timeout)
+            self._raise_error()
+            return done
+
+    def pixel(self, x, y):
+        self.flush()
+        return self.inputs.pixel(x, y)
+
+    def close(self):
+        try:
+            self.flush(timeout=2.0)
+        finally:
+            with self._cond:
+                self._running = False
+                self._cond.notify_all()
+            self._thread.join(timeout=1.0)
+
+    # --- worker ---
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or not self._running)
+                if not self._pending:
+                    return
+                cmd = self._pending.popleft()
+                if self._is_stale(cmd, time.perf_counter()):
+                    self.dropped += 1
+                    self._cond.notify_all()
+                    continue
+                self._busy = True
+                self._cond.notify_all()
+            try:
+                if cmd.kind == "click":
+                    self.inputs.click(cmd.x, cmd.y, cmd.double)
+                else:
+                    self.inputs.move(cmd.x, cmd.y)
+                error = None
+            except BaseException as e:
+                error = e
+            cmd.executed_at = time.perf_counter()
+            with self._cond:
+                self._busy = False
+                if error is not None:
+                    self._error = error
+                    self._pending.clear()  # คลิกที่ค้างหลัง error (เช่น FailSafe) ไม่ทำต่อ
+                else:
+                    self.executed += 1
+                    self.latencies.append(cmd.latency)
+                    if cmd.kind == "click" and self.clock is not None:
+                        self.executed_at = cmd.done_at = self.clock.now()
+                self._cond.notify_all()
+
+    def stats(self):
+        lat = sorted(self.latencies)
+        n = len(lat)
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "latency_ms_mean": 1000 * sum(lat) / n if n else 0.0,
+            "latency_ms_p95": 1000 * lat[min(n - 1, int(n * 0.95))] if n else 0.0,
+            "latency_ms_max": 1000 * lat[-1] if n else 0.0,
+        }
@@ -0,0 +1,63 @@
+"""
+🖱️ Input Sinks - ปลายทางของการคลิก/อ่านสีจุด
+
+- PyAutoGUIInput = เมาส์จริง (พฤติกรรมเดียวกับ click_at เดิม)
+- FakeInput      = ไม่แตะเมาส์ เก็บรายการคลิกไว้ตรวจสอบ (replay / test / simulator)
+
+ทุก sink มี click(x, y, double) / move(x, y) / pixel(x, y) -> (r, g, b)
+"""
+
+import time
+
+from clock import VirtualClock
+
+
+class PyAutoGUIInput:
+    """คลิกด้วย pyautogui (double click = mouseDown/mouseUp 2 รอบ ห่างกัน 10ms)"""
+    name = "pyautogui"
+
+    def __init__(self):
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def move(self, x, y):
+        self._pyautogui.moveTo(x, y)
+
+    def click(self, x, y, double=False):
+        pg = self._pyautogui
+        pg.moveTo(x, y)
+        if double:
+            pg.mouseDown(); time.sleep(0.01); pg.mouseUp()
+            time.sleep(0.01)
+            pg.mouseDown(); time.sleep(0.01); pg.mouseUp()
+        else:
+            pg.click()
+
+    def pixel(self, x, y):
+        return tuple(self._pyautogui.pixel(x, y))
+
+
+class FakeInput:
+    """
+    sink ปลอม: บันทึกทุกคลิกเป็น (t, x, y, double) โดย t มาจาก clock
+    pixel_source: ฟังก์ชัน (x, y) -> (r, g, b) สำหรับตอบ pixel() (เช่นจาก ReplayBackend)
+    """
+    name = "fake"
+
+    def __init__(self, clock=None, pixel_source=None):
+        self.clock = clock or VirtualClock()
+        self.pixel_source = pixel_source
+        self.clicks = []
+        self.position = (0, 0)
+
+    def move(self, x, y):
+        self.position = (int(x), int(y))
+
+    def click(self, x, y, double=False):
+        self.move(x, y)
+        self.clicks.append((self.clock.now(), int(x), int(y), bool(double)))
+
+    def pixel(self, x, y):
+        if self.pixel_source is None:
+            return (0, 0, 0)
+        return self.pixel_source(x, y)
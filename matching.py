@@ -0,0 +1,119 @@
+"""
+🔍 Pyramid Matching - ค้นหาแบบหยาบ -> ละเอียด (coarse-to-fine)
+
+1) matchTemplate บนภาพ + template ที่ย่อลง 2^level เท่า (เร็วขึ้น ~4^level เท่า)
+2) เก็บจุดที่คะแนนสูงสุด top_k จุดจากทั้ง raw และ edge
+3) matchTemplate ความละเอียดเต็มเฉพาะหน้าต่างเล็กๆ รอบแต่ละจุด
+
+คะแนนที่ได้เป็น TM_CCOEFF_NORMED ของความละเอียดเต็ม (เท่ากับการค้นทั้งภาพ ถ้าจุดจริงอยู่ในหน้าต่าง)
+ผลลัพธ์รูปแบบเดียวกับ match_template: (cx, cy, score, mode) หรือ None
+"""
+
+from profiling import stage
+from startup import lazy_import
+
+cv2 = lazy_import("cv2")
+
+MIN_TEMPLATE_SIDE = 12  # template ที่ชั้นหยาบต้องไม่เล็กกว่านี้ (เล็กไปจะหาผิด)
+
+
+def score(image, templ):
+    """matchTemplate (TM_CCOEFF_NORMED) + minMaxLoc -> (max_val, max_loc)"""
+    with stage("matchTemplate"):
+        _, max_val, _, max_loc = cv2.minMaxLoc(cv2.matchTemplate(image, templ, cv2.TM_CCOEFF_NORMED))
+    return max_val, max_loc
+
+
+def pick(raw, edge, tpl_shape, raw_thr, edge_thr):
+    """
+    เลือกผลจาก raw / edge: raw ก่อน, edge ชนะถ้าคะแนนสูงกว่า
+    raw, edge: (score, loc มุมซ้ายบน) หรือ loc = None ถ้าไม่ได้ค้น
+    คืน (cx, cy, score, mode) หรือ None
+    """
+    th, tw = tpl_shape
+    best = None
+    if raw[1] is not None and raw[0] >= raw_thr:
+        best = ("raw", raw[0], raw[1])
+    if edge[1] is not None and edge[0] >= edge_thr:
+        if best is None or edge[0] > best[1]:
+            best = ("edge", edge[0], edge[1])
+    if best is None:
+        return None
+    mode, value, loc = best
+    return (int(loc[0] + tw // 2), int(loc[1] + th // 2), float(value), mode)
+
+
+def effective_level(frame_shape, tpl_shape, levels):
+    """ลดจำนวนชั้นลงจน template/ภาพที่ชั้นหยาบยังใหญ่พอ"""
+    th, tw = tpl_shape
+    fh, fw = frame_shape
+    level = levels
+    while level > 0:
+        s = 1 << level
+        if min(th, tw) // s >= MIN_TEMPLATE_SIDE and fh // s > th // s and fw // s > tw // s:
+            break
+        level -= 1
+    return level
+
+
+def top_peaks(res, k, suppress_wh):
+    """หา k จุดสูงสุดใน result map โดยกดพื้นที่รอบจุดที่เลือกแล้วทิ้ง (non-max suppression)"""
+    res = res.copy()
+    sw, sh = suppress_wh
+    peaks = []
+    for _ in range(k):
+        _, max_val, _, (x, y) = cv2.minMaxLoc(res)
+        peaks.append((x, y))
+        res[max(0, y - sh):y + sh + 1, max(0, x - sw):x + sw + 1] = -1.0
+    return peaks
+
+
+def match_pyramid(frame, tpl, raw_thr, edge_thr, levels=2, top_k=3):
+    """
+    frame: FrameContext, tpl: Template
+    levels: จำนวนชั้นที่ย่อ (2 = ย่อ 4 เท่าต่อด้าน), top_k: จำนวนจุดที่นำไปค้นละเอียด
+    """
+    raw_best, edge_best = search_pyramid(frame, tpl, levels, top_k)
+    return pick(raw_best, edge_best, tpl.shape, raw_thr, edge_thr)
+
+
+def search_pyramid(frame, tpl, levels=2, top_k=3):
+    """ค้นแบบ pyramid แล้วคืนคะแนนดีที่สุด (raw, edge) แต่ละตัวเป็น (score, loc) ก่อนเทียบ threshold"""
+    th, tw = tpl.shape
+    fh, fw = frame.shape
+    level = effective_level((fh, fw), (th, tw), levels)
+
+    if level == 0:
+        candidates = [(0, 0)]
+        margin = max(fw, fh)  # ค้นทั้งภาพ
+    else:
+        s = 1 << level
+        suppress = (max(1, (tw // s) // 2), max(1, (th // s) // 2))
+        img, img_e = frame.pyramid(level), frame.edge_pyramid(level)
+        with stage("matchTemplate"):
+            res = cv2.matchTemplate(img, tpl.pyramid(level), cv2.TM_CCOEFF_NORMED)
+            res_e = cv2.matchTemplate(img_e, tpl.edge_pyramid(level), cv2.TM_CCOEFF_NORMED)
+        candidates = []
+        for x, y in top_peaks(res, top_k, suppress) + top_peaks(res_e, top_k, suppress):
+            p = (x * s, y * s)
+            if p not in candidates:
+                candidates.append(p)
+        margin = 2 * s
+
+    gray = frame.gray
+    edge = frame.edge
+    raw_best = (-1.0, None)
+    edge_best = (-1.0, None)
+    for px, py in candidates:
+        x0, y0 = max(0, px - margin), max(0, py - margin)
+        x1, y1 = min(fw, px + tw + margin), min(fh, py + th + margin)
+        if x1 - x0 < tw or y1 - y0 < th:
+            continue
+        v, loc = score(gray[y0:y1, x0:x1], tpl.gray)
+        if v > raw_best[0]:
+            raw_best = (v, (loc[0] + x0, loc[1] + y0))
+        v, loc = score(edge[y0:y1, x0:x1], tpl.edge)
+        if v > edge_best[0]:
+            edge_best = (v, (loc[0] + x0, loc[1] + y0))
+
+    return raw_best, edge_best
@@ -0,0 +1,258 @@
+"""
+📈 Live Metrics - ดูสถานะบอทระหว่างรันยาวๆ (ไม่ต้องรอ "🏁 สรุป" ตอนจบ)
+
+LiveMetrics รับข้อมูลแบบเดียวกับ TelemetryWriter (frame / capture / match / state / action)
+ลูปแค่บวกตัวเลขใน memory (ไม่มี I/O) การแปลงเป็นข้อความ/เขียนไฟล์/ตอบ HTTP ทำบน thread อื่นทั้งหมด
+
+ออกได้ 2 แบบ (รูปแบบ Prometheus text เหมือนกัน):
+- MetricsServer = HTTP endpoint http://127.0.0.1:<port>/metrics (ให้ Prometheus scrape หรือเปิดดูใน browser)
+- MetricsFile   = เขียนไฟล์ .prom ใหม่ทุก interval วินาที (node_exporter textfile collector / เปิดดูเอง)
+
+metrics:
+  cookingbot_loop_fps                        รอบ/วินาที (เฉลี่ย 10 วิล่าสุด)
+  cookingbot_capture_seconds                 histogram เวลาจับภาพ
+  cookingbot_detect_seconds                  histogram เวลาตรวจจับทั้งเฟรม
+  cookingbot_match_seconds{template}         histogram เวลา match ราย template
+  cookingbot_state{state}                    1 = state ปัจจุบัน (none = ไม่เจออะไร)
+  cookingbot_seconds_since_state_change      วินาทีตั้งแต่ state ที่ตรวจเจอเปลี่ยนครั้งล่าสุด (ไม่นับเฟรมที่ไม่เจออะไร)
+  cookingbot_dishes_total / _dishes_per_hour จานที่เก็บแล้ว / อัตราตั้งแต่เริ่ม
+  cookingbot_qte_seconds                     histogram เวลา QTE ต่อจาน (ตะหลิวตัวแรก -> ตัวสุดท้าย)
+  cookingbot_actions_total{action}           จำนวน action (click / collect / start / menu)
+  cookingbot_clicks_total                    จำนวนคลิก
+"""
+
+import os
+import threading
+from bisect import bisect_left
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1.0)
+QTE_BUCKETS = (0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0)
+FPS_WINDOW = 10.0  # วินาที
+STATES = ("waiting_menu", "can_cook", "cannot_cook", "quicktime", "cooking_done", "none")
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # ช่องสุดท้าย = เกินทุก bucket
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, v):
+        self.counts[bisect_left(self.buckets, v)] += 1
+        self.sum += v
+        self.count += 1
+
+    def copy(self):
+        h = Histogram(self.buckets)
+        h.counts = list(self.counts)
+        h.sum = self.sum
+        h.count = self.count
+        return h
+
+    def lines(self, name, labels=""):
+        out = []
+        total = 0
+        sep = "," if labels else ""
+        for le, n in zip(self.buckets, self.counts):
+            total += n
+            out.append(f'{name}_bucket{{{labels}{sep}le="{le}"}} {total}')
+        out.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        out.append(f"{name}_sum{suffix} {self.sum:.6f}")
+        out.append(f"{name}_count{suffix} {self.count}")
+        return out
+
+
+class LiveMetrics:
+    def __init__(self, clock):
+        self.clock = clock
+        self.started_at = clock.now()
+        self.capture_hist = Histogram(LATENCY_BUCKETS)
+        self.detect_hist = Histogram(LATENCY_BUCKETS)
+        self.match_hist = {}
+        self.qte_hist = Histogram(QTE_BUCKETS)
+        self.frames = 0
+        self.frame_times = deque(maxlen=1024)
+        self.current = "none"
+        self.last_detected = None
+        self.changed_at = self.started_at
+        self.dishes = 0
+        self.clicks = 0
+        self.actions = {}
+        self._qte_first = None
+        self._qte_last = None
+        self._lock = threading.Lock()
+
+    # --- ฝั่งลูป (interface เดียวกับ TelemetryWriter) ---
+    def frame(self, iteration, started_at):
+        with self._lock:
+            self.frames += 1
+            self.frame_times.append(started_at)
+
+    def capture(self, ms):
+        with self._lock:
+            self.capture_hist.observe(ms / 1000)
+
+    def match(self, name, raw, edge, ms):
+        with self._lock:
+            hist = self.match_hist.get(name)
+            if hist is None:
+                hist = self.match_hist[name] = Histogram(LATENCY_BUCKETS)
+            hist.observe(ms / 1000)
+
+    def state(self, state, detect_ms=None):
+        now = self.clock.now()
+        with self._lock:
+            if detect_ms is not None:
+                self.detect_hist.observe(detect_ms / 1000)
+            self.current = state or "none"
+            if state is None:
+                return
+            if state != self.last_detected:
+                self.last_detected = state
+                self.changed_at = now
+            if state == "quicktime":
+                if self._qte_first is None:
+                    self._qte_first = now
+                self._qte_last = now
+
+    def action(self, name, clicks=1, command=None):
+        with self._lock:
+            self.actions[name] = self.actions.get(name, 0) + 1
+            self.clicks += clicks
+            if name == "collect":
+                self.dishes += 1
+                if self._qte_first is not None:
+                    self.qte_hist.observe(self._qte_last - self._qte_first)
+                    self._qte_first = self._qte_last = None
+
+    def close(self):
+        pass
+
+    # --- ฝั่ง exporter (thread อื่น) ---
+    def snapshot(self):
+        """copy ค่าทั้งหมดภายใต้ lock สั้นๆ (การจัดรูปข้อความทำนอก lock ลูปไม่ต้องรอ)"""
+        with self._lock:
+            return {
+                "now": self.clock.now(), "frames": self.frames, "frame_times": list(self.frame_times),
+                "current": self.current, "changed_at": self.changed_at, "dishes": self.dishes,
+                "clicks": self.clicks, "actions": dict(self.actions),
+                "capture": self.capture_hist.copy(), "detect": self.detect_hist.copy(),
+                "match": {name: h.copy() for name, h in self.match_hist.items()}, "qte": self.qte_hist.copy(),
+            }
+
+    def render(self):
+        """ข้อความรูปแบบ Prometheus text exposition"""
+        s = self.snapshot()
+        now = s["now"]
+        times = [t for t in s["frame_times"] if t >= now - FPS_WINDOW]
+        fps = (len(times) - 1) / (times[-1] - times[0]) if len(times) > 1 and times[-1] > times[0] else 0.0
+        elapsed = now - self.started_at
+        lines = [
+            "# HELP cookingbot_loop_fps Loop iterations per second (last 10 s).",
+            "# TYPE cookingbot_loop_fps gauge",
+            f"cookingbot_loop_fps {fps:.3f}",
+            "# TYPE cookingbot_frames_total counter",
+            f"cookingbot_frames_total {s['frames']}",
+            "# TYPE cookingbot_uptime_seconds gauge",
+            f"cookingbot_uptime_seconds {elapsed:.3f}",
+            "# HELP cookingbot_state Current detected state (1 = active).",
+            "# TYPE cookingbot_state gauge",
+        ]
+        lines += [f'cookingbot_state{{state="{st}"}} {int(st == s["current"])}' for st in STATES]
+        lines += [
+            "# HELP cookingbot_seconds_since_state_change Seconds since the detected state last changed.",
+            "# TYPE cookingbot_seconds_since_state_change gauge",
+            f"cookingbot_seconds_since_state_change {now - s['changed_at']:.3f}",
+            "# TYPE cookingbot_dishes_total counter",
+            f"cookingbot_dishes_total {s['dishes']}",
+            "# TYPE cookingbot_dishes_per_hour gauge",
+            f"cookingbot_dishes_per_hour {s['dishes'] * 3600 / elapsed if elapsed > 0 else 0.0:.3f}",
+            "# TYPE cookingbot_clicks_total counter",
+            f"cookingbot_clicks_total {s['clicks']}",
+            "# TYPE cookingbot_actions_total counter",
+        ]
+        lines += [f'cookingbot_actions_total{{action="{a}"}} {n}' for a, n in sorted(s["actions"].items())]
+        lines += ["# TYPE cookingbot_capture_seconds histogram"] + s["capture"].lines("cookingbot_capture_seconds")
+        lines += ["# TYPE cookingbot_detect_seconds histogram"] + s["detect"].lines("cookingbot_detect_seconds")
+        lines.append("# TYPE cookingbot_match_seconds histogram")
+        for name, hist in sorted(s["match"].items()):
+            lines += hist.lines("cookingbot_match_seconds", f'template="{name}"')
+        lines += ["# TYPE cookingbot_qte_seconds histogram"] + s["qte"].lines("cookingbot_qte_seconds")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """HTTP endpoint (GET /metrics) บน daemon thread"""
+
+    def __init__(self, metrics, port, host="127.0.0.1"):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # ไม่พิมพ์ทุก request ปนกับข้อความของบอท
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}/metrics"
+        self._thread = threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class MetricsFile:
+    """เขียนไฟล์ใหม่ทุก interval วินาที (เขียนไฟล์ชั่วคราวแล้ว replace -> ผู้อ่านไม่เห็นไฟล์ครึ่งๆ)"""
+
+    def __init__(self, metrics, path, interval=5.0):
+        self.metrics = metrics
+        self.path = str(path)
+        self.url = self.path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-file", daemon=True)
+        self._thread.start()
+
+    def write(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.metrics.render())
+        os.replace(tmp, self.path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError:
+                pass  # ไฟล์ถูกล็อค (เช่นเปิดค้างใน editor บน Windows) -> ลองใหม่รอบหน้า
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        try:
+            self.write()  # ค่าสุดท้ายตอนจบ
+        except OSError:
+            pass
+
+
+def serve(metrics, target, interval=5.0):
+    """target = port (ตัวเลข) -> MetricsServer, อย่างอื่น = path ของไฟล์ -> MetricsFile"""
+    if isinstance(target, int) or str(target).isdigit():
+        return MetricsServer(metrics, int(target))
+    return MetricsFile(metrics, target, interval)
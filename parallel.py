@@ -0,0 +1,37 @@
+"""
+🧵 Match Pool - match หลาย template / หลายโหมดพร้อมกันบน thread pool ถาวร
+
+cv2.matchTemplate ปล่อย GIL ระหว่างคำนวณ จึงรันขนานบนหลาย core ได้จริง
+pool สร้างครั้งเดียวต่อการรัน (ไม่สร้าง thread ใหม่ทุกเฟรม)
+
+ข้อควรระวัง: cache แบบ lazy ของ FrameContext / Template ไม่ thread-safe
+ต้องเรียก warm_frame() / warm_template() ในเธรดที่ส่งงาน ก่อน submit ทุกครั้ง
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+def warm_frame(frame, levels=0):
+    """คำนวณ gray / edge / pyramid ของเฟรมไว้ก่อน (กัน worker หลายตัวคำนวณ cache ชนกัน)"""
+    frame.edge
+    for level in range(1, levels + 1):
+        frame.edge_pyramid(level)
+
+
+def warm_template(tpl, levels=0):
+    for level in range(1, levels + 1):
+        tpl.edge_pyramid(level)
+
+
+class MatchPool:
+    def __init__(self, workers):
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="match")
+        self.jobs = 0
+
+    def submit(self, fn, *args):
+        self.jobs += 1
+        return self._pool.submit(fn, *args)
+
+    def close(self):
+        self._pool.shutdown(wait=True)
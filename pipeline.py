@@ -0,0 +1,302 @@
+"""
+🧵 Capture/Detect Pipeline - จับภาพและตรวจจับแบบขนานกัน
+
+โครงสร้าง:
+  [capture thread] --เขียน--> FrameRing (บัฟเฟอร์จองไว้ล่วงหน้า N ช่อง)
+  [detect thread]  --อ่านเฟรมใหม่สุด (ทิ้งเฟรมเก่าที่ไม่ทัน)--> detect_fn(frame)
+  [state handler]  <--ผลล่าสุด (DetectionResult + อายุเฟรม)-- next_result()
+
+เฟรมที่ handler ได้รับยังเป็น view ของบัฟเฟอร์ใน ring จนกว่าจะเรียก release(result)
+error ใน capture/detect thread (backend พัง, match error) หยุดทั้ง pipeline แล้วถูก raise ต่อ
+ในเธรดหลักที่ next_result() / stop() ถัดไป
+"""
+
+import threading
+import time
+
+from startup import lazy_import
+from clock import SystemClock
+from frame_context import FrameContext
+
+np = lazy_import("numpy")
+
+
+class FrameRing:
+    """
+    Ring buffer ขนาดคงที่ของเฟรมที่จองหน่วยความจำไว้ล่วงหน้า
+    - write() copy ภาพลงช่องถัดไปที่ไม่มีใครถืออยู่
+    - acquire_latest() คืนช่องของเฟรมใหม่สุด (ต้อง release() เมื่อใช้เสร็จ)
+    """
+
+    def __init__(self, size, shape, dtype="uint8"):
+        if size < 3:
+            raise ValueError("FrameRing ต้องมีอย่างน้อย 3 ช่อง (เขียน 1 + ตรวจ 1 + handler 1)")
+        self.buffers = [np.empty(shape, dtype=dtype) for _ in range(size)]
+        self.seqs = [0] * size
+        self.stamps = [0.0] * size
+        self.busy = [0] * size
+        self.latest_slot = None
+        self.seq = 0
+        self._next = 0
+        self._cond = threading.Condition()
+
+    def write(self, image, captured_at):
+        with self._cond:
+            size = len(self.buffers)
+            for _ in range(size):
+                slot = self._next
+                self._next = (self._next + 1) % size
+                if not self.busy[slot] and slot != self.latest_slot:
+                    break
+            else:
+                return None  # ทุกช่องถูกถืออยู่ -> ทิ้งเฟรมนี้
+            self.busy[slot] += 1
+        # copy นอก lock เพื่อไม่ให้ reader ต้องรอ
+        np.copyto(self.buffers[slot], image)
+        with self._cond:
+            self.busy[slot] -= 1
+            self.seq += 1
+            self.seqs[slot] = self.seq
+            self.stamps[slot] = captured_at
+            self.latest_slot = slot
+            self._cond.notify_all()
+            return self.seq
+
+    def acquire_latest(self, after_seq=0, timeout=None):
+        """รอจนมีเฟรม seq > after_seq แล้วคืน (slot, seq, captured_at) หรือ None ถ้าหมดเวลา"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.seq > after_seq, timeout=timeout):
+                return None
+            slot = self.latest_slot
+            self.busy[slot] += 1
+            return slot, self.seqs[slot], self.stamps[slot]
+
+    def release(self, slot):
+        with self._cond:
+            self.busy[slot] -= 1
+
+    def wake_all(self):
+        with self._cond:
+            self._cond.notify_all()
+
+
+class DetectionResult:
+    """ผลตรวจจับ 1 เฟรม + เวลาที่ใช้ (อายุเฟรม = clock.now() - captured_at, เวลาทั้งหมดมาจาก clock ของ pipeline)"""
+
+    __slots__ = ("seq", "slot", "frame", "detection", "captured_at", "detected_at", "dropped", "clock")
+
+    def __init__(self, seq, slot, frame, detection, captured_at, detected_at, dropped, clock):
+        self.seq = seq
+        self.slot = slot
+        self.frame = frame
+        self.detection = detection
+        self.captured_at = captured_at
+        self.detected_at = detected_at
+        self.dropped = dropped
+        self.clock = clock
+
+    @property
+    def age(self):
+        return self.clock.now() - self.captured_at
+
+    @property
+    def detect_latency(self):
+        return self.detected_at - self.captured_at
+
+
+class CaptureDetectPipeline:
+    """
+    backend   : capture backend (capture.py)
+    region    : (x, y, w, h) ที่จับทุกเฟรม (ต้องคงที่ตลอด เพราะ ring จองขนาดไว้แล้ว)
+    detect_fn : ฟังก์ชัน (FrameContext) -> ผลตรวจจับ (รันบน detect thread)
+    max_fps   : จำกัดความเร็ว capture thread (0 = ไม่จำกัด; จับเร็วเกิน detect จะแย่ง GIL เปล่าๆ)
+    clock     : แหล่งเวลาของ captured_at / detected_at / age (ต้องเป็น clock เดียวกับลูปที่เทียบเวลาคลิก)
+    """
+
+    def __init__(self, backend, region, detect_fn, ring_size=4, max_fps=0, clock=None):
+        self.backend = backend
+        self.clock = clock or SystemClock()
+        self.region = region
+        self.detect_fn = detect_fn
+        self.max_fps = max_fps
+        self.origin = (region[0], region[1]) if region else (0, 0)
+
+        first = backend.grab(region)
+        self.ring = FrameRing(ring_size, first.shape, first.dtype)
+        self.ring.write(first, self.clock.now())
+
+        self._stop = threading.Event()
+        self._error = None
+        self._result = None
+        self._result_cond = threading.Condition()
+        self._threads = []
+
+        # stats
+        self.captured = 0
+        self.detected = 0
+        self.dropped_frames = 0
+        self.dropped_results = 0
+
+    # ---------- threads ----------
+    def _guard(self, fn):
+        try:
+            fn()
+        except BaseException as e:
+            with self._result_cond:
+                if self._error is None:
+                    self._error = e
+                self._stop.set()
+                self._result_cond.notify_all()
+            self.ring.wake_all()
+
+    def _capture_loop(self):
+        min_dt = 1.0 / self.max_fps if self.max_fps else 0.0
+        try:
+            while not self._stop.is_set():
+                t0 = time.perf_counter()  # จำกัด fps ตามเวลาจริง (เป็นเรื่องของ CPU ไม่ใช่เวลาของเกม)
+                captured_at = self.clock.now()
+                img = self.backend.grab(self.region)
+                if self.ring.write(img, captured_at) is not None:
+                    self.captured += 1
+                if min_dt:
+                    left = min_dt - (time.perf_counter() - t0)
+                    if left > 0:
+                        time.sleep(left)
+        finally:
+            self.backend.close()  # ปิด handle ของ thread นี้ (mss)
+
+    def _detect_loop(self):
+        last_seq = 0
+        while not self._stop.is_set():
+            got = self.ring.acquire_latest(last_seq, timeout=0.1)
+            if got is None:
+                continue
+            slot, seq, captured_at = got
+            dropped = seq - last_seq - 1 if last_seq else 0
+            self.dropped_frames += dropped
+            last_seq = seq
+
+            frame = FrameContext(self.ring.buffers[slot], self.backend.channels, self.origin)
+            try:
+                detection = self.detect_fn(frame)
+            except Exception:
+                self.ring.release(slot)
+                raise
+            result = DetectionResult(seq, slot, frame, detection, captured_at,
+                                     self.clock.now(), dropped, self.clock)
+            self.detected += 1
+
+            with self._result_cond:
+                old = self._result
+                self._result = result
+                self._result_cond.notify_all()
+            if old is not None:
+                # handler ยังไม่ได้หยิบผลเก่า -> ทิ้ง (มีผลใหม่กว่าแล้ว)
+                self.dropped_results += 1
+                self.ring.release(old.slot)
+
+    # ---------- public ----------
+    def start(self):
+        for fn, name in ((self._capture_loop, "capture"), (self._detect_loop, "detect")):
+            t = threading.Thread(target=self._guard, args=(fn,), name=f"pipeline-{name}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def next_result(self, timeout=None):
+        """คืนผลใหม่สุดที่ยังไม่ถูกหยิบ (หรือ None ถ้าหมดเวลา) - ต้อง release() หลังใช้เสร็จ"""
+        with self._result_cond:
+            self._raise_error()
+            if not self._result_cond.wait_for(lambda: self._result is not None or self._error,
+                                              timeout=timeout):
+                return None
+            self._raise_error()
+            result = self._result
+            self._result = None
+            return result
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def release(self, result):
+        self.ring.release(result.slot)
+
+    def stop(self):
+        """หยุดทั้ง 2 thread (error ของ thread ที่ยังไม่ถูก raise ใน next_result() ถูก raise ที่นี่)"""
+        self._stop.set()
+        self.ring.wake_all()
+        for t in self._threads:
+            t.join(timeout=1.0)
+        self._threads = []
+        with self._result_cond:
+            self._raise_error()
+
+    def stats(self):
+        return {
+            "captured": self.captured,
+            "detected": self.detected,
+            "dropped_frames": self.dropped_frames,
+            "dropped_results": self.dropped_results,
+        }
+
+
+# =========================
+# BENCHMARK
+# =========================
+def _summary(name, results, ages, elapsed):
+    ages = sorted(ages)
+    return {
+        "mode": name,
+        "results": results,
+        "seconds": elapsed,
+        "results_per_sec": results / elapsed if elapsed else 0.0,
+        "age_ms_mean": 1000 * sum(ages) / len(ages) if ages else 0.0,
+        "age_ms_p95": 1000 * ages[int(0.95 * (len(ages) - 1))] if ages else 0.0,
+    }
+
+
+def bench_sequential(backend, region, detect_fn, duration=5.0, handle_fn=None):
+    """ลูปแบบเดิม: capture -> detect -> handle ต่อกันทีละขั้น"""
+    origin = (region[0], region[1]) if region else (0, 0)
+    ages = []
+    t_end = time.perf_counter() + duration
+    t_start = time.perf_counter()
+    while time.perf_counter() < t_end:
+        t0 = time.perf_counter()
+        frame = FrameContext(backend.grab(region), backend.channels, origin)
+        detection = detect_fn(frame)
+        ages.append(time.perf_counter() - t0)
+        if handle_fn:
+            handle_fn(detection)
+    return _summary("sequential", len(ages), ages, time.perf_counter() - t_start)
+
+
+def bench_pipelined(backend, region, detect_fn, duration=5.0, handle_fn=None, ring_size=4, max_fps=0):
+    """ลูปแบบ pipeline: handler ทำงานกับผลล่าสุดขณะที่ capture/detect ทำงานต่อไป"""
+    pipe = CaptureDetectPipeline(backend, region, detect_fn, ring_size=ring_size, max_fps=max_fps).start()
+    ages = []
+    t_end = time.perf_counter() + duration
+    t_start = time.perf_counter()
+    try:
+        while time.perf_counter() < t_end:
+            result = pipe.next_result(timeout=0.5)
+            if result is None:
+                continue
+            ages.append(result.age)
+            if handle_fn:
+                handle_fn(result.detection)
+            pipe.release(result)
+    finally:
+        pipe.stop()
+    summary = _summary("pipelined", len(ages), ages, time.perf_counter() - t_start)
+    summary.update(pipe.stats())
+    return summary
+
+
+def compare(backend, region, detect_fn, duration=5.0, handle_fn=None, ring_size=4, max_fps=0):
+    """รันทั้ง 2 แบบด้วย backend/detect_fn เดียวกัน แล้วคืน (sequential, pipelined)"""
+    seq = bench_sequential(backend, region, detect_fn, duration, handle_fn)
+    pipe = bench_pipelined(backend, region, detect_fn, duration, handle_fn, ring_size, max_fps)
+    return seq, pipe
@@ -0,0 +1,104 @@
+"""
+🚦 Pre-filter - ตัด template ที่ไม่มีบนจอทิ้งก่อน match เต็ม
+
+เดิม match_template ทำ TM_CCOEFF_NORMED เต็มความละเอียด 2 รอบ (raw + edge) ทุกครั้ง
+ทั้งที่เฟรมส่วนใหญ่ไม่มี template นั้นอยู่เลย (5 template แต่บนจอมีอย่างมากทีละ 1-2 ตัว)
+ตอนนี้เทียบ thumbnail ก่อน:
+- ภาพเฟรม/template ที่ชั้น pyramid `level` (ย่อ 2^level เท่าต่อด้าน) matchTemplate แบบ gray
+  ภาพเฟรมที่ย่อแล้ว cache ใน FrameContext ใช้ร่วมกันทุก template, ของ template อยู่ใน template cache
+  (region 396x250 ที่ level 2: ~1 ms เทียบกับ match เต็ม ~20 ms)
+- gray < threshold -> เทียบ edge ของ thumbnail ด้วย (match เต็มรับผลทาง edge ได้แม้ raw ไม่ผ่าน)
+  ต่ำทั้ง gray (< threshold) และ edge (< edge_threshold) เท่านั้นถึงตัดทิ้ง (match_template คืน None ทันที)
+- ค่าที่วัดจาก session ที่บันทึกด้วย --record บนเครื่องผู้พัฒนา (ไม่ได้อยู่ใน repo, ค่าเริ่มต้น 0.55 / 0.25 เว้นระยะจากทั้งสองฝั่ง):
+  gray: template ที่อยู่บนจอจริงได้ 0.80 ขึ้นไป ที่ไม่มีได้สูงสุด ~0.73
+  edge: ที่ match เต็มผ่านทาง edge (>= 0.35) ได้ 0.32 ขึ้นไป (edge ของภาพย่อมักสูงกว่าภาพเต็ม)
+- template/ภาพเล็กจนย่อไม่ได้ (effective_level = 0 เช่นหน้าต่างของ tracker ที่แคบ) -> ข้าม ไป match เต็มตามปกติ
+- audit: ทุกๆ audit_every ครั้งที่ตัดทิ้ง (แยกต่อ template) ยัง match เต็มอยู่ดี
+  ถ้า match เต็มเจอ = false reject (ตัดพลาด): เฟรมนั้นใช้ผล match เต็ม และ pre-filter เลิกตัดทิ้งทุก template
+  ตั้งแต่นั้น (threshold ใช้กับจอนี้ไม่ได้ ทุก check คืน PASS) -> stats()["tripped"] = template ที่ตัดพลาดครั้งแรก
+"""
+
+import threading
+import time
+
+from matching import effective_level, score
+from profiling import stage
+
+PASS = "pass"      # ผ่าน -> match เต็ม
+REJECT = "reject"  # ไม่มีบนจอ -> ไม่ต้อง match เต็ม
+AUDIT = "audit"    # ตัดทิ้ง แต่ match เต็มเพื่อตรวจ -> ส่งผลกลับด้วย audited()
+
+
+class PreFilter:
+    def __init__(self, level=2, threshold=0.55, edge_threshold=0.25, audit_every=20):
+        self.level = level
+        self.threshold = threshold
+        self.edge_threshold = edge_threshold  # None = ตัดด้วย gray อย่างเดียว
+        self.audit_every = audit_every
+        self.per = {}  # name -> {"checks", "skipped", "rejected", "audits", "false_rejects", "bypassed"}
+        self.total_us = 0.0
+        self.tripped = None  # ชื่อ template ที่ตัดพลาดครั้งแรก (ไม่ None = เลิกตัดทิ้งแล้ว)
+        self._lock = threading.Lock()  # pipeline / MatchPool เรียกได้จากหลาย thread
+
+    def _counters(self, name):
+        st = self.per.get(name)
+        if st is None:
+            st = self.per[name] = {"checks": 0, "skipped": 0, "rejected": 0, "audits": 0, "false_rejects": 0,
+                                   "bypassed": 0}
+        return st
+
+    def check(self, frame, tpl):
+        """frame: FrameContext, tpl: Template -> PASS / REJECT / AUDIT"""
+        if self.tripped is not None:
+            with self._lock:
+                self._counters(tpl.name)["bypassed"] += 1
+            return PASS
+        level = effective_level(frame.shape, tpl.shape, self.level)
+        if level == 0:
+            with self._lock:
+                self._counters(tpl.name)["skipped"] += 1
+            return PASS
+
+        t0 = time.perf_counter()
+        with stage("prefilter"):
+            reject = score(frame.pyramid(level), tpl.pyramid(level))[0] < self.threshold
+            if reject and self.edge_threshold is not None:
+                reject = score(frame.edge_pyramid(level), tpl.edge_pyramid(level))[0] < self.edge_threshold
+        us = (time.perf_counter() - t0) * 1e6
+
+        with self._lock:
+            self.total_us += us
+            st = self._counters(tpl.name)
+            st["checks"] += 1
+            if not reject:
+                return PASS
+            st["rejected"] += 1
+            if self.audit_every and st["rejected"] % self.audit_every == 0:
+                st["audits"] += 1
+                return AUDIT
+        return REJECT
+
+    def audited(self, name, found):
+        """ผลของ match เต็มหลัง check() คืน AUDIT (found = match เต็มเจอ = ตัดพลาด -> เลิกตัดทิ้ง)"""
+        if found:
+            with self._lock:
+                self._counters(name)["false_rejects"] += 1
+                if self.tripped is None:
+                    self.tripped = name
+
+    def stats(self):
+        """
+        รวมทุก template: checks / skipped / rejected / reject_rate / audits / false_rejects / bypassed / mean_us
+        + "tripped": template ที่ตัดพลาดครั้งแรก (None = ยังตัดทิ้งอยู่) + "templates": {name: ตัวนับของ template นั้น}
+        """
+        with self._lock:
+            per = {name: dict(st) for name, st in self.per.items()}
+            total_us = self.total_us
+            tripped = self.tripped
+        out = {k: sum(st[k] for st in per.values())
+               for k in ("checks", "skipped", "rejected", "audits", "false_rejects", "bypassed")}
+        out["tripped"] = tripped
+        out["reject_rate"] = out["rejected"] / out["checks"] if out["checks"] else 0.0
+        out["mean_us"] = total_us / out["checks"] if out["checks"] else 0.0
+        out["templates"] = per
+        return out
@@ -0,0 +1,167 @@
+"""
+🔬 Profiling - จับเวลาแต่ละขั้นของ hot path (--profile) + sampling profiler (--profile=sample)
+
+stage(name) ครอบโค้ดแต่ละขั้น: capture / gray / blur / canny / pyrDown / prefilter / matchTemplate / detect / input / log / sleep
+- ปิดอยู่ (ค่าเริ่มต้น): stage() คืน context เปล่าตัวเดียวกันทุกครั้ง (ไม่จับเวลา ไม่จองหน่วยความจำ)
+- เปิด: จับเวลาด้วย perf_counter, stage ซ้อนกันได้ (stack แยกต่อ thread)
+  เก็บทั้งเวลารวมต่อ stage และ self time ต่อ path (เช่น MainThread;detect;matchTemplate)
+
+SamplingProfiler: thread ที่อ่าน stack ของทุก thread ทุก interval วินาที (sys._current_frames)
+
+ไฟล์ผลลัพธ์เป็นรูปแบบ "folded stacks" (1 บรรทัด = path;ที่;คั่น;ด้วย;semicolon จำนวน)
+เปิดด้วย flamegraph.pl, speedscope (https://www.speedscope.app) หรือ inferno ได้เลย
+  <prefix>_stages.folded  = self time ของ stage (หน่วย µs)
+  <prefix>_samples.folded = จำนวน sample ต่อ stack ของฟังก์ชัน Python
+"""
+
+import contextlib
+import os
+import sys
+import threading
+import time
+
+enabled = False
+started_at = 0.0
+totals = {}   # stage -> วินาทีรวม (รวมเวลาของ stage ที่ซ้อนอยู่ข้างใน)
+counts = {}   # stage -> จำนวนครั้ง
+folded = {}   # "thread;stage;stage" -> self time (วินาที)
+
+_NULL = contextlib.nullcontext()
+_lock = threading.Lock()
+_local = threading.local()
+
+
+class _Stage:
+    __slots__ = ("name", "t0", "child")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        self.child = 0.0
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc):
+        dt = time.perf_counter() - self.t0
+        stack = _local.stack
+        path = threading.current_thread().name + ";" + ";".join(s.name for s in stack)
+        stack.pop()
+        if stack:
+            stack[-1].child += dt
+        with _lock:
+            totals[self.name] = totals.get(self.name, 0.0) + dt
+            counts[self.name] = counts.get(self.name, 0) + 1
+            folded[path] = folded.get(path, 0.0) + dt - self.child
+
+
+def stage(name):
+    """with stage("canny"): ... (ปิด profiling = ไม่ทำอะไร)"""
+    if not enabled:
+        return _NULL
+    return _Stage(name)
+
+
+def enable():
+    global enabled, started_at
+    totals.clear()
+    counts.clear()
+    folded.clear()
+    started_at = time.perf_counter()
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+    return time.perf_counter() - started_at
+
+
+class TimedClock:
+    """ห่อ clock: เวลาที่ sleep นับเป็น stage "sleep" (ดูว่าลูปรอเปล่ากี่ %)"""
+
+    def __init__(self, clock):
+        self.clock = clock
+
+    def now(self):
+        return self.clock.now()
+
+    def sleep(self, seconds):
+        with stage("sleep"):
+            self.clock.sleep(seconds)
+
+    def __getattr__(self, name):
+        return getattr(self.clock, name)
+
+
+class TimedStream:
+    """ห่อ sys.stdout: เวลาเขียน log/print นับเป็น stage "log" """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, s):
+        with stage("log"):
+            return self.stream.write(s)
+
+    def flush(self):
+        with stage("log"):
+            return self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class SamplingProfiler:
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = {}
+        self.count = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                key = ";".join(reversed(stack))
+                self.samples[key] = self.samples.get(key, 0) + 1
+                self.count += 1
+
+
+def write_folded(path, stacks, scale=1):
+    with open(path, "w", encoding="utf-8") as f:
+        for key, value in sorted(stacks.items()):
+            n = int(round(value * scale))
+            if n > 0:
+                f.write(f"{key} {n}\n")
+
+
+def format_table(wall):
+    """ตารางเวลาต่อ stage เรียงจากมากไปน้อย (% เทียบกับเวลาทั้งหมดที่ profile)"""
+    lines = [f"{'stage':<15} {'calls':>8} {'total ms':>10} {'mean ms':>9} {'% wall':>7}"]
+    for name, total in sorted(totals.items(), key=lambda kv: -kv[1]):
+        n = counts[name]
+        lines.append(f"{name:<15} {n:>8} {1000 * total:>10.1f} {1000 * total / n:>9.3f} "
+                     f"{100 * total / wall if wall else 0:>6.1f}%")
+    return lines
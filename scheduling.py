@@ -0,0 +1,57 @@
+"""
+🗓️ Template Scheduler - เลือกว่าเฟรมนี้ต้องค้น state ไหนบ้าง ตาม state ล่าสุดของเกม
+
+next_states: {state ล่าสุด: state ที่น่าจะเจอถัดไป} (ไม่มีใน dict = ค้นครบทุก state)
+- ปกติค้นเฉพาะ state ที่น่าจะเป็นถัดไป (ลำดับความสำคัญยังเหมือนเดิม)
+- ค้นครบทุก state (full sweep) ทุกๆ sweep_every เฟรม
+  และทุกเฟรมเมื่อไม่เจอ state ที่คาดไว้นานเกิน timeout วินาที
+"""
+
+import threading
+
+
+class TemplateScheduler:
+    def __init__(self, next_states, all_states, sweep_every=10, timeout=5.0):
+        self.next_states = next_states
+        self.all_states = tuple(all_states)
+        self.sweep_every = sweep_every
+        self.timeout = timeout
+        self.phase = None         # state ล่าสุดที่เจอ (None = ยังไม่รู้)
+        self.last_hit_at = None   # เวลาที่เจอ state ล่าสุด
+        self.frames = 0
+        self.per_phase = {}       # phase -> {"frames", "sweeps", "skipped"}
+        self._lock = threading.Lock()  # pipeline: plan() บน detect thread, observe() บนเธรดหลัก
+
+    def _phase_stats(self):
+        key = self.phase.name if hasattr(self.phase, "name") else str(self.phase)
+        st = self.per_phase.get(key)
+        if st is None:
+            st = self.per_phase[key] = {"frames": 0, "sweeps": 0, "skipped": 0}
+        return st
+
+    def plan(self, now):
+        """คืน set ของ state ที่ต้องค้นในเฟรมนี้ (None = ค้นครบทุก state)"""
+        with self._lock:
+            self.frames += 1
+            st = self._phase_stats()
+            st["frames"] += 1
+            focus = self.next_states.get(self.phase)
+            timed_out = self.last_hit_at is not None and now - self.last_hit_at > self.timeout
+            if focus is None or timed_out or (self.sweep_every and self.frames % self.sweep_every == 0):
+                st["sweeps"] += 1
+                return None
+            st["skipped"] += sum(1 for s in self.all_states if s not in focus)
+            return focus
+
+    def observe(self, state, now):
+        """แจ้ง state ที่ตัดสินได้ในเฟรมนี้ (None = ไม่เจออะไร ไม่เปลี่ยน phase)"""
+        with self._lock:
+            if state is not None:
+                self.phase = state
+                self.last_hit_at = now
+            elif self.last_hit_at is None:
+                self.last_hit_at = now
+
+    def stats(self):
+        with self._lock:
+            return {k: dict(v) for k, v in self.per_phase.items()}
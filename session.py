@@ -0,0 +1,232 @@
+"""
+🎞️ Session Record / Replay
+
+ไฟล์ session (.cbrec) = ไฟล์เดียวต่อ 1 รอบการรัน:
+  MAGIC แล้วตามด้วย record ต่อกันไปเรื่อยๆ
+  record = header "<cII" (kind, json_len, blob_len) + JSON (utf-8) + blob
+    kind b"M" = meta ของ session (region, settings)
+    kind b"F" = เฟรมที่ capture ได้ (JSON: t, origin, channels | blob: PNG)
+    kind b"A" = action ที่บอททำ (JSON: t, action, x, y, double)
+    kind b"S" = state ที่ตรวจได้ในแต่ละรอบ (JSON: i, t, state, x, y, score)
+
+ใช้งาน:
+  - RecordingBackend / RecordingInput ห่อ backend และ input sink เดิม แล้วเขียนทุกอย่างลงไฟล์
+  - ReplayBackend ป้อนเฟรมที่บันทึกไว้ตามลำดับ (ไม่ต้องมีจอ) + VirtualClock
+"""
+
+import json
+import struct
+from pathlib import Path
+
+from startup import lazy_import
+from capture import CaptureBackend
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+MAGIC = b"CBREC1\n"
+_HEADER = struct.Struct("<cII")
+
+KIND_META = b"M"
+KIND_FRAME = b"F"
+KIND_ACTION = b"A"
+KIND_STATE = b"S"
+
+_TO_BGR = {  # ชื่อค่าคงที่ใน cv2 (ไม่แตะ cv2 ตอน import - ดู startup.py)
+    "RGB": "COLOR_RGB2BGR",
+    "BGRA": "COLOR_BGRA2BGR",
+    "RGBA": "COLOR_RGBA2BGR",
+}
+
+
+class ReplayFinished(Exception):
+    """เฟรมใน session หมดแล้ว"""
+
+
+# =========================
+# WRITER / READER
+# =========================
+class SessionWriter:
+    def __init__(self, path, clock, meta=None):
+        self.path = Path(path)
+        self.clock = clock
+        self.t0 = clock.now()
+        self._f = open(self.path, "wb")
+        self._f.write(MAGIC)
+        self.frames = 0
+        self.actions = 0
+        self._write(KIND_META, meta or {})
+
+    def _write(self, kind, info, blob=b""):
+        js = json.dumps(info, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self._f.write(_HEADER.pack(kind, len(js), len(blob)))
+        self._f.write(js)
+        self._f.write(blob)
+
+    def elapsed(self):
+        return round(self.clock.now() - self.t0, 6)
+
+    def write_frame(self, image, channels, origin):
+        """เก็บเฟรมเป็น PNG (lossless) - ภาพสีเก็บเป็น BGR, gray เก็บเป็น gray"""
+        if image.ndim == 3 and channels != "BGR":
+            image = cv2.cvtColor(image, getattr(cv2, _TO_BGR[channels]))
+        ok, png = cv2.imencode(".png", image)
+        if not ok:
+            raise RuntimeError("PNG encode failed")
+        info = {"t": self.elapsed(), "origin": [int(origin[0]), int(origin[1])],
+                "channels": "BGR" if image.ndim == 3 else "GRAY"}
+        self._write(KIND_FRAME, info, png.tobytes())
+        self.frames += 1
+
+    def write_action(self, action, x, y, double=False):
+        self._write(KIND_ACTION, {"t": self.elapsed(), "action": action,
+                                  "x": int(x), "y": int(y), "double": bool(double)})
+        self.actions += 1
+
+    def write_state(self, i, state, x, y, score):
+        self._write(KIND_STATE, {"i": i, "t": self.elapsed(), "state": state.value if state else None,
+                                 "x": int(x), "y": int(y), "score": round(float(score), 4)})
+
+    def close(self):
+        if not self._f.closed:
+            self._f.close()
+
+
+def read_session(path):
+    """
+    อ่านไฟล์ session ทั้งไฟล์
+    Returns: (meta, records) โดย records = list ของ (kind, info, blob)
+    """
+    data = Path(path).read_bytes()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"ไม่ใช่ไฟล์ session: {path}")
+    pos = len(MAGIC)
+    meta = {}
+    records = []
+    while pos < len(data):
+        kind, js_len, blob_len = _HEADER.unpack_from(data, pos)
+        pos += _HEADER.size
+        info = json.loads(data[pos:pos + js_len].decode("utf-8"))
+        pos += js_len
+        blob = data[pos:pos + blob_len]
+        pos += blob_len
+        if kind == KIND_META:
+            meta = info
+        else:
+            records.append((kind, info, blob))
+    return meta, records
+
+
+def decode_frame(info, blob):
+    flag = cv2.IMREAD_GRAYSCALE if info["channels"] == "GRAY" else cv2.IMREAD_COLOR
+    return cv2.imdecode(np.frombuffer(blob, dtype=np.uint8), flag)
+
+
+# =========================
+# RECORDING WRAPPERS
+# =========================
+class RecordingBackend(CaptureBackend):
+    """ห่อ capture backend เดิม: ส่งภาพต่อให้บอทตามปกติ + เขียนทุกเฟรมลง session"""
+
+    def __init__(self, backend, writer):
+        self.backend = backend
+        self.writer = writer
+        self.name = f"{backend.name}+record"
+        self.channels = backend.channels
+
+    def grab(self, region=None):
+        img = self.backend.grab(region)
+        origin = (region[0], region[1]) if region else (0, 0)
+        self.writer.write_frame(img, self.channels, origin)
+        return img
+
+    def close(self):
+        self.backend.close()
+
+
+class RecordingInput:
+    """ห่อ input sink เดิม: คลิกจริง + เขียน action ลง session"""
+
+    def __init__(self, inputs, writer):
+        self.inputs = inputs
+        self.writer = writer
+        self.name = f"{inputs.name}+record"
+
+    def move(self, x, y):
+        self.inputs.move(x, y)
+
+    def click(self, x, y, double=False):
+        sent = self.inputs.click(x, y, double)
+        self.writer.write_action("click", x, y, double)
+        return sent
+
+    def flush(self, timeout=None):
+        flush = getattr(self.inputs, "flush", None)
+        return flush(timeout) if flush else True
+
+    def pixel(self, x, y):
+        return self.inputs.pixel(x, y)
+
+
+# =========================
+# REPLAY
+# =========================
+class ReplayBackend(CaptureBackend):
+    """
+    ป้อนเฟรมจาก session ตามลำดับที่บันทึก (1 grab = 1 เฟรม)
+    - region ที่ขอจะถูก crop จากเฟรมตามพิกัดจอ ส่วนที่อยู่นอกเฟรมเติมด้วย 0
+    - ถ้ามี clock (VirtualClock) จะเลื่อนเวลาไปที่ timestamp ของเฟรม
+    - เฟรมหมด -> raise ReplayFinished
+    """
+    name = "replay"
+    channels = "BGR"
+
+    def __init__(self, path, clock=None):
+        self.meta, records = read_session(path)
+        self.frames = [(info, blob) for kind, info, blob in records if kind == KIND_FRAME]
+        self.recorded_states = [info for kind, info, _ in records if kind == KIND_STATE]
+        self.recorded_actions = [info for kind, info, _ in records if kind == KIND_ACTION]
+        self.clock = clock
+        self.index = 0
+        self.last = None  # (image, origin) ของเฟรมล่าสุด ใช้ตอบ pixel()
+
+    def grab(self, region=None):
+        if self.index >= len(self.frames):
+            raise ReplayFinished()
+        info, blob = self.frames[self.index]
+        self.index += 1
+        img = decode_frame(info, blob)
+        origin = tuple(info["origin"])
+        self.last = (img, origin)
+        if self.clock is not None:
+            self.clock.advance_to(info["t"])
+        if not region:
+            return img
+        return self._crop(img, origin, region)
+
+    @staticmethod
+    def _crop(img, origin, region):
+        x, y, w, h = region
+        ox, oy = origin
+        ih, iw = img.shape[:2]
+        x0, y0 = x - ox, y - oy
+        if x0 >= 0 and y0 >= 0 and x0 + w <= iw and y0 + h <= ih:
+            return img[y0:y0 + h, x0:x0 + w]
+        out = np.zeros((h, w) + img.shape[2:], dtype=img.dtype)
+        sx0, sy0 = max(0, x0), max(0, y0)
+        sx1, sy1 = min(iw, x0 + w), min(ih, y0 + h)
+        if sx1 > sx0 and sy1 > sy0:
+            out[sy0 - y0:sy1 - y0, sx0 - x0:sx1 - x0] = img[sy0:sy1, sx0:sx1]
+        return out
+
+    def pixel(self, x, y):
+        if self.last is None:
+            return (0, 0, 0)
+        img, (ox, oy) = self.last
+        px, py = x - ox, y - oy
+        if not (0 <= py < img.shape[0] and 0 <= px < img.shape[1]):
+            return (0, 0, 0)
+        c = img[py, px]
+        if img.ndim == 2:
+            return (int(c), int(c), int(c))
+        return (int(c[2]), int(c[1]), int(c[0]))
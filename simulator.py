@@ -0,0 +1,361 @@
+"""
+🎮 Game Simulator - เกมจำลองแบบ headless วัดบอททั้งลูป (จาน/ชม., reaction latency) โดยไม่ต้องเปิดเกม
+
+GameSimulator เป็นทั้ง capture backend (grab) และ input sink (click / move / pixel)
+ต่อเข้า run_session() / bot_loop() แทนจอและเมาส์จริงได้เลย
+วาด template จริง (synthetic.py) ลงภาพ 1920x1080 ตาม flow ของเกม:
+  select_menu -> (คลิกเมนู + คลิกพิเศษ) -> ปุ่ม cancook -> (กดปุ่ม) -> ตะหลิวทีละตำแหน่ง (คลิกโดนครบแล้วย้าย)
+  -> cookingdone -> (คลิกเก็บ) -> select_menu ... ครบ dishes จานแล้วปุ่มเป็น cannotcook (บอทหยุดเอง)
+ช่วงรอทุกช่วงใช้ clock ตัวเดียวกับบอท:
+  virtual = VirtualClock ผลเหมือนเดิมทุกครั้ง (ไม่นับเวลาตรวจจับ)
+  fast    = FastClock นับเวลาตรวจจับจริงแต่ไม่รอ sleep (ค่าเริ่มต้น ใกล้เกมจริงที่สุดโดยไม่ต้องรอ)
+  real    = SystemClock รอจริงทุกอย่าง
+
+reaction latency = เวลาจากเป้าหมายโผล่บนจอ จนคลิกแรกที่โดน แยกตามชนิด (menu / extra / cancook / spatula / done)
+extra = คลิกพิเศษหลังเลือกเมนู (นับจากคลิกเมนู)
+
+Usage:
+  python simulator.py                           # 5 จาน แสดงสรุป
+  python simulator.py --dishes 20 --noise 20 --json out.json
+  python simulator.py --save-baseline sim_base.json
+  python simulator.py --baseline sim_base.json  # จาน/ชม. ลดลง หรือ latency p90 เพิ่มเกิน tolerance = exit 1
+  python simulator.py --clock virtual --record sim.cbrec && python cooking_bot.py --replay sim.cbrec
+ทดสอบอัตโนมัติ (เกมจำลอง + บันทึกแล้ว replay): python -m pytest tests
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import threading
+import time
+from pathlib import Path
+
+from startup import lazy_import
+
+from capture import CaptureBackend
+from clock import FastClock, SystemClock, VirtualClock
+import synthetic
+from telemetry import percentile
+
+np = lazy_import("numpy")
+
+DEFAULT_TIMINGS = {
+    "menu_delay": 0.6,         # เก็บอาหารแล้ว -> หน้าเลือกเมนูโผล่ (วินาที)
+    "button_delay": 0.4,       # คลิกพิเศษแล้ว -> ปุ่มเริ่มทำอาหารโผล่
+    "qte_delay": 0.5,          # กดปุ่มแล้ว -> ตะหลิวตัวแรกโผล่
+    "spatula_gap": 0.2,        # ตะหลิวหายไปก่อนโผล่ตำแหน่งใหม่
+    "done_delay": 0.8,         # ตะหลิวตัวสุดท้าย -> cookingdone โผล่
+    "spatulas": 5,             # จำนวนตำแหน่งตะหลิวต่อจาน
+    "clicks_per_spatula": 4,   # คลิกโดนกี่ครั้งตะหลิวถึงย้าย
+    "click_time": 0.0,         # เวลาจริงที่เมาส์ใช้ต่อคลิก (pyautogui double click ~0.08) ใช้คู่กับ --clock real
+}
+
+DEFAULT_TOLERANCE = 0.25  # จาน/ชม. ลดลง / latency p90 เพิ่มขึ้นเกิน 25% จาก baseline = fail
+
+
+class GameSimulator(CaptureBackend):
+    name = "sim"
+    channels = "BGR"
+
+    def __init__(self, clock, templates, region, button_pos, extra_click, dishes=5, timings=None,
+                 noise=12, seed=0, extra_tolerance=20):
+        """
+        templates: {"menu", "spatula", "done", "cancook", "cannotcook"} -> path ของ PNG
+        region: (x, y, w, h) ที่ select_menu / ตะหลิว / cookingdone โผล่ (สุ่มตำแหน่งภายใน)
+        button_pos: มุมซ้ายบนของปุ่มเริ่มทำอาหาร, extra_click: จุดคลิกพิเศษหลังเลือกเมนู
+        """
+        self.clock = clock
+        self.images = {kind: synthetic.load_color(path) for kind, path in templates.items()}
+        self.region = region
+        self.button_pos = button_pos
+        self.extra_click = extra_click
+        self.extra_tolerance = extra_tolerance
+        self.dishes_target = dishes
+        self.timings = dict(DEFAULT_TIMINGS, **(timings or {}))
+        self.noise = noise
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.background = synthetic.background(seed=seed, noise=noise)
+        self.screen = self.background
+
+        self.dishes = 0
+        self.target = None      # (kind, x, y, w, h) ที่คลิกได้ตอนนี้
+        self.shown_at = 0.0
+        self.target_hits = 0
+        self.spatulas_left = 0
+        self.version = 0
+        self.frames = 0
+        self.clicks = 0
+        self.misses = 0
+        self.latency = {}       # kind -> [วินาที]
+        self.finished_at = None
+        self._pending = None    # (เวลา, ฟังก์ชัน) เหตุการณ์ถัดไปของเกม
+        self._lock = threading.RLock()
+        self.started_at = clock.now()
+        self._show("menu", self._random_pos("menu"))
+
+    # --- เกม ---
+    def _random_pos(self, kind):
+        h, w = self.images[kind].shape[:2]
+        rx, ry, rw, rh = self.region
+        return (rx + int(self.rng.integers(0, max(1, rw - w + 1))),
+                ry + int(self.rng.integers(0, max(1, rh - h + 1))))
+
+    def _render(self, kind=None, pos=None):
+        self.version += 1
+        if kind is None:
+            self.screen = self.background
+        else:
+            # ภาพใหม่ทุกครั้ง (ไม่แก้ภาพเดิม) -> view ที่ grab() คืนไปก่อนหน้ายังใช้ได้
+            self.screen = synthetic.paste(self.background.copy(), self.images[kind], pos[0], pos[1],
+                                          noise=self.noise // 2, seed=self.seed + self.version)
+
+    def _show(self, kind, pos):
+        h, w = self.images[kind].shape[:2]
+        self._render(kind, pos)
+        self.target = (kind, pos[0], pos[1], w, h)
+        self.shown_at = self.clock.now()
+        self.target_hits = 0
+        if kind == "cannotcook":
+            self.finished_at = self.shown_at
+
+    def _hide(self, delay, then):
+        self._render()
+        self.target = None
+        self._pending = (self.clock.now() + delay, then)
+
+    def _update(self):
+        if self._pending is not None and self.clock.now() >= self._pending[0]:
+            _, then = self._pending
+            self._pending = None
+            then()
+
+    def _show_button(self):
+        self._show("cancook" if self.dishes < self.dishes_target else "cannotcook", self.button_pos)
+
+    def _next_spatula(self):
+        self._show("spatula", self._random_pos("spatula"))
+
+    def _on_hit(self, kind):
+        t = self.timings
+        if kind == "menu":
+            # เมนูยังค้างบนจอ แต่รอคลิกพิเศษก่อน (คลิกเมนูซ้ำ = ไม่มีผล)
+            ex, ey = self.extra_click
+            r = self.extra_tolerance
+            self.target = ("extra", ex - r, ey - r, 2 * r + 1, 2 * r + 1)
+            self.shown_at = self.clock.now()
+            self.target_hits = 0
+        elif kind == "extra":
+            self._hide(t["button_delay"], self._show_button)
+        elif kind == "cancook":
+            self.spatulas_left = t["spatulas"]
+            self._hide(t["qte_delay"], self._next_spatula)
+        elif kind == "spatula":
+            if self.target_hits >= t["clicks_per_spatula"]:
+                self.spatulas_left -= 1
+                if self.spatulas_left > 0:
+                    self._hide(t["spatula_gap"], self._next_spatula)
+                else:
+                    self._hide(t["done_delay"], lambda: self._show("done", self._random_pos("done")))
+        elif kind == "done":
+            self.dishes += 1
+            self._hide(t["menu_delay"], lambda: self._show("menu", self._random_pos("menu")))
+
+    # --- capture backend ---
+    def grab(self, region=None):
+        with self._lock:
+            self._update()
+            self.frames += 1
+            img = self.screen
+        if region:
+            x, y, w, h = region
+            return img[y:y + h, x:x + w]
+        return img
+
+    # --- input sink ---
+    def move(self, x, y):
+        pass
+
+    def click(self, x, y, double=False):
+        if self.timings["click_time"]:
+            time.sleep(self.timings["click_time"])  # เมาส์จริงบล็อกผู้เรียก (บอท หรือ worker ของ InputDispatcher)
+        with self._lock:
+            self._update()
+            self.clicks += 1
+            target = self.target
+            if target is None or target[0] == "cannotcook":
+                self.misses += 1
+                return
+            kind, tx, ty, w, h = target
+            if not (tx <= x < tx + w and ty <= y < ty + h):
+                self.misses += 1
+                return
+            if self.target_hits == 0:
+                self.latency.setdefault(kind, []).append(self.clock.now() - self.shown_at)
+            self.target_hits += 1
+            self._on_hit(kind)
+
+    def pixel(self, x, y):
+        with self._lock:
+            self._update()
+            b, g, r = self.screen[y, x][:3]
+        return (int(r), int(g), int(b))
+
+    def report(self):
+        end = self.finished_at if self.finished_at is not None else self.clock.now()
+        duration = end - self.started_at
+        latency = {}
+        for kind, values in self.latency.items():
+            values = sorted(values)
+            latency[kind] = {"n": len(values), "p50_ms": 1000 * percentile(values, 0.50),
+                             "p90_ms": 1000 * percentile(values, 0.90), "max_ms": 1000 * values[-1]}
+        return {
+            "finished": self.finished_at is not None and self.dishes == self.dishes_target,
+            "dishes": self.dishes,
+            "duration": duration,
+            "dishes_per_hour": self.dishes * 3600 / duration if duration > 0 else 0.0,
+            "frames": self.frames,
+            "clicks": self.clicks,
+            "misses": self.misses,
+            "latency": latency,
+        }
+
+
+# =========================
+# CLI
+# =========================
+def run(dishes=5, seed=0, noise=12, clock_name="fast", timings=None, timeout=None, telemetry_path=None,
+        verbose=False, metrics_target=None, record_path=None):
+    """
+    เล่นเกมจำลองจนบอทหยุดเอง (cannotcook) หรือครบ timeout วินาที (เวลาของ clock) คืน report
+    record_path: บันทึก session (.cbrec) ไว้ replay ด้วย cooking_bot.py --replay
+    """
+    import cooking_bot as bot
+
+    bot.import_runtime()
+    with contextlib.redirect_stdout(sys.stdout if verbose else io.StringIO()):
+        templates = bot.load_all_templates()
+    if templates is None:
+        raise FileNotFoundError(bot.TEMPLATE_SPATULA)
+    region = bot.load_region() or (707, 370, 396, 250)
+    clock = {"fast": FastClock, "virtual": VirtualClock, "real": SystemClock}[clock_name]()
+    sim = GameSimulator(clock, {"menu": bot.TEMPLATE_MENU, "spatula": bot.TEMPLATE_SPATULA,
+                                "done": bot.TEMPLATE_DONE, "cancook": bot.TEMPLATE_CANCOOK,
+                                "cannotcook": bot.TEMPLATE_CANNOTCOOK},
+                        region, (bot.BTN_START_X1 + 5, bot.BTN_START_Y1 + 5), bot.MENU_EXTRA_CLICK,
+                        dishes=dishes, timings=timings, noise=noise, seed=seed)
+    timeout = timeout or 60.0 * (dishes + 1)
+
+    def stop_fn():
+        return clock.now() - sim.started_at > timeout
+
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stdout if verbose else io.StringIO()):
+        stats = bot.run_session(templates, region, sim, sim, clock, record_path=record_path,
+                                telemetry_path=telemetry_path, stop_fn=stop_fn, metrics_target=metrics_target)
+    wall = time.perf_counter() - t0
+
+    meta = {"python": platform.python_version(), "clock": clock_name, "dishes": dishes, "seed": seed,
+            "noise": noise, "timings": sim.timings, "region": list(region), "wall": wall,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S")}
+    bot_stats = {k: stats.get(k) for k in ("click_count", "done_count", "iterations", "prefilter", "input")}
+    return {"meta": meta, "results": sim.report(), "bot": bot_stats}
+
+
+def print_report(report):
+    r = report["results"]
+    m = report["meta"]
+    print(f"\n🎮 Simulator ({m['clock']} clock, seed={m['seed']}, noise={m['noise']}) "
+          f"ใช้เวลาจริง {m['wall']:.1f} วิ")
+    print(f"   จาน: {r['dishes']}/{m['dishes']} | เวลาเกม {r['duration']:.1f} วิ | {r['dishes_per_hour']:.1f} จาน/ชม.")
+    print(f"   เฟรม: {r['frames']} | คลิก: {r['clicks']} (ไม่โดนอะไร {r['misses']}) | "
+          f"รอบของบอท: {report['bot']['iterations']}")
+    print(f"   Reaction latency (ms)  {'n':>5} {'p50':>8} {'p90':>8} {'max':>8}")
+    for kind, st in r["latency"].items():
+        print(f"   {kind:<22} {st['n']:>5} {st['p50_ms']:>8.1f} {st['p90_ms']:>8.1f} {st['max_ms']:>8.1f}")
+    pf = report["bot"].get("prefilter")
+    if pf and pf["checks"]:
+        print(f"   Pre-filter: ตัดทิ้ง {pf['rejected']}/{pf['checks']} ({100 * pf['reject_rate']:.0f}%) | "
+              f"audit {pf['audits']} -> ตัดพลาด {pf['false_rejects']}"
+              + (f" (เลิกตัดทิ้งหลัง {pf['tripped']})" if pf["tripped"] else ""))
+
+
+def compare_baseline(current, baseline, tolerance):
+    """คืน list ของ (name, base, now, ratio, failed): จาน/ชม. ต้องไม่ลด, latency p90 ต้องไม่เพิ่ม เกิน tolerance"""
+    cur, base = current["results"], baseline["results"]
+    rows = []
+    ratio = cur["dishes_per_hour"] / base["dishes_per_hour"] if base["dishes_per_hour"] else 1.0
+    rows.append(("dishes_per_hour", base["dishes_per_hour"], cur["dishes_per_hour"], ratio, ratio < 1.0 - tolerance))
+    for kind, st in base["latency"].items():
+        now = cur["latency"].get(kind)
+        if now is None or not st["p90_ms"]:
+            continue
+        ratio = now["p90_ms"] / st["p90_ms"]
+        rows.append((f"latency.{kind}.p90_ms", st["p90_ms"], now["p90_ms"], ratio, ratio > 1.0 + tolerance))
+    return rows
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="เล่น cooking_bot กับเกมจำลอง (ไม่ต้องมีจอ/เกม)")
+    ap.add_argument("--dishes", type=int, default=5, help="จำนวนจานก่อนวัตถุดิบหมด")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--noise", type=int, default=12, help="sigma ของ noise บนภาพ")
+    ap.add_argument("--clock", default="fast", choices=["fast", "virtual", "real"])
+    ap.add_argument("--timing", action="append", default=[], metavar="NAME=SEC",
+                    help=f"แก้ช่วงเวลาของเกม เช่น --timing qte_delay=1.0 ({', '.join(DEFAULT_TIMINGS)})")
+    ap.add_argument("--timeout", type=float, default=None, help="หยุดเมื่อเวลาเกมเกินนี้ (วินาที)")
+    ap.add_argument("--telemetry", type=Path, help="บันทึก telemetry ของบอท (.cbtel)")
+    ap.add_argument("--record", type=Path, help="บันทึก session ของบอท (.cbrec) ไว้ replay")
+    ap.add_argument("--metrics", help="live metrics ของบอท: port หรือไฟล์ .prom (metrics.py)")
+    ap.add_argument("--verbose", action="store_true", help="แสดงข้อความของบอท")
+    ap.add_argument("--json", type=Path, help="เขียนผลเป็น JSON")
+    ap.add_argument("--save-baseline", type=Path, help="บันทึกผลนี้เป็น baseline")
+    ap.add_argument("--baseline", type=Path, help="เทียบกับ baseline ที่บันทึกไว้")
+    ap.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                    help="สัดส่วนที่ยอมให้แย่ลงได้ (0.25 = 25%%)")
+    args = ap.parse_args(argv)
+
+    timings = {}
+    for item in args.timing:
+        name, _, value = item.partition("=")
+        if name not in DEFAULT_TIMINGS:
+            ap.error(f"ไม่รู้จัก timing: {name}")
+        timings[name] = type(DEFAULT_TIMINGS[name])(float(value))
+
+    report = run(args.dishes, args.seed, args.noise, args.clock, timings, args.timeout, args.telemetry,
+                 args.verbose, args.metrics, args.record)
+    print_report(report)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.json:
+        args.json.write_text(text, encoding="utf-8")
+        print(f"\n📝 JSON -> {args.json}")
+    if args.save_baseline:
+        args.save_baseline.write_text(text, encoding="utf-8")
+        print(f"📌 baseline -> {args.save_baseline}")
+
+    status = 0
+    if not report["results"]["finished"]:
+        print(f"\n❌ บอททำไม่ครบ {args.dishes} จาน หรือไม่หยุดที่ cannotcook")
+        status = 1
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        rows = compare_baseline(report, baseline, args.tolerance)
+        failed = [r for r in rows if r[4]]
+        print(f"\n📊 เทียบ baseline ({args.baseline}, tolerance={args.tolerance:.0%})")
+        for name, base, now, ratio, bad in rows:
+            mark = "❌" if bad else "✅"
+            print(f"   {mark} {name:<28} {base:9.1f} -> {now:9.1f}  (x{ratio:.2f})")
+        if failed:
+            print(f"\n❌ แย่ลงเกินกำหนด {len(failed)} รายการ")
+            status = 1
+        else:
+            print("\n✅ ไม่มีรายการไหนแย่ลงเกินกำหนด")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
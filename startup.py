@@ -0,0 +1,83 @@
+"""
+🚀 Startup - lazy import + จับเวลาช่วงเปิดโปรแกรม + warm-up OpenCV
+
+lazy_import("cv2") ใส่โมดูลแบบ lazy ไว้ใน sys.modules (importlib.util.LazyLoader)
+โหลดจริงตอนใช้ attribute แรก -> คำสั่งที่ไม่แตะภาพ (เช่น --help) ไม่ต้องรอโหลด cv2 / numpy เลย
+ข้อจำกัด:
+- ทุกโมดูลที่บอท import ต้องใช้ `cv2 = lazy_import("cv2")` แทน `import cv2`
+  (คำสั่ง import ปกติจะเช็ค __spec__ ของโมดูลใน sys.modules = โหลดจริงทันที)
+- ห้ามใช้ cv2.xxx / np.xxx ระดับโมดูล (เช่นค่า default ของ argument)
+"""
+
+import importlib.util
+import sys
+import time
+from contextlib import contextmanager
+
+T0 = time.perf_counter()  # เวลาที่เริ่ม import (โมดูลนี้ถูก import เป็นอันดับแรกๆ)
+timings = {}              # ชื่อขั้นตอน -> ms
+
+
+def lazy_import(name):
+    """คืนโมดูลที่ยังไม่โหลดจริง (ถ้าถูก import ไปแล้วคืนตัวเดิม)"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named {name!r}")
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def load_now(*modules):
+    """บังคับโหลดโมดูล lazy ทันที (เรียกในเธรดหลักก่อนเริ่ม thread อื่น)"""
+    for module in modules:
+        module.__name__
+
+
+@contextmanager
+def timed(name):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + (time.perf_counter() - t0) * 1000
+
+
+def mark(name):
+    """บันทึกเวลาตั้งแต่ T0 ถึงตอนนี้"""
+    timings[name] = (time.perf_counter() - T0) * 1000
+
+
+def warm_up(templates, shape):
+    """
+    จ่ายค่าเรียก OpenCV ครั้งแรก (โหลด lib ย่อย, thread pool, จองหน่วยความจำ) ก่อนบอทเริ่มจริง
+    templates: Template หรือ tuple (gray, edge) ตัวไหนเป็น None ข้ามได้
+    shape: (h, w) ของภาพที่จะใช้ match จริง
+    """
+    import numpy as np
+
+    from frame_context import FrameContext
+    from matching import score
+
+    frame = FrameContext(np.zeros(shape, np.uint8))
+    frame.edge
+    for tpl in templates:
+        if tpl is None:
+            continue
+        gray, edge = tpl
+        if gray.shape[0] <= shape[0] and gray.shape[1] <= shape[1]:
+            score(frame.gray, gray)
+            score(frame.edge, edge)
+
+
+def format_timings(title="⏱️ Startup"):
+    return f"{title}: " + " | ".join(f"{name} {ms:.0f} ms" for name, ms in timings.items())
+
+
+def print_timings(title="⏱️ Startup"):
+    print(format_timings(title))
@@ -0,0 +1,303 @@
+"""
+🖥️ Supervisor - รันหลาย instance ของเกมบนเครื่องเดียว (--multi instances.json)
+
+เดิม 1 สคริปต์ = 1 region + เมาส์ทั้งเครื่อง รันหลายสคริปต์พร้อมกันแล้วแย่งเคอร์เซอร์กัน
+ตอนนี้:
+- 1 instance = 1 worker process (จับภาพ + ตรวจจับเอง ใช้ core แยกกัน ไม่ติด GIL)
+- worker ไม่แตะเมาส์: ArbiterInput ส่งคำสั่งคลิกเข้าคิวเดียว (multiprocessing.Queue มีขนาดจำกัด เต็ม = worker รอ)
+- MouseArbiter (thread ใน process หลัก) ทำคำสั่งทีละ gesture จนจบ
+  gesture = คลิก 1 ครั้ง (double click ครบทั้ง 2 จังหวะ) หรือชุดคลิกใน `with inputs.gesture():`
+  -> คลิกของ instance อื่นแทรกกลาง gesture ไม่ได้
+- ก่อนทำแต่ละ gesture arbiter ดึงทุกอย่างที่รอในคิว: แต่ละ instance เหลือ gesture รอได้ 1 ก้อน (ก้อนใหม่แทนก้อนเก่า)
+  แล้วทำของ instance ที่รอนานสุดก่อน gesture ที่รอเกิน max_age วินาทีถูกทิ้ง (จอเปลี่ยนไปแล้ว)
+  -> เมาส์ (~80 ms/double click) ตามไม่ทันหลาย instance ก็ไม่เกิดคิวคลิกเก่าค้างเป็นวินาที
+- กด stop / FailSafe ที่ arbiter -> stop event หยุดทุก worker, คลิกที่ค้างในคิวถูกทิ้ง
+
+instances.json:
+  {"instances": [
+    {"name": "left",  "origin": [0, 0]},
+    {"name": "right", "origin": [1920, 0], "region": [2300, 200, 3100, 900]}
+  ]}
+  origin = มุมซ้ายบนของหน้าต่างเกม (พิกัดปุ่ม/คลิกพิเศษที่อ้างอิง 1920x1080 ถูกเลื่อนตามนี้)
+  region = [x1, y1, x2, y2] พื้นที่ค้นหาบนจอ (ไม่ใส่ = region จาก spatula_region.json เลื่อนตาม origin)
+  ไม่มีทั้งสองอย่าง = ค้นทั้งจอ ใช้ได้กับ instance เดียวเท่านั้น
+  (หลายตัวค้นทั้งจอ = เห็นภาพเดียวกันแล้วคลิกหน้าต่างเดียวกัน -> ValueError)
+"""
+
+import contextlib
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+
+def load_instances(path, default_region=None):
+    """
+    อ่าน instances.json -> list ของ {"name", "origin": (x, y), "region": (x, y, w, h) หรือ None}
+    default_region: (x, y, w, h) ของ instance ที่ origin = (0, 0) (ใช้เมื่อไม่ระบุ region)
+    ไฟล์ผิดรูปแบบ / instance ที่ค้นทั้งจอมีมากกว่า 1 ตัว / region ซ้ำกัน -> ValueError
+    """
+    data = json.loads(open(path, encoding="utf-8").read())
+    items = data.get("instances") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        raise ValueError("ต้องมี \"instances\" อย่างน้อย 1 ตัว")
+
+    specs = []
+    for n, item in enumerate(items, 1):
+        name = str(item.get("name") or n)
+        origin = item.get("origin", [0, 0])
+        if not (isinstance(origin, list) and len(origin) == 2):
+            raise ValueError(f"instance {name}: origin ต้องเป็น [x, y]")
+        ox, oy = int(origin[0]), int(origin[1])
+        r = item.get("region")
+        if r is not None:
+            if not (isinstance(r, list) and len(r) == 4):
+                raise ValueError(f"instance {name}: region ต้องเป็น [x1, y1, x2, y2]")
+            x1, y1, x2, y2 = [int(v) for v in r]
+            region = (x1, y1, x2 - x1, y2 - y1)
+        elif default_region:
+            x, y, w, h = default_region
+            region = (x + ox, y + oy, w, h)
+        else:
+            region = None
+        specs.append({"name": name, "origin": (ox, oy), "region": region})
+
+    names = [s["name"] for s in specs]
+    if len(set(names)) != len(names):
+        raise ValueError(f"ชื่อ instance ซ้ำกัน: {names}")
+    if len(specs) > 1:
+        fullscreen = [s["name"] for s in specs if s["region"] is None]
+        if fullscreen:
+            raise ValueError(f"instance {', '.join(fullscreen)}: ไม่มี region (จะค้นทั้งจอซ้อนกับ instance อื่น) "
+                             f"ใส่ \"region\" หรือตั้ง spatula_region.json ก่อน")
+        regions = [s["region"] for s in specs]
+        if len(set(regions)) != len(regions):
+            raise ValueError(f"region ของ instance ซ้ำกัน: {regions} (origin ต่างกันไหม?)")
+    return specs
+
+
+# =========================
+# WORKER SIDE
+# =========================
+class ArbiterInput:
+    """
+    input sink ใน worker process: ส่งคลิกไปให้ MouseArbiter แทนการขยับเมาส์เอง
+    ข้อความในคิว: (instance, เวลาส่ง time.time(), [(kind, x, y, double), ...]) = 1 gesture (คิวเต็ม = รอ)
+    """
+    name = "arbiter"
+
+    def __init__(self, instance, commands, pixel_source=None):
+        self.instance = instance
+        self.commands = commands
+        self.pixel_source = pixel_source
+        self.sent = 0
+        self._batch = None
+
+    def _send(self, cmd):
+        if self._batch is not None:
+            self._batch.append(cmd)
+        else:
+            self.commands.put((self.instance, time.time(), [cmd]))
+            self.sent += 1
+
+    def move(self, x, y):
+        self._send(("move", int(x), int(y), False))
+
+    def click(self, x, y, double=False):
+        self._send(("click", int(x), int(y), bool(double)))
+
+    @contextlib.contextmanager
+    def gesture(self):
+        """คลิกทั้งหมดใน with นี้ถูกส่งเป็นก้อนเดียว arbiter ทำต่อกันจนจบ"""
+        if self._batch is not None:
+            yield
+            return
+        self._batch = []
+        try:
+            yield
+        finally:
+            batch, self._batch = self._batch, None
+            if batch:
+                self.commands.put((self.instance, time.time(), batch))
+                self.sent += 1
+
+    def pixel(self, x, y):
+        if self.pixel_source is None:
+            return (0, 0, 0)
+        return self.pixel_source(x, y)
+
+
+class PrefixedStream:
+    """
+    ห่อ sys.stdout ของ worker: เติม [ชื่อ instance] หน้าทุกบรรทัด
+    เขียนออกทีละบรรทัดเต็ม (print ส่งข้อความกับ \\n แยกกัน -> ไม่งั้นบรรทัดของหลาย process ปนกัน)
+    """
+
+    def __init__(self, stream, prefix):
+        self.stream = stream
+        self.prefix = prefix
+        self._pending = ""
+
+    def write(self, s):
+        lines = (self._pending + s).split("\n")
+        self._pending = lines.pop()
+        if lines:
+            self.stream.write("".join(f"{self.prefix}{line}\n" for line in lines))
+            self.stream.flush()
+        return len(s)
+
+    def flush(self):
+        if self._pending:
+            self.stream.write(self.prefix + self._pending)
+            self._pending = ""
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+# =========================
+# SUPERVISOR SIDE
+# =========================
+class MouseArbiter:
+    """
+    thread เดียวที่ได้แตะเมาส์จริง: ดึง gesture จากคิวแล้วทำทีละก้อนตามลำดับที่ส่งมา
+    discard_fn() เป็นจริง (หยุดแล้ว) -> รับคิวต่อแต่ไม่คลิก (worker ที่กำลังปิดจะไม่ค้างตอน put)
+    on_error(e): error จากเมาส์จริง (เช่น pyautogui.FailSafeException) -> หยุดคลิกทุก instance
+    max_age: gesture ที่รอนานกว่านี้ (วินาที นับจากตอน worker ส่ง) ถูกทิ้ง (0 = ไม่ทิ้ง)
+    """
+
+    def __init__(self, inputs, commands, discard_fn=None, on_error=None, history=10000, max_age=0.25):
+        self.inputs = inputs
+        self.commands = commands
+        self.discard_fn = discard_fn or (lambda: False)
+        self.on_error = on_error
+        self.max_age = max_age
+        self.error = None
+        self.per = {}      # instance -> {"gestures", "clicks", "discarded", "replaced", "stale"}
+        self.pending = {}  # instance -> (sent_at, cmds) gesture ที่รอทำ (instance ละ 1 ก้อน)
+        self.latencies = {}  # instance -> deque ของเวลาส่ง -> ทำเสร็จ (วินาที)
+        self.history = history
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="mouse-arbiter", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._running = False
+        self._thread.join(timeout=2.0)
+
+    def _stats(self, instance):
+        st = self.per.get(instance)
+        if st is None:
+            st = self.per[instance] = {"gestures": 0, "clicks": 0, "discarded": 0, "replaced": 0, "stale": 0}
+        return st
+
+    def _collect(self, timeout):
+        """ย้ายทุก gesture ที่รอในคิวเข้า pending (รอได้ถึง timeout ถ้ายังไม่มีเลย) gesture ใหม่แทนก้อนเก่าของ instance เดียวกัน"""
+        try:
+            item = self.commands.get(timeout=timeout) if timeout else self.commands.get_nowait()
+        except queue.Empty:
+            return
+        while True:
+            instance, sent_at, cmds = item
+            if instance in self.pending:
+                self._stats(instance)["replaced"] += 1
+            self.pending[instance] = (sent_at, cmds)
+            try:
+                item = self.commands.get_nowait()
+            except queue.Empty:
+                return
+
+    def _run(self):
+        while self._running:
+            self._collect(0 if self.pending else 0.1)
+            if not self.pending:
+                continue
+            instance = min(self.pending, key=lambda k: self.pending[k][0])
+            sent_at, cmds = self.pending.pop(instance)
+            st = self._stats(instance)
+            if self.error is not None or self.discard_fn():
+                st["discarded"] += 1
+                continue
+            if self.max_age and time.time() - sent_at > self.max_age:
+                st["stale"] += 1
+                continue
+            try:
+                for kind, x, y, double in cmds:
+                    if kind == "click":
+                        self.inputs.click(x, y, double)
+                        st["clicks"] += 1
+                    else:
+                        self.inputs.move(x, y)
+            except BaseException as e:
+                self.error = e
+                if self.on_error:
+                    self.on_error(e)
+                continue
+            st["gestures"] += 1
+            self.latencies.setdefault(instance, deque(maxlen=self.history)).append(time.time() - sent_at)
+
+    def stats(self):
+        out = {}
+        for instance, st in self.per.items():
+            lat = sorted(self.latencies.get(instance, ()))
+            n = len(lat)
+            out[instance] = dict(st, latency_ms_mean=1000 * sum(lat) / n if n else 0.0,
+                                 latency_ms_p95=1000 * lat[min(n - 1, int(n * 0.95))] if n else 0.0)
+        return out
+
+
+def run_supervised(specs, target, inputs, stop_fn, poll=0.2, join_timeout=5.0, queue_size=8, max_age=0.25):
+    """
+    รัน target(spec, commands, results, stop) 1 process ต่อ spec + MouseArbiter บน inputs จนทุก process จบ
+    queue_size: gesture ที่ค้างในคิวได้ต่อ instance (เต็ม = worker รอตอนส่งคลิก), max_age: ดู MouseArbiter
+    target ต้องเป็นฟังก์ชันระดับโมดูล (spawn บน Windows ต้อง pickle ได้) และ results.put((name, stats)) ก่อนจบ
+    stop_fn(): เช็คทุก poll วินาที (เช่นปุ่ม ESC) เป็นจริง = สั่งทุก worker หยุด
+    Returns: (results {name: stats}, arbiter.stats(), arbiter.error)
+    """
+    import multiprocessing
+
+    ctx = multiprocessing.get_context("spawn")
+    commands, results, stop = ctx.Queue(maxsize=queue_size * len(specs)), ctx.Queue(), ctx.Event()
+    arbiter = MouseArbiter(inputs, commands, discard_fn=stop.is_set, on_error=lambda e: stop.set(),
+                           max_age=max_age).start()
+    procs = [ctx.Process(target=target, args=(spec, commands, results, stop),
+                         name=f"instance-{spec['name']}", daemon=True) for spec in specs]
+    collected = {}
+
+    def drain():
+        while True:
+            try:
+                name, stats = results.get_nowait()
+            except queue.Empty:
+                return
+            collected[name] = stats
+
+    try:
+        for p in procs:
+            p.start()
+        while any(p.is_alive() for p in procs):
+            if stop_fn():
+                stop.set()
+            drain()
+            time.sleep(poll)
+    finally:
+        stop.set()
+        # worker ที่ยัง put ค้างอยู่ปิดไม่ได้จนกว่าจะมีคนอ่านคิว -> drain ไปพร้อมกับรอ
+        deadline = time.monotonic() + join_timeout
+        while any(p.is_alive() for p in procs) and time.monotonic() < deadline:
+            drain()
+            time.sleep(0.05)
+        for p in procs:
+            if p.pid is None:
+                continue  # start() ไม่สำเร็จ
+            if p.is_alive():
+                p.terminate()
+            p.join(timeout=1.0)
+        drain()
+        arbiter.close()
+    return collected, arbiter.stats(), arbiter.error
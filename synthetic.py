@@ -0,0 +1,63 @@
+"""
+🧪 Synthetic Frames - สร้างภาพหน้าจอจำลองจาก template จริง
+
+ใช้กับ benchmark / simulator เพื่อให้ทดสอบได้โดยไม่ต้องเปิดเกม
+ภาพทั้งหมดเป็น BGR (เหมือน cv2.imread) และสุ่มด้วย seed จึงได้ภาพเดิมทุกครั้ง
+"""
+
+import cv2
+import numpy as np
+
+SCREEN_SIZE = (1920, 1080)  # (w, h)
+
+
+def background(size=SCREEN_SIZE, seed=0, noise=12):
+    """พื้นหลังไล่สีเรียบๆ + noise (ไม่มี template ใดๆ)"""
+    w, h = size
+    rng = np.random.default_rng(seed)
+    gx = np.linspace(60, 140, w, dtype=np.float32)[None, :]
+    gy = np.linspace(0, 40, h, dtype=np.float32)[:, None]
+    base = (gx + gy)[..., None] * np.array([1.0, 0.9, 0.8], dtype=np.float32)
+    if noise:
+        base = base + rng.normal(0, noise, (h, w, 1)).astype(np.float32)
+    return np.clip(base, 0, 255).astype(np.uint8)
+
+
+def load_color(path):
+    """โหลด template เป็น BGR (รองรับ PNG ที่มี alpha -> วางบนพื้นเทา)"""
+    img = cv2.imread(str(path), cv2.IMREAD_UNCHANGED)
+    if img is None:
+        raise FileNotFoundError(f"อ่านภาพไม่ได้: {path}")
+    if img.ndim == 2:
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    if img.shape[2] == 4:
+        alpha = img[..., 3:4].astype(np.float32) / 255.0
+        rgb = img[..., :3].astype(np.float32)
+        return (rgb * alpha + 128 * (1 - alpha)).astype(np.uint8)
+    return img
+
+
+def paste(screen, tpl_bgr, x, y, noise=0, seed=0):
+    """วาง template (BGR) ลงบน screen ที่มุมซ้ายบน (x, y) แบบ in-place; noise = ค่า sigma"""
+    h, w = tpl_bgr.shape[:2]
+    patch = tpl_bgr
+    if noise:
+        rng = np.random.default_rng(seed)
+        patch = np.clip(tpl_bgr.astype(np.int16) + rng.normal(0, noise, tpl_bgr.shape), 0, 255).astype(np.uint8)
+    screen[y:y + h, x:x + w] = patch
+    return screen
+
+
+def frame_with(template_path=None, pos=None, size=SCREEN_SIZE, seed=0, noise=12):
+    """
+    สร้างภาพทั้งจอ 1 เฟรม
+    template_path: template ที่จะวาง (None = ไม่มีอะไรบนจอ)
+    pos: มุมซ้ายบนที่จะวาง (None = กลางจอ)
+    """
+    img = background(size, seed=seed, noise=noise)
+    if template_path is not None:
+        tpl = load_color(template_path)
+        if pos is None:
+            pos = ((size[0] - tpl.shape[1]) // 2, (size[1] - tpl.shape[0]) // 2)
+        paste(img, tpl, pos[0], pos[1], noise=noise // 2, seed=seed + 1)
+    return img
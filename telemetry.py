@@ -0,0 +1,221 @@
+"""
+📊 Telemetry - บันทึกข้อมูลทุกรอบของลูปเป็น record แบบมีโครงสร้าง + สรุปเป็นรายงาน
+
+ไฟล์ .cbtel = JSON Lines เขียนต่อท้ายอย่างเดียว (บอทปิดกลางคันก็อ่านได้ถึงบรรทัดล่าสุด)
+  บรรทัดแรกของแต่ละ session: {"meta": {...}, "started": epoch}
+  บรรทัดต่อมา 1 รอบ = 1 record (key สั้นเพื่อให้ไฟล์เล็ก):
+    i   = รอบที่
+    t   = เวลาที่เริ่มจับภาพ (วินาทีนับจากเริ่ม session)
+    cap = เวลาจับภาพ (ms, null = pipeline จับให้)
+    det = เวลาตรวจจับทั้งหมด (ms)
+    m   = {template: [raw, edge, ms]} คะแนนและเวลา match ของ template ที่ถูกค้นในรอบนั้น
+          (raw/edge = null: pre-filter ตัดทิ้งก่อน match เต็ม)
+    s   = state ที่ตัดสิน (null = ไม่เจอ)
+    a   = action ที่ทำ (click / collect / start / menu) หรือไม่มี key นี้
+    n   = จำนวนคลิกของ action
+    lat = เวลาจากเริ่มจับภาพจนส่งคลิกแรกเสร็จ (ms) (ASYNC_INPUT = จนใส่คิวเสร็จ)
+    exe = ASYNC_INPUT: เวลาจากเริ่มจับภาพจน InputDispatcher ทำคลิกแรกจริง (ms)
+          null = ยังไม่ได้ทำตอนเขียน record (ช้ากว่า 1 รอบ) หรือถูกทิ้งเพราะเก่าเกิน
+
+report(path) อ่านไฟล์แล้วสรุป: percentile ของ latency, เวลาที่อยู่ในแต่ละ state, จาน/ชั่วโมง
+"""
+
+import json
+import time
+
+
+def _r(v, nd=4):
+    return None if v is None else round(v, nd)
+
+
+class TelemetryWriter:
+    def __init__(self, path, clock, meta=None):
+        self.clock = clock
+        self.t0 = clock.now()
+        self.records = 0
+        self._rec = None
+        self._command = None
+        self._f = open(path, "a", encoding="utf-8")
+        self._f.write(json.dumps({"meta": meta or {}, "started": time.time()}, separators=(",", ":")) + "\n")
+
+    def frame(self, iteration, started_at):
+        """เริ่ม record ของรอบใหม่ (เขียน record ของรอบก่อนลงไฟล์)"""
+        self._flush()
+        self._start = started_at
+        self._rec = {"i": iteration, "t": _r(started_at - self.t0), "cap": None, "det": None, "m": {}, "s": None}
+
+    def capture(self, ms):
+        if self._rec is not None:
+            self._rec["cap"] = _r(ms, 2)
+
+    def match(self, name, raw, edge, ms):
+        """เรียกจาก match_template (อาจมาจาก worker thread ของ MatchPool)"""
+        rec = self._rec
+        if rec is not None:
+            prev = rec["m"].get(name)
+            rec["m"][name] = [_r(raw), _r(edge), _r(ms + (prev[2] if prev else 0.0), 3)]
+
+    def state(self, state, detect_ms=None):
+        if self._rec is not None:
+            self._rec["s"] = state
+            self._rec["det"] = _r(detect_ms, 2)
+
+    def action(self, name, clicks=1, command=None):
+        """เรียกหลังส่งคลิกแรกของ action แล้ว command = InputCommand ของคลิกนั้น (ASYNC_INPUT) หรือ None"""
+        rec = self._rec
+        if rec is not None and "a" not in rec:
+            rec["a"] = name
+            rec["n"] = clicks
+            rec["lat"] = _r((self.clock.now() - self._start) * 1000, 2)
+            self._command = command
+
+    def _flush(self):
+        if self._rec is not None:
+            cmd, self._command = self._command, None
+            if cmd is not None:
+                done_at = getattr(cmd, "done_at", None)
+                self._rec["exe"] = _r((done_at - self._start) * 1000, 2) if done_at is not None else None
+            self._f.write(json.dumps(self._rec, separators=(",", ":")) + "\n")
+            self.records += 1
+            self._rec = None
+
+    def close(self):
+        self._flush()
+        self._f.close()
+
+
+class TelemetryFanout:
+    """ส่งข้อมูลชุดเดียวกันให้หลายปลายทาง (เช่น TelemetryWriter + LiveMetrics ของ metrics.py)"""
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def frame(self, iteration, started_at):
+        for s in self.sinks:
+            s.frame(iteration, started_at)
+
+    def capture(self, ms):
+        for s in self.sinks:
+            s.capture(ms)
+
+    def match(self, name, raw, edge, ms):
+        for s in self.sinks:
+            s.match(name, raw, edge, ms)
+
+    def state(self, state, detect_ms=None):
+        for s in self.sinks:
+            s.state(state, detect_ms)
+
+    def action(self, name, clicks=1, command=None):
+        for s in self.sinks:
+            s.action(name, clicks, command)
+
+    def close(self):
+        for s in self.sinks:
+            s.close()
+
+
+# =========================
+# REPORT
+# =========================
+def read_sessions(path):
+    """คืน list ของ (meta, records) ตามลำดับ session ในไฟล์"""
+    sessions = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                continue  # บรรทัดสุดท้ายเขียนไม่ครบ (บอทถูกปิดกลางคัน)
+            if "meta" in obj:
+                sessions.append((obj["meta"], []))
+            elif sessions:
+                sessions[-1][1].append(obj)
+    return sessions
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def summarize(records):
+    """สรุป record ของ 1 session -> dict"""
+    series = {"capture": [], "detect": [], "loop": [], "action": [], "executed": []}
+    per_template = {}
+    state_time = {}
+    actions = {}
+    for rec, nxt in zip(records, records[1:] + [None]):
+        if rec.get("cap") is not None:
+            series["capture"].append(rec["cap"])
+        if rec.get("det") is not None:
+            series["detect"].append(rec["det"])
+        for name, (_, _, ms) in rec.get("m", {}).items():
+            per_template.setdefault(name, []).append(ms)
+        if "a" in rec:
+            actions[rec["a"]] = actions.get(rec["a"], 0) + 1
+            series["action"].append(rec["lat"])
+            if rec.get("exe") is not None:
+                series["executed"].append(rec["exe"])
+        if nxt is not None:
+            dt = nxt["t"] - rec["t"]
+            series["loop"].append(1000 * dt)
+            key = rec.get("s") or "none"
+            state_time[key] = state_time.get(key, 0.0) + dt
+
+    duration = records[-1]["t"] - records[0]["t"] if len(records) > 1 else 0.0
+    dishes = actions.get("collect", 0)
+
+    def pct(values):
+        values = sorted(values)
+        return {"n": len(values), "p50": percentile(values, 0.50), "p90": percentile(values, 0.90),
+                "p99": percentile(values, 0.99), "max": values[-1] if values else 0.0}
+
+    return {
+        "iterations": len(records),
+        "duration": duration,
+        "dishes": dishes,
+        "dishes_per_hour": dishes * 3600 / duration if duration > 0 else 0.0,
+        "actions": actions,
+        "latency": {name: pct(v) for name, v in series.items()},
+        "match": {name: pct(v) for name, v in sorted(per_template.items())},
+        "state_time": dict(sorted(state_time.items(), key=lambda kv: -kv[1])),
+    }
+
+
+def print_report(summary, title=""):
+    s = summary
+    print(f"\n📊 {title}")
+    print(f"   รอบ: {s['iterations']} | เวลา: {s['duration']:.1f} วิ | จาน: {s['dishes']} "
+          f"({s['dishes_per_hour']:.1f} จาน/ชม.) | action: {s['actions']}")
+    print(f"   Latency (ms)          {'n':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    rows = [(name, st) for name, st in s["latency"].items()]
+    rows += [(f"match.{name}", st) for name, st in s["match"].items()]
+    for name, st in rows:
+        if st["n"]:
+            print(f"   {name:<21} {st['n']:>6} {st['p50']:>8.2f} {st['p90']:>8.2f} {st['p99']:>8.2f} {st['max']:>8.2f}")
+    total = sum(s["state_time"].values())
+    if total:
+        print(f"   เวลาในแต่ละ state:")
+        for state, sec in s["state_time"].items():
+            print(f"      {state:<18} {sec:8.1f} วิ ({100 * sec / total:4.1f}%)")
+
+
+def report(path):
+    """สรุปทุก session ในไฟล์ .cbtel (ไฟล์เดียวเขียนต่อท้ายได้หลายรอบการรัน)"""
+    sessions = read_sessions(path)
+    if not sessions:
+        print(f"⚠️ ไม่มีข้อมูล telemetry ใน {path}")
+        return []
+    summaries = []
+    for n, (meta, records) in enumerate(sessions, 1):
+        if not records:
+            continue
+        summary = summarize(records)
+        summaries.append(summary)
+        print_report(summary, f"{path} - session {n}/{len(sessions)} {meta}")
+    return summaries
@@ -0,0 +1,92 @@
+"""
+🗃️ Template Cache - เก็บ template ที่ประมวลผลแล้ว (gray / edge / pyramid / scale) ในไฟล์เดียว
+
+โหลดด้วย np.memmap จึงแทบไม่มีค่าใช้จ่ายตอนเปิดบอท (ไม่ต้อง decode PNG / Canny / resize ใหม่)
+key = sha1 ของเนื้อไฟล์ PNG ทุกไฟล์ + ค่าที่ใช้ประมวลผล (params)
+PNG หรือค่าใดเปลี่ยน -> key ไม่ตรง -> สร้างไฟล์ใหม่อัตโนมัติ
+
+รูปแบบไฟล์:
+  MAGIC | uint32 ความยาว header | header (JSON) | ข้อมูล array เรียงกัน (แต่ละก้อนเริ่มที่ offset หาร ALIGN ลงตัว)
+  header = {"key", "templates": {name: {array_key: [offset, shape, dtype]}}}
+"""
+
+import hashlib
+import json
+import os
+import struct
+
+from startup import lazy_import
+
+np = lazy_import("numpy")
+
+MAGIC = b"TPLCACHE1\n"
+ALIGN = 64
+
+
+def cache_key(paths, params):
+    """paths: {name: Path}, params: dict ที่ JSON ได้"""
+    h = hashlib.sha1()
+    for name in sorted(paths):
+        path = paths[name]
+        h.update(name.encode("utf-8"))
+        h.update(path.read_bytes() if path.exists() else b"<missing>")
+    h.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def write_cache(path, key, arrays_by_name):
+    """arrays_by_name: {name: {array_key: ndarray}} (เขียนไฟล์ชั่วคราวแล้ว rename กันไฟล์เสียครึ่งๆ)"""
+    entries = {}
+    blobs = []
+    offset = 0
+    for name, arrays in arrays_by_name.items():
+        entries[name] = {}
+        for akey, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            offset = -(-offset // ALIGN) * ALIGN
+            entries[name][akey] = [offset, list(arr.shape), arr.dtype.str]
+            blobs.append((offset, arr))
+            offset += arr.nbytes
+
+    header = json.dumps({"key": key, "templates": entries}).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 4 + len(header)) // ALIGN) * ALIGN
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for off, arr in blobs:
+            f.seek(data_start + off)
+            f.write(arr.tobytes())
+    os.replace(tmp, path)
+
+
+def read_header(path):
+    """คืน (header, data_start) หรือ None ถ้าไฟล์ไม่มี/ไม่ใช่ template cache"""
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (n,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(n).decode("utf-8"))
+    except (OSError, ValueError, struct.error):
+        return None
+    return header, -(-(len(MAGIC) + 4 + n) // ALIGN) * ALIGN
+
+
+def read_cache(path, key):
+    """คืน {name: {array_key: ndarray (read-only, memmap)}} หรือ None ถ้า key ไม่ตรง"""
+    found = read_header(path)
+    if found is None or found[0].get("key") != key:
+        return None
+    header, data_start = found
+    mm = np.memmap(path, dtype=np.uint8, mode="r")
+    out = {}
+    for name, arrays in header["templates"].items():
+        out[name] = {}
+        for akey, (offset, shape, dtype) in arrays.items():
+            dt = np.dtype(dtype)
+            start = data_start + offset
+            n = int(np.prod(shape)) * dt.itemsize
+            out[name][akey] = mm[start:start + n].view(dt).reshape(shape)
+    return out
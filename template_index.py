@@ -0,0 +1,56 @@
+"""
+📐 Template Index - template หลายขนาด สำหรับหน้าจอ/ขนาด UI ที่ต่างจากตอนทำ template
+
+สร้างทุก scale ไว้ตั้งแต่ตอนโหลด (Template.scaled, ถ้าโหลดจาก template cache จะไม่ต้อง resize เลย)
+ยังไม่รู้ scale: calibrate() ลอง template ทุกตัว x ทุก scale บนเฟรม (anchor)
+เจอครั้งแรกแล้วล็อค scale นั้นไว้ -> active() คืน template ชุดเดียวที่ใช้ match ตามปกติ
+"""
+
+from matching import score
+
+
+def scale_point(pt, s):
+    return (round(pt[0] * s), round(pt[1] * s))
+
+
+def scale_region(region, s):
+    """(x, y, w, h) ที่ความละเอียดอ้างอิง -> ความละเอียดจริง (UI ขยายจากมุมซ้ายบนจอ)"""
+    x, y, w, h = region
+    return (round(x * s), round(y * s), round(w * s), round(h * s))
+
+
+class TemplateIndex:
+    def __init__(self, templates, scales):
+        """templates: tuple ของ Template (ช่องที่เป็น None คงเป็น None ทุก scale)"""
+        self.scales = tuple(sorted(set(scales) | {1.0}))
+        self.bank = {
+            s: tuple(t.scaled(s) if t else t for t in templates)
+            for s in self.scales
+        }
+        self.scale = None  # None = ยังไม่รู้ scale
+        self.anchor = None
+
+    def calibrate(self, frame, threshold):
+        """
+        หา scale จากเฟรมนี้: template/scale ที่ raw score สูงสุดและผ่าน threshold
+        คืน scale ที่ล็อคได้ หรือ None ถ้ายังไม่เจออะไร
+        """
+        fh, fw = frame.shape
+        best = (threshold, None, None)
+        for s, tpls in self.bank.items():
+            for tpl in tpls:
+                if not tpl:
+                    continue
+                th, tw = tpl.shape
+                if th > fh or tw > fw:
+                    continue
+                v, _ = score(frame.gray, tpl.gray)
+                if v >= best[0]:
+                    best = (v, s, tpl.name)
+        if best[1] is not None:
+            self.scale = best[1]
+            self.anchor = best[2]
+        return self.scale
+
+    def active(self):
+        return self.bank[self.scale if self.scale is not None else 1.0]
@@ -0,0 +1,105 @@
+"""
+🧩 Template - template 1 ตัว + รูปแบบที่คำนวณไว้ล่วงหน้า
+
+ใช้แทน tuple (gray, edge) เดิมได้ตรงๆ (tpl[0], tpl[1], gray, edge = tpl ยังใช้ได้)
+รูปแบบที่ได้มาจาก template (pyramid, scale ฯลฯ) คำนวณครั้งแรกที่ถูกเรียกแล้ว cache ไว้ในตัว template
+to_arrays() / from_arrays() ใช้เก็บ/โหลดทุกรูปแบบนั้นจากไฟล์ (template_cache.py)
+"""
+
+from startup import lazy_import
+from frame_context import edges
+
+cv2 = lazy_import("cv2")
+
+
+class Template:
+    def __init__(self, name, gray, edge=None):
+        self.name = name
+        self.gray = gray
+        self.edge = edge if edge is not None else edges(gray)
+        self._pyramid = [gray]
+        self._edge_pyramid = {0: self.edge}
+        self._scaled = {1.0: self}
+
+    # --- ใช้แทน tuple (gray, edge) ---
+    def __getitem__(self, i):
+        return (self.gray, self.edge)[i]
+
+    def __iter__(self):
+        return iter((self.gray, self.edge))
+
+    def __len__(self):
+        return 2
+
+    def __repr__(self):
+        return f"Template({self.name!r}, shape={self.gray.shape})"
+
+    @property
+    def shape(self):
+        return self.gray.shape[:2]
+
+    def pyramid(self, level):
+        """gray ที่ย่อลง 2^level เท่า (ย่อแบบเดียวกับ FrameContext.pyramid)"""
+        while len(self._pyramid) <= level:
+            self._pyramid.append(cv2.pyrDown(self._pyramid[-1]))
+        return self._pyramid[level]
+
+    def edge_pyramid(self, level):
+        e = self._edge_pyramid.get(level)
+        if e is None:
+            e = edges(self.pyramid(level))
+            self._edge_pyramid[level] = e
+        return e
+
+    def scaled(self, s):
+        """template ที่ย่อ/ขยาย s เท่า (edge คำนวณใหม่จากภาพที่ scale แล้ว เหมือนภาพบนจอจริง)"""
+        t = self._scaled.get(s)
+        if t is None:
+            h, w = self.shape
+            size = (max(1, round(w * s)), max(1, round(h * s)))
+            interp = cv2.INTER_AREA if s < 1.0 else cv2.INTER_LINEAR
+            t = Template(self.name, cv2.resize(self.gray, size, interpolation=interp))
+            self._scaled[s] = t
+        return t
+
+    def to_arrays(self):
+        """ทุกรูปแบบที่คำนวณไว้แล้ว -> {key: ndarray} เช่น gray, pyr/1, scale/0.75/edge"""
+        out = {"gray": self.gray, "edge": self.edge}
+        for level in range(1, len(self._pyramid)):
+            out[f"pyr/{level}"] = self._pyramid[level]
+        for level, e in self._edge_pyramid.items():
+            if level:
+                out[f"epyr/{level}"] = e
+        for s, t in self._scaled.items():
+            if t is not self:
+                for key, arr in t.to_arrays().items():
+                    out[f"scale/{s!r}/{key}"] = arr
+        return out
+
+    @classmethod
+    def from_arrays(cls, name, arrays):
+        """สร้าง Template กลับจาก to_arrays() (ไม่คำนวณอะไรใหม่)"""
+        tpl = cls(name, arrays["gray"], arrays["edge"])
+        scaled = {}
+        for key, arr in arrays.items():
+            kind, _, rest = key.partition("/")
+            if kind == "pyr":
+                level = int(rest)
+                while len(tpl._pyramid) <= level:
+                    tpl._pyramid.append(None)
+                tpl._pyramid[level] = arr
+            elif kind == "epyr":
+                tpl._edge_pyramid[int(rest)] = arr
+            elif kind == "scale":
+                s, _, sub = rest.partition("/")
+                scaled.setdefault(float(s), {})[sub] = arr
+        for s, sub in scaled.items():
+            tpl._scaled[s] = cls.from_arrays(name, sub)
+        return tpl
+
+
+def as_template(template, template_edge=None, name="template"):
+    """รับ Template หรือ ndarray gray (+ edge) แล้วคืน Template"""
+    if isinstance(template, Template):
+        return template
+    return Template(name, template, template_edge)
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# โมดูลของบอทอยู่ที่ root ของ repo (ไม่ใช่ package)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
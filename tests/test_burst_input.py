@@ -0,0 +1,17 @@
+"""คลิกตะหลิวแบบ burst ผ่านคิว input: คลิกที่นับ = คลิกที่ถึงเกมจริง"""
+
+import functools
+
+import cooking_bot as bot
+import simulator
+
+
+def test_burst_through_input_queue_counts_issued_clicks(monkeypatch):
+    monkeypatch.setattr(bot, "ASYNC_INPUT", True)
+    monkeypatch.setattr(bot, "INPUT_MAX_AGE", 0.05)
+    monkeypatch.setattr(bot, "bot_loop", functools.partial(bot.bot_loop, burst_clicks=True))
+    # เมาส์ช้ากว่าลูป (virtual clock ไม่ sleep จริง) -> คิวต้องทิ้งคลิกท้ายชุดที่รอนานเกิน
+    report = simulator.run(dishes=2, clock_name="virtual", timings={"click_time": 0.03})
+    assert report["results"]["finished"]
+    assert report["bot"]["click_count"] == report["results"]["clicks"]
+    assert report["bot"]["input"]["dropped"] > 0
@@ -0,0 +1,23 @@
+"""เกมจำลองทั้งลูป + บันทึก session แล้ว replay ต้องได้ state เดิมทุกรอบ"""
+
+import cooking_bot as bot
+import simulator
+from session import ReplayBackend
+
+
+def test_simulator_finishes_all_dishes():
+    report = simulator.run(dishes=2, clock_name="virtual")
+    assert report["results"]["finished"]
+    assert report["bot"]["done_count"] == 2
+
+
+def test_recorded_session_replays_identically(tmp_path):
+    path = tmp_path / "sim.cbrec"
+    report = simulator.run(dishes=2, clock_name="virtual", record_path=path)
+    assert report["results"]["finished"]
+
+    recorded = [(s["i"], s["state"], s["x"], s["y"]) for s in ReplayBackend(path).recorded_states]
+    assert recorded
+    assert bot.replay_session(path) == recorded
+    # replay ซ้ำต้องได้ผลเดิม (VirtualClock ไม่มีเวลาจริงปน)
+    assert bot.replay_session(path) == recorded
@@ -0,0 +1,100 @@
+"""
+🎯 Template Tracker - ค้นใกล้ๆ จุดที่เพิ่งเจอก่อน (temporal ROI)
+
+เมื่อ template ถูกเจอ จะจำตำแหน่ง (พิกัดจอ) ไว้
+เฟรมถัดไปค้นเฉพาะหน้าต่างเล็กรอบจุดนั้น (template + margin รอบด้าน)
+- เจอในหน้าต่าง = hit (ไม่ต้องค้นทั้ง region)
+- ไม่เจอ = miss -> ค้นทั้ง region ตามปกติ (ถ้ายังไม่เจออีกก็ลืมตำแหน่งนั้น)
+MatchPool เรียก match() ของหลาย template พร้อมกัน -> ตัวนับ/ตำแหน่งแก้ภายใต้ lock (match เองอยู่นอก lock)
+"""
+
+import threading
+
+
+class TemplateTracker:
+    def __init__(self, margin=24):
+        self.margin = margin
+        self.last = {}        # name -> (cx, cy) พิกัดจอของจุดที่เจอล่าสุด
+        self.hits = {}        # เจอในหน้าต่าง
+        self.misses = {}      # ค้นหน้าต่างแล้วไม่เจอ -> ต้องค้นเต็ม
+        self.full_scans = {}  # ค้นทั้ง region (ไม่มีตำแหน่งเดิม หรือหลัง miss)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bump(counter, name):
+        counter[name] = counter.get(name, 0) + 1
+
+    def window(self, frame, tpl, center):
+        """หน้าต่างค้นรอบ center (พิกัดจอ) ตัดให้อยู่ในเฟรม -> (x, y, w, h) หรือ None ถ้าเล็กกว่า template"""
+        th, tw = tpl.shape
+        fx, fy, fw, fh = frame.region
+        x0 = max(fx, center[0] - tw // 2 - self.margin)
+        y0 = max(fy, center[1] - th // 2 - self.margin)
+        x1 = min(fx + fw, center[0] - tw // 2 + tw + self.margin)
+        y1 = min(fy + fh, center[1] - th // 2 + th + self.margin)
+        if x1 - x0 < tw or y1 - y0 < th:
+            return None
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def match(self, frame, tpl, match_fn):
+        """
+        match_fn(frame, tpl) -> (cx, cy, score, mode) หรือ None (พิกัดภายในเฟรมที่ส่งเข้าไป)
+        คืนผลในพิกัดของ frame เหมือนเรียก match_fn(frame, tpl) ตรงๆ
+        """
+        name = tpl.name
+        fx, fy = frame.origin
+        with self._lock:
+            center = self.last.get(name)
+        if center is not None:
+            win = self.window(frame, tpl, center)
+            if win is not None:
+                sub = frame.crop(win)
+                res = match_fn(sub, tpl)
+                if res:
+                    dx, dy = sub.origin[0] - fx, sub.origin[1] - fy
+                    res = (res[0] + dx, res[1] + dy, res[2], res[3])
+                    with self._lock:
+                        self._bump(self.hits, name)
+                        self.last[name] = (res[0] + fx, res[1] + fy)
+                    return res
+            with self._lock:
+                self._bump(self.misses, name)
+
+        return self.record(frame, tpl, match_fn(frame, tpl))
+
+    def record(self, frame, tpl, res):
+        """บันทึกผลค้นทั้ง frame (ใช้เมื่อค้นเต็มเองภายนอก เช่นผ่าน MatchPool) แล้วคืน res เดิม"""
+        name = tpl.name
+        with self._lock:
+            self._bump(self.full_scans, name)
+            if res:
+                self.last[name] = (res[0] + frame.origin[0], res[1] + frame.origin[1])
+            else:
+                self.last.pop(name, None)
+        return res
+
+    def tracking(self, name):
+        """มีตำแหน่งล่าสุดของ template นี้อยู่ไหม (ค้นหน้าต่างเล็กก่อน)"""
+        with self._lock:
+            return name in self.last
+
+    def reset(self):
+        with self._lock:
+            self.last.clear()
+
+    def stats(self):
+        """{name: {"hits", "misses", "full_scans", "tracking"}} ของทุก template ที่เคยค้น"""
+        with self._lock:
+            return self._stats()
+
+    def _stats(self):
+        names = set(self.hits) | set(self.misses) | set(self.full_scans)
+        return {
+            n: {
+                "hits": self.hits.get(n, 0),
+                "misses": self.misses.get(n, 0),
+                "full_scans": self.full_scans.get(n, 0),
+                "tracking": self.last.get(n),
+            }
+            for n in sorted(names)
+        }
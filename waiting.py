@@ -0,0 +1,45 @@
+"""
+⏳ Event-driven waits - รอจนเห็นหน้าจอถัดไป แทนการ sleep ตายตัวหลังคลิก
+
+wait_until(): เช็คเงื่อนไขซ้ำจนเป็นจริงหรือครบ timeout
+- settle = รออย่างน้อยเท่านี้ก่อนเช็คครั้งแรก (ให้เกมรับคลิก/เริ่ม animation ก่อน)
+- timeout = เวลา sleep เดิม จึงไม่มีทางรอนานกว่าเดิม (ไม่เจอ = รอครบเท่าเดิม)
+ใช้ clock.now() / clock.sleep() จึงทำงานกับ VirtualClock (replay) ได้
+"""
+
+
+def wait_until(predicate, clock, timeout, settle=0.0, poll=0.05):
+    """คืน (ok, waited): ok = เงื่อนไขเป็นจริงก่อนครบ timeout, waited = เวลาที่รอจริง (วินาที)"""
+    start = clock.now()
+    deadline = start + timeout
+    clock.sleep(min(settle, timeout))
+    while True:
+        if predicate():
+            return True, clock.now() - start
+        remaining = deadline - clock.now()
+        # เหลือเศษเล็กกว่านี้ = ครบแล้ว (VirtualClock บวกเศษที่เล็กกว่าความละเอียดของ float ไม่ขยับ -> วนไม่จบ)
+        if remaining <= 1e-6:
+            return False, clock.now() - start
+        clock.sleep(min(poll, remaining))
+
+
+class WaitStats:
+    """สถิติการรอแยกตาม transition: เวลารอจริงเทียบกับ sleep เดิม"""
+
+    def __init__(self):
+        self.per = {}
+
+    def record(self, name, waited, fallback, ok):
+        st = self.per.get(name)
+        if st is None:
+            st = self.per[name] = {"count": 0, "timeouts": 0, "total": 0.0, "fallback_total": 0.0,
+                                   "min": waited, "max": waited}
+        st["count"] += 1
+        st["timeouts"] += 0 if ok else 1
+        st["total"] += waited
+        st["fallback_total"] += fallback
+        st["min"] = min(st["min"], waited)
+        st["max"] = max(st["max"], waited)
+
+    def stats(self):
+        return {name: dict(st, saved=st["fallback_total"] - st["total"]) for name, st in self.per.items()}